@@ -0,0 +1,103 @@
+"""Benchmark beban: banyak client bersamaan ke endpoint baca utama (req/s, p50, p99).
+
+Jalankan dari folder backend (butuh: pip install httpx):
+    python bench/async_load.py --concurrency 500
+    python bench/async_load.py --bust-cache      # lewati cache response, ukur jalur query database
+    python bench/async_load.py --url http://127.0.0.1:8000   # ke server uvicorn yang sudah jalan
+Untuk perbandingan sebelum/sesudah, jalankan skrip yang sama pada commit lama.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import seed  # noqa: E402
+
+DEFAULT_PATHS = ["/products/?limit=50", "/prices/", "/blogs/", "/orders/my-orders/beli0?limit=20"]
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+async def run(args):
+    import httpx
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, limits=httpx.Limits(max_connections=args.concurrency))
+    else:
+        os.chdir(tempfile.mkdtemp(prefix="nbb-bench-"))
+        import main as app_module
+        seed.seed(**seed.volumes_from_args(args))
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app_module.app), base_url="http://bench")
+
+    paths = args.paths or DEFAULT_PATHS
+    latencies = {path: [] for path in paths}
+    failures = {}
+    deadline = time.perf_counter() + args.seconds
+    counter = 0
+
+    async def worker(n):
+        nonlocal counter
+        i = n
+        while time.perf_counter() < deadline:
+            path = paths[i % len(paths)]
+            url = path
+            if args.bust_cache:
+                counter += 1
+                url += ("&" if "?" in path else "?") + f"_b={counter}"
+            start = time.perf_counter()
+            try:
+                r = await client.get(url)
+                ok = r.status_code == 200
+            except Exception:  # in-process: exception aplikasi ikut naik ke client
+                ok = False
+            if ok:
+                latencies[path].append(time.perf_counter() - start)
+            else:
+                failures[path] = failures.get(path, 0) + 1
+            i += 1
+
+    async with client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    total = sum(len(v) for v in latencies.values())
+    all_latencies = [x for v in latencies.values() for x in v]
+    print(f"concurrency={args.concurrency} durasi={elapsed:.1f}s bust_cache={args.bust_cache}")
+    print(
+        f"TOTAL  {total / elapsed:8.1f} req/s  p50={statistics.median(all_latencies) * 1000:7.1f}ms  "
+        f"p99={percentile(all_latencies, 99) * 1000:7.1f}ms  gagal={sum(failures.values())}"
+    )
+    for path, values in latencies.items():
+        if values:
+            print(
+                f"{path:40s} {len(values) / elapsed:8.1f} req/s  p50={statistics.median(values) * 1000:7.1f}ms  "
+                f"p99={percentile(values, 99) * 1000:7.1f}ms  gagal={failures.get(path, 0)}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--bust-cache", action="store_true")
+    parser.add_argument("--url")
+    parser.add_argument("--paths", nargs="*")
+    seed.add_arguments(parser)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
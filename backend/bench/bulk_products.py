@@ -0,0 +1,79 @@
+"""Benchmark: import produk satu per satu (POST /products/) vs POST /products/bulk (JSON & CSV).
+
+Jalankan dari folder backend:
+    python bench/bulk_products.py --rows 10000
+    python bench/bulk_products.py --rows 10000 --single-rows 10000   # ukur penuh jalur satu per satu
+Jalur satu per satu diukur pada --single-rows baris lalu diekstrapolasi ke --rows.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--single-rows", type=int, default=1000)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="nbb-bench-"))
+    warnings.filterwarnings("ignore")
+
+    import main as app_module
+    from fastapi.testclient import TestClient
+    from database import SessionLocal
+    from models import User, Product
+
+    db = SessionLocal()
+    db.add(User(email="tani@bench", username="tani", hashed_password="-", role="petani"))
+    db.commit()
+    db.close()
+
+    client = TestClient(app_module.app)
+    rows = [
+        {"name": f"Kopi {i}", "description": "Arabika gayo " * 5, "price": 50_000 + i, "stock": i % 100}
+        for i in range(args.rows)
+    ]
+
+    start = time.perf_counter()
+    for row in rows[:args.single_rows]:
+        response = client.post("/products/", json={**row, "seller_username": "tani"})
+        assert response.status_code == 200, response.text
+    single = time.perf_counter() - start
+    per_row = single / args.single_rows
+    print(f"satu per satu: {args.single_rows} produk dalam {single:.1f}s ({per_row * 1000:.1f}ms/produk), "
+          f"perkiraan {args.rows} produk: {per_row * args.rows:.0f}s")
+
+    start = time.perf_counter()
+    response = client.post("/products/bulk?seller_username=tani", json=rows)
+    assert response.status_code == 200, response.text
+    print(f"bulk JSON: {args.rows} produk dalam {time.perf_counter() - start:.2f}s")
+
+    csv_body = "name,description,price,stock\n" + "".join(
+        f"{r['name']},{r['description']},{r['price']},{r['stock']}\n" for r in rows
+    )
+    start = time.perf_counter()
+    response = client.post("/products/bulk?seller_username=tani", files={"file": ("produk.csv", csv_body, "text/csv")})
+    assert response.status_code == 200, response.text
+    print(f"bulk CSV: {args.rows} produk dalam {time.perf_counter() - start:.2f}s")
+
+    created = response.json()["results"]
+    updates = [{"id": r["id"], "price": 60_000, "stock": 7} for r in created]
+    start = time.perf_counter()
+    response = client.patch("/products/bulk?seller_username=tani", json=updates)
+    assert response.status_code == 200, response.text
+    print(f"bulk PATCH: {len(updates)} produk dalam {time.perf_counter() - start:.2f}s")
+
+    db = SessionLocal()
+    print(f"total produk di database: {db.query(Product).count()}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
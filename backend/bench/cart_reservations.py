@@ -0,0 +1,124 @@
+"""Benchmark: "panen raya" — banyak pembeli merebut stok sedikit.
+Alur lama: keranjang di localStorage, stok baru dicek di POST /orders (gagal di akhir, lalu retry).
+Alur baru: PUT /cart/items menahan stok saat item dimasukkan, POST /orders/checkout tanpa validasi ulang.
+
+Jalankan dari folder backend (butuh: pip install httpx):
+    python bench/cart_reservations.py --buyers 300 --products 5 --stock 40
+Tulis terbuang = UPDATE stok yang sudah dijalankan lalu di-rollback karena item lain di pesanan yang sama habis.
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import seed  # noqa: E402
+
+
+def carts(args):
+    rng = random.Random(7)
+    return [
+        {pid: rng.randint(1, 2) for pid in rng.sample(range(1, args.products + 1), rng.randint(1, min(3, args.products)))}
+        for _ in range(args.buyers)
+    ]
+
+
+async def old_flow(client, buyer, items, result):
+    """Checkout sekaligus; jika gagal, buang item yang habis (sesuai pesan error) dan coba lagi"""
+    items = dict(items)
+    while items:
+        result["checkouts"] += 1
+        r = await client.post("/orders/", json={
+            "buyer_username": buyer, "items": [{"product_id": p, "quantity": q} for p, q in items.items()],
+        })
+        if r.status_code == 200:
+            result["orders"] += 1
+            result["units"] += sum(items.values())
+            return
+        result["failed_checkouts"] += 1
+        # Nama produk dari seed.py berakhiran indeks (id - 1): buang produk itu dari keranjang
+        name = r.json()["detail"].split("'")[1]
+        sold_out = int(name.rsplit(" ", 1)[1]) + 1
+        # Stok diupdate urut id: produk sebelum yang habis sudah di-UPDATE lalu ikut rollback
+        result["wasted_writes"] += sum(1 for p in items if p < sold_out)
+        items.pop(sold_out, None)
+
+
+async def new_flow(client, headers, items, result):
+    """Item yang stoknya habis langsung ditolak saat dimasukkan keranjang; checkout tidak gagal lagi"""
+    held = 0
+    for product_id, quantity in items.items():
+        r = await client.put(f"/cart/items/{product_id}", json={"quantity": quantity}, headers=headers)
+        if r.status_code == 200:
+            held += quantity
+        else:
+            result["rejected_adds"] += 1
+    if not held:
+        return
+    result["checkouts"] += 1
+    r = await client.post("/orders/checkout", headers=headers)
+    if r.status_code == 200:
+        result["orders"] += 1
+        result["units"] += held
+    else:
+        result["failed_checkouts"] += 1
+
+
+async def run(args, flow):
+    import httpx
+    import main as app_module
+    from routers.auth import create_access_token
+
+    result = dict(orders=0, units=0, checkouts=0, failed_checkouts=0, wasted_writes=0, rejected_adds=0)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    first_buyer_id = 2 + 1  # admin, tani0
+
+    async def buyer(i, items):
+        async with semaphore:
+            if flow == "lama":
+                await old_flow(client, f"beli{i}", items, result)
+            else:
+                token = create_access_token({"sub": f"beli{i}", "uid": first_buyer_id + i, "role": "pembeli"})
+                await new_flow(client, {"Authorization": f"Bearer {token}"}, items, result)
+
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(buyer(i, items) for i, items in enumerate(carts(args))))
+        result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--buyers", type=int, default=300)
+    parser.add_argument("--products", type=int, default=5)
+    parser.add_argument("--stock", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--flow", choices=["lama", "baru"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.flow:
+        os.chdir(tempfile.mkdtemp(prefix="nbb-bench-"))
+        seed.seed(sellers=1, buyers=args.buyers, products=args.products, orders=0, blogs=0, price_types=0,
+                  min_stock=args.stock, max_stock=args.stock)
+        r = asyncio.run(run(args, args.flow))
+        print(f"{args.flow:5s} pesanan={r['orders']:4d} unit={r['units']:4d} checkout={r['checkouts']:4d} "
+              f"checkout gagal={r['failed_checkouts']:4d} tulis terbuang={r['wasted_writes']:4d} "
+              f"item ditolak di keranjang={r['rejected_adds']:4d} waktu={r['seconds']:.2f}s")
+        return
+
+    print(f"{args.buyers} pembeli, {args.products} produk x stok {args.stock} "
+          f"(total {args.products * args.stock} unit), concurrency {args.concurrency}")
+    for flow in ("lama", "baru"):  # proses terpisah: database & cache masing-masing bersih
+        subprocess.run([sys.executable, __file__, *sys.argv[1:], "--flow", flow], check=True)
+
+
+if __name__ == "__main__":
+    main()
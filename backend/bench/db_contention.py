@@ -0,0 +1,115 @@
+"""Benchmark: latensi pembaca katalog selagi pesanan terus dibuat (penulis paralel).
+
+Jalankan dari folder backend:
+    python bench/db_contention.py                              # profil default (WAL)
+    SQLITE_JOURNAL_MODE=DELETE SQLITE_SYNCHRONOUS=FULL python bench/db_contention.py   # pembanding
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import seed  # noqa: E402
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="nbb-bench-"))
+
+    import database
+    from database import SessionLocal
+    from models import Product
+    from fastapi import HTTPException
+    from routers.produk import catalog_select
+    from routers.pesanan import create_order, OrderCreate
+
+    # Stok sangat besar supaya penulis tidak pernah kehabisan stok
+    seed.seed(sellers=1, buyers=1, products=args.products, orders=0, blogs=0, price_types=0,
+              min_stock=1_000_000, max_stock=1_000_000)
+
+    stop = threading.Event()
+    read_latencies = []
+    write_latencies = []
+    errors = {}
+    lock = threading.Lock()
+
+    def reader():
+        while not stop.is_set():
+            session = SessionLocal()
+            start = time.perf_counter()
+            try:
+                session.execute(catalog_select().order_by(Product.id).limit(100)).all()
+                with lock:
+                    read_latencies.append(time.perf_counter() - start)
+            except Exception as e:
+                with lock:
+                    errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+            finally:
+                session.close()
+
+    def writer(n):
+        i = 0
+        while not stop.is_set():
+            i += 1
+            session = SessionLocal()
+            order = OrderCreate(buyer_username="beli0", items=[
+                {"product_id": 1 + (n * 7 + i * 3 + k) % args.products, "quantity": 1} for k in range(3)
+            ])
+            start = time.perf_counter()
+            try:
+                create_order(order, None, session)
+                with lock:
+                    write_latencies.append(time.perf_counter() - start)
+            except (HTTPException, Exception) as e:
+                with lock:
+                    errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+            finally:
+                session.close()
+
+    threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(n,)) for n in range(args.writers)]
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    print(f"journal_mode={database.SQLITE_JOURNAL_MODE} synchronous={database.SQLITE_SYNCHRONOUS}")
+    print(
+        f"pembaca: {len(read_latencies) / args.seconds:.0f} query/s "
+        f"p50={statistics.median(read_latencies) * 1000:.1f}ms "
+        f"p99={percentile(read_latencies, 99) * 1000:.1f}ms "
+        f"max={max(read_latencies) * 1000:.1f}ms"
+    )
+    if write_latencies:
+        print(
+            f"penulis: {len(write_latencies) / args.seconds:.0f} pesanan/s "
+            f"p50={statistics.median(write_latencies) * 1000:.1f}ms "
+            f"p99={percentile(write_latencies, 99) * 1000:.1f}ms"
+        )
+    print(f"error: {errors or 'tidak ada'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark: export pesanan di-stream (exporter.py) vs membangun seluruh List[OrderOut] di memori.
+
+Jalankan dari folder backend:
+    python bench/export_orders.py --orders 100000
+Memori puncak diukur dengan tracemalloc (alokasi Python), waktu byte pertama = chunk pertama.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import seed  # noqa: E402
+
+
+def measure(label, make_chunks):
+    tracemalloc.start()
+    start = time.perf_counter()
+    first_byte = None
+    size = 0
+    for chunk in make_chunks():
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+        size += len(chunk)
+    total = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label}: byte pertama {first_byte * 1000:.0f}ms, selesai {total:.1f}s, "
+          f"{size / 1e6:.1f}MB output, memori puncak {peak / 1e6:.1f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--max-items", type=int, default=3, help="Item per pesanan: acak 1..max")
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="nbb-bench-"))
+
+    import exporter
+    from typing import List
+    from pydantic import TypeAdapter
+    from database import SessionLocal
+    from list_serialization import order_list_select
+    from routers.pesanan import OrderOut
+
+    summary = seed.seed(sellers=5, buyers=100, products=100, orders=args.orders, max_items=args.max_items,
+                        blogs=0, price_types=0)
+    print(f"{summary['orders']} pesanan, {summary['order_items']} item")
+
+    def materialized():
+        with SessionLocal() as db:
+            orders = db.execute(order_list_select()).scalars().all()
+            for o in orders:
+                o.buyer_name = o.buyer.username if o.buyer else None
+            yield TypeAdapter(List[OrderOut]).dump_json(orders)
+
+    measure("List[OrderOut] sekaligus", materialized)
+    measure("stream CSV", lambda: exporter.iter_export(exporter.order_rows_select(), "csv"))
+    measure("stream NDJSON", lambda: exporter.iter_export(exporter.order_rows_select(), "ndjson"))
+
+
+if __name__ == "__main__":
+    main()
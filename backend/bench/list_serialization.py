@@ -0,0 +1,127 @@
+"""Benchmark: CPU per request endpoint list — jalur lama (objek ORM/Row -> model Pydantic per baris)
+vs jalur cepat (kolom saja -> dict -> orjson), plus biaya & hasil kompresi gzip/brotli.
+
+Jalankan dari folder backend:
+    python bench/list_serialization.py --products 10000 --orders 10000
+CPU diukur dengan time.process_time (query + serialisasi, tanpa jaringan dan tanpa cache response),
+yaitu biaya membangun body saat cache kosong / data baru berubah.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import seed  # noqa: E402
+
+
+def order_list_select():
+    """Jalur lama (objek ORM): Order + item, produk & pembeli di-load dengan selectin.
+    Endpoint list sekarang memakai order_summary_select + order_items_select (Row, tanpa ORM)."""
+    from sqlalchemy import select
+    from sqlalchemy.orm import selectinload
+    from models import Order, OrderItem, Product, User
+
+    return select(Order).options(
+        selectinload(Order.items)
+        .selectinload(OrderItem.product)
+        .load_only(Product.name, Product.image_url),
+        selectinload(Order.buyer).load_only(User.username),
+    )
+
+
+def cpu_ms(fn, repeat: int) -> float:
+    fn()  # pemanasan
+    best = None
+    for _ in range(repeat):
+        start = time.process_time()
+        fn()
+        elapsed = time.process_time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--orders", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="nbb-bench-"))
+    # Semua produk milik satu petani: /products/tani0 mengembalikan seluruh baris sekaligus
+    seed.seed(sellers=1, buyers=200, products=args.products, orders=args.orders, blogs=0, price_types=0)
+
+    from typing import List
+    from pydantic import TypeAdapter
+    from sqlalchemy import select
+    import compression
+    import fast_json
+    from database import SessionLocal
+    from models import Order, OrderItem, Product
+    from routers.pesanan import (
+        OrderOut, filter_orders, order_items_select, order_summary_select, orders_response,
+    )
+    from routers.produk import ProductOut, catalog_select
+
+    product_list = TypeAdapter(List[ProductOut])
+    order_list = TypeAdapter(List[OrderOut])
+    db = SessionLocal()
+    seller_id = 2  # tani0 (id 1 = admin)
+    seller_orders = select(OrderItem.order_id).join(Product, OrderItem.product_id == Product.id).where(
+        Product.seller_id == seller_id
+    )
+
+    def products_old(stmt):
+        rows = db.execute(stmt).all()
+        return product_list.dump_json(product_list.validate_python(rows, from_attributes=True))
+
+    def products_new(stmt):
+        return fast_json.dump_rows(db.execute(stmt).all())
+
+    def orders_old(limit):
+        orders = db.execute(filter_orders(order_list_select().where(Order.id.in_(seller_orders)), limit)).scalars().all()
+        orders = orders[:limit]
+        for o in orders:
+            o.buyer_name = o.buyer.username if o.buyer else None
+        body = order_list.dump_json(order_list.validate_python(orders, from_attributes=True))
+        db.expunge_all()  # seperti session baru per request
+        return body
+
+    def orders_new(limit):
+        rows = db.execute(filter_orders(order_summary_select().where(Order.id.in_(seller_orders)), limit)).all()[:limit]
+        items = db.execute(order_items_select([r.id for r in rows])).all()
+        return orders_response(rows, items, {}).body
+
+    all_products = catalog_select().where(Product.seller_id == seller_id).order_by(Product.id)
+    page = catalog_select().order_by(Product.id).limit(501)
+    cases = [
+        (f"GET /products/tani0 ({args.products} baris)", lambda: products_old(all_products), lambda: products_new(all_products)),
+        ("GET /products/?limit=500", lambda: products_old(page), lambda: products_new(page)),
+        ("GET /orders/incoming/tani0?limit=200", lambda: orders_old(200), lambda: orders_new(200)),
+    ]
+
+    print(f"orjson: {'ya' if fast_json.orjson else 'tidak (pydantic-core)'}, "
+          f"brotli: {'ya' if compression.brotli else 'tidak'}")
+    print(f"{'endpoint':<44}{'lama':>10}{'cepat':>10}{'hemat':>8}")
+    for label, old, new in cases:
+        assert json.loads(old()) == json.loads(new()), label  # isi JSON harus identik
+        before, after = cpu_ms(old, args.repeat), cpu_ms(new, args.repeat)
+        print(f"{label:<44}{before:>8.1f}ms{after:>8.1f}ms{(1 - after / before) * 100:>7.0f}%")
+
+    body = products_new(all_products)
+    print(f"\nkompresi body /products/tani0 ({len(body) / 1e6:.2f}MB):")
+    for encoding in ("gzip", "br") if compression.brotli else ("gzip",):
+        start = time.process_time()
+        compressed = compression.compress(body, encoding)
+        print(f"  {encoding}: {len(compressed) / 1e6:.2f}MB ({len(compressed) / len(body) * 100:.0f}%), "
+              f"{(time.process_time() - start) * 1000:.1f}ms CPU (sekali per versi data, disimpan di cache response)")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
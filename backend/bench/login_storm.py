@@ -0,0 +1,88 @@
+"""Benchmark: throughput /login + latensi GET /products/ selama badai login.
+
+Jalankan dari folder backend (butuh: pip install httpx):
+    python bench/login_storm.py                  # bcrypt di process pool (default)
+    HASH_WORKERS=0 python bench/login_storm.py   # pembanding: bcrypt di threadpool
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import seed  # noqa: E402
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--login-concurrency", type=int, default=50)
+    parser.add_argument("--readers", type=int, default=10)
+    parser.add_argument("--products", type=int, default=200)
+    args = parser.parse_args()
+
+    # Database sementara (URL database relatif terhadap working directory)
+    os.chdir(tempfile.mkdtemp(prefix="nbb-bench-"))
+
+    import httpx
+    import main as app_module
+    import passwords
+
+    seed.seed(buyers=args.users, sellers=1, products=args.products, orders=0, blogs=0, price_types=0)
+
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get("/products/")  # warm-up
+        read_latencies = []
+        login_status = {}
+        storm_done = asyncio.Event()
+
+        async def reader():
+            while not storm_done.is_set():
+                start = time.perf_counter()
+                await client.get("/products/")
+                read_latencies.append(time.perf_counter() - start)
+
+        semaphore = asyncio.Semaphore(args.login_concurrency)
+
+        async def login(i):
+            async with semaphore:
+                r = await client.post("/login", json={"username": f"beli{i % args.users}", "password": seed.PASSWORD})
+                login_status[r.status_code] = login_status.get(r.status_code, 0) + 1
+
+        readers = [asyncio.create_task(reader()) for _ in range(args.readers)]
+        start = time.perf_counter()
+        await asyncio.gather(*(login(i) for i in range(args.logins)))
+        elapsed = time.perf_counter() - start
+        storm_done.set()
+        await asyncio.gather(*readers)
+
+    passwords.shutdown_pool()
+    print(f"HASH_WORKERS={passwords.HASH_WORKERS} BCRYPT_ROUNDS={passwords.BCRYPT_ROUNDS}")
+    print(
+        f"login: {args.logins} request dalam {elapsed:.2f}s, "
+        f"sukses {login_status.get(200, 0) / elapsed:.1f} req/s, status {login_status}"
+    )
+    print(
+        f"GET /products/ selama badai: n={len(read_latencies)} "
+        f"p50={statistics.median(read_latencies) * 1000:.1f}ms "
+        f"p99={percentile(read_latencies, 99) * 1000:.1f}ms"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
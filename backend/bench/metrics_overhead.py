@@ -0,0 +1,126 @@
+"""Benchmark: overhead middleware metrik + hook query SQL (METRICS_ENABLED=1 vs 0).
+
+Jalankan dari folder backend (butuh: pip install httpx):
+    python bench/metrics_overhead.py
+Bagian 1 mengukur biaya murni per request / per query (mikro, stabil).
+Bagian 2 end-to-end: setiap mode di subprocess terpisah, bergantian --pairs kali, diambil yang tercepat.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import seed  # noqa: E402
+
+PATHS = ["/", "/prices/", "/products/?limit=50", "/products/tani0", "/orders/my-orders/beli0?limit=20"]
+
+
+async def measure(requests: int, rounds: int) -> dict:
+    import warnings
+    warnings.filterwarnings("ignore")
+    import httpx
+    import main as app_module
+
+    seed.seed(sellers=1, buyers=1, products=200, orders=50, max_items=1, blogs=0, price_types=2)
+
+    results = {}
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path in PATHS:
+            for _ in range(50):  # pemanasan
+                await client.get(path)
+            best = None
+            for _ in range(rounds):
+                start = time.perf_counter()
+                for _ in range(requests):
+                    await client.get(path)
+                elapsed = (time.perf_counter() - start) / requests
+                best = elapsed if best is None else min(best, elapsed)
+            results[path] = best * 1e6
+    return results
+
+
+def micro(iterations: int):
+    import metrics
+    from sqlalchemy import create_engine, text
+
+    async def bare_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def noop_send(message):
+        pass
+
+    class FakeRoute:
+        path = "/bench"
+
+    async def call(app):
+        scope = {"type": "http", "method": "GET", "route": FakeRoute()}
+        start = time.perf_counter()
+        for _ in range(iterations):
+            await app(dict(scope), None, noop_send)
+        return (time.perf_counter() - start) / iterations * 1e6
+
+    bare = asyncio.run(call(bare_app))
+    wrapped = asyncio.run(call(metrics.MetricsMiddleware(bare_app)))
+    print(f"middleware: +{wrapped - bare:.1f}us per request")
+
+    def run_queries(engine):
+        with engine.connect() as conn:
+            statement = text("SELECT 1")
+            start = time.perf_counter()
+            for _ in range(iterations):
+                conn.execute(statement).scalar()
+            return (time.perf_counter() - start) / iterations * 1e6
+
+    plain = run_queries(create_engine("sqlite://"))
+    metrics.install_query_hooks()
+    hooked = run_queries(create_engine("sqlite://"))
+    print(f"hook query SQL: +{hooked - plain:.1f}us per query ({plain:.1f}us -> {hooked:.1f}us untuk SELECT 1)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--pairs", type=int, default=3)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        os.chdir(tempfile.mkdtemp(prefix="nbb-bench-"))
+        print(json.dumps(asyncio.run(measure(args.requests, args.rounds))))
+        return
+
+    micro(50_000)
+
+    runs = {"0": {}, "1": {}}
+    for _ in range(args.pairs):
+        for enabled in ("0", "1"):
+            env = {**os.environ, "METRICS_ENABLED": enabled}
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", "--requests", str(args.requests), "--rounds", str(args.rounds)],
+                env=env, capture_output=True, text=True, check=True,
+            ).stdout
+            for path, value in json.loads(output.strip().splitlines()[-1]).items():
+                runs[enabled][path] = min(value, runs[enabled].get(path, value))
+
+    print(f"{'path':<36}{'tanpa metrik':>14}{'dengan metrik':>15}{'overhead':>12}")
+    overheads = []
+    for path in PATHS:
+        off, on = runs["0"][path], runs["1"][path]
+        overheads.append(on - off)
+        print(f"{path:<36}{off:>12.0f}us{on:>13.0f}us{on - off:>+10.0f}us ({(on - off) / off * 100:+.1f}%)")
+    print(f"median overhead: {statistics.median(overheads):.0f}us/request")
+
+
+if __name__ == "__main__":
+    main()
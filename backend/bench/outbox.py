@@ -0,0 +1,94 @@
+"""Benchmark: latensi PUT /orders/{id}/status saat efek samping bertambah — dijalankan inline di request
+(alur lama) vs lewat outbox + worker background. Efek samping disimulasikan handler yang tidur N ms
+(seperti kirim email / panggil API luar). Juga throughput & lag worker.
+
+Jalankan dari folder backend (butuh: pip install httpx):
+    python bench/outbox.py --requests 300 --handler-ms 5
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import seed  # noqa: E402
+
+
+async def run(args, side_effects: int, inline: bool):
+    import httpx
+    import main as app_module
+    import outbox
+    from database import SessionLocal
+
+    # Handler tambahan (selain notifikasi SSE bawaan) yang masing-masing butuh handler_ms
+    original, original_enqueue = dict(outbox.handlers), outbox.enqueue
+    for _ in range(side_effects):
+        outbox.handler("order.status_changed")(lambda payload: time.sleep(args.handler_ms / 1000))
+    if inline:
+        # Alur lama: semua efek samping dijalankan langsung di request
+        outbox.enqueue = lambda db, event_type, payload: outbox.dispatch(event_type, payload)
+
+    worker = asyncio.create_task(outbox.run_worker(SessionLocal))
+    statuses = ("Diproses", "Dikirim", "Selesai")
+    latencies = []
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        for i in range(args.requests):
+            t = time.perf_counter()
+            r = await client.put(f"/orders/{i % args.orders + 1}/status", json={"status": statuses[i % 3]})
+            assert r.status_code == 200, r.text
+            latencies.append(time.perf_counter() - t)
+        sent = time.perf_counter() - start
+        # Tunggu worker menghabiskan antrian
+        while True:
+            with SessionLocal() as db:
+                if outbox.stats(db)["pending"] == 0:
+                    break
+            await asyncio.sleep(0.01)
+        drained = time.perf_counter() - start
+    worker.cancel()
+
+    outbox.handlers.clear()
+    outbox.handlers.update(original)
+    outbox.enqueue = original_enqueue
+    latencies.sort()
+    processed = outbox.worker_stats.processed
+    outbox.worker_stats = outbox.WorkerStats()
+    return {
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[int(len(latencies) * 0.99)] * 1000,
+        "sent": sent,
+        "drained": drained,
+        "processed": processed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--orders", type=int, default=100)
+    parser.add_argument("--handler-ms", type=float, default=5)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="nbb-bench-"))
+    seed.seed(sellers=5, buyers=50, products=100, orders=args.orders, blogs=0, price_types=0)
+
+    print(f"{args.requests} x PUT /orders/{{id}}/status, efek samping @ {args.handler_ms:g}ms (berurutan, 1 client)")
+    print(f"{'efek samping':<14}{'alur':<8}{'p50':>9}{'p99':>9}{'kirim':>9}{'worker selesai':>16}{'event/detik':>13}")
+    for side_effects in (0, 1, 3, 5):
+        for inline in (True, False):
+            r = asyncio.run(run(args, side_effects, inline))
+            label = "inline" if inline else "outbox"
+            rate = f"{r['processed'] / r['drained']:.0f}" if r["processed"] else "-"
+            print(f"{side_effects:<14}{label:<8}{r['p50']:>7.1f}ms{r['p99']:>7.1f}ms{r['sent']:>8.2f}s"
+                  f"{r['drained']:>15.2f}s{rate:>13}")
+
+
+if __name__ == "__main__":
+    main()
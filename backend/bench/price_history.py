@@ -0,0 +1,88 @@
+"""Benchmark: grafik harga dari rollup harian vs agregasi langsung dari tick mentah.
+
+Jalankan dari folder backend:
+    python bench/price_history.py
+    python bench/price_history.py --years 10 --ticks-per-day 500
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def timed(fn, repeat):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return statistics.median(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--ticks-per-day", type=int, default=200)
+    parser.add_argument("--types", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="nbb-bench-"))
+
+    import migrations
+    import price_history
+    from database import SessionLocal, engine
+    from models import CoffeePriceHistory
+    from sqlalchemy import func, insert, select
+
+    migrations.upgrade(engine)
+
+    db = SessionLocal()
+    days = args.years * 365
+    start_day = datetime.utcnow() - timedelta(days=days)
+    step = timedelta(days=1) / args.ticks_per_day
+    for t in range(args.types):
+        price = 50_000
+        for d in range(days):
+            rows = []
+            for i in range(args.ticks_per_day):
+                price = max(1000, price + random.randint(-200, 200))
+                rows.append({"coffee_type": f"Kopi {t}", "price": price, "recorded_at": start_day + timedelta(days=d) + step * i})
+            db.execute(insert(CoffeePriceHistory), rows)
+        db.commit()
+    seeded = time.perf_counter()
+    price_history.rebuild_rollup(db)
+    print(f"tick: {args.types * days * args.ticks_per_day}, rebuild rollup: {time.perf_counter() - seeded:.1f}s")
+
+    dialect = db.get_bind().dialect.name
+    date_to = datetime.utcnow().date()
+    ranges = {"1 tahun": date_to - timedelta(days=365), f"{args.years} tahun": date_to - timedelta(days=days)}
+
+    for label, date_from in ranges.items():
+        since, until = price_history.day_range(date_from, date_to)
+        day = func.date(CoffeePriceHistory.recorded_at)
+        raw = (
+            select(day, func.min(CoffeePriceHistory.price), func.max(CoffeePriceHistory.price),
+                   func.avg(CoffeePriceHistory.price), func.count())
+            .where(CoffeePriceHistory.coffee_type == "Kopi 0",
+                   CoffeePriceHistory.recorded_at >= since, CoffeePriceHistory.recorded_at < until)
+            .group_by(day)
+        )
+        raw_ms = timed(lambda: db.execute(raw).all(), args.repeat)
+        print(f"[{label}] dari tick mentah (harian, tanpa open/close): {raw_ms:.1f}ms")
+        for interval in price_history.INTERVALS:
+            stmt = price_history.series_select(dialect, "Kopi 0", interval, date_from, date_to)
+            ms = timed(lambda: price_history.to_points(db.execute(stmt).all()), args.repeat)
+            print(f"[{label}] rollup {interval}: {ms:.1f}ms")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark: data produk untuk halaman keranjang — alur lama (unduh seluruh katalog lewat /products/
+per halaman 500, lalu cari produk keranjang di client) vs GET /products/batch?ids=... (hanya produk keranjang).
+Juga revalidasi (If-None-Match) setelah produk LAIN di katalog berubah.
+
+Jalankan dari folder backend (butuh: pip install httpx):
+    python bench/product_batch.py --products 20000 --cart 5
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import seed  # noqa: E402
+
+
+async def full_catalog(client, etags):
+    """Semua halaman /products/ (client menyimpan ETag per halaman). (jumlah request, byte, produk)"""
+    requests, size, products, cursor = 0, 0, {}, None
+    while True:
+        params = {"limit": 500, **({"cursor": cursor} if cursor else {})}
+        key = str(cursor)
+        headers = {"If-None-Match": etags[key][0]} if key in etags else {}
+        r = await client.get("/products/", params=params, headers=headers)
+        requests += 1
+        size += len(r.content)
+        if r.status_code == 200:
+            etags[key] = (r.headers["etag"], r.json())
+        for p in etags[key][1]:
+            products[p["id"]] = p
+        cursor = r.headers.get("x-next-cursor")
+        if not cursor:
+            return requests, size, products
+
+
+async def batch(client, ids, etag=None):
+    headers = {"If-None-Match": etag} if etag else {}
+    r = await client.get("/products/batch", params={"ids": ",".join(map(str, ids))}, headers=headers)
+    return r
+
+
+async def run(args):
+    import httpx
+    import main as app_module
+
+    ids = random.Random(3).sample(range(1, args.products + 1), args.cart)
+    other = next(i for i in range(1, args.products + 1) if i not in ids)
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        etags = {}
+        start = time.perf_counter()
+        requests, size, products = await full_catalog(client, etags)
+        old_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        r = await batch(client, ids)
+        new_ms = (time.perf_counter() - start) * 1000
+        assert r.json() == [products[i] for i in sorted(ids)]  # isi identik dengan katalog
+        print(f"{'':<34}{'request':>8}{'byte':>12}{'waktu':>10}")
+        print(f"{'katalog penuh (/products/)':<34}{requests:>8}{size:>12}{old_ms:>8.1f}ms")
+        print(f"{'batch (/products/batch)':<34}{1:>8}{len(r.content):>12}{new_ms:>8.1f}ms")
+
+        # Produk lain (bukan isi keranjang) berubah: halaman katalog jadi basi, batch tetap 304
+        await client.put(f"/products/{other}", json={"price": 1})
+        start = time.perf_counter()
+        requests, size, _ = await full_catalog(client, etags)
+        old_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        r2 = await batch(client, ids, r.headers["etag"])
+        new_ms = (time.perf_counter() - start) * 1000
+        print(f"\nrevalidasi setelah produk id {other} (di luar keranjang) diubah:")
+        print(f"{'katalog penuh':<34}{requests:>8}{size:>12}{old_ms:>8.1f}ms")
+        print(f"{'batch (status ' + str(r2.status_code) + ')':<34}{1:>8}{len(r2.content):>12}{new_ms:>8.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=20_000)
+    parser.add_argument("--cart", type=int, default=5)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="nbb-bench-"))
+    seed.seed(sellers=20, buyers=10, products=args.products, orders=0, blogs=0, price_types=0)
+    print(f"{args.products} produk, keranjang {args.cart} produk")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Benchmark: biaya rate limit per request + efeknya saat satu client membanjiri /login.
+
+Jalankan dari folder backend (bagian banjir butuh: pip install httpx):
+    python bench/rate_limit.py                    # overhead middleware & bucket per request
+    python bench/rate_limit.py --flood 5          # + banjir /login selama 5 detik, rate limit mati vs hidup
+Overhead diukur dengan memanggil middleware langsung (tanpa HTTP), dibandingkan app ASGI kosong.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import seed  # noqa: E402
+
+
+# ---------- OVERHEAD ----------
+
+async def overhead(requests: int, ips: int):
+    import ratelimit
+
+    async def empty_app(scope, receive, send):
+        pass
+
+    async def noop_send(message):
+        pass
+
+    scopes = [
+        {"type": "http", "path": "/products/", "headers": [], "client": (f"10.0.{i // 256}.{i % 256}", 1234)}
+        for i in range(ips)
+    ]
+    ratelimit.set_backend(ratelimit.MemoryBackend(ratelimit.RATE_LIMIT_MAX_KEYS))
+    limiter = ratelimit.ConcurrencyLimiter(200, 200, 0.5)
+    wrapped = {
+        "app kosong": empty_app,
+        "+ bucket per IP": ratelimit.RateLimitMiddleware(empty_app, ratelimit.RATE_LIMIT_IP, ratelimit.ConcurrencyLimiter(0, 0, 0)),
+        "+ bucket per IP + concurrency": ratelimit.RateLimitMiddleware(empty_app, ratelimit.RATE_LIMIT_IP, limiter),
+    }
+
+    results = {}
+    for label, app in wrapped.items():  # limit asli; tiap IP hanya ~60 request, tidak ada yang ditolak
+        best = None
+        for _ in range(3):
+            start = time.perf_counter()
+            for i in range(requests):
+                await app(scopes[i % ips], None, noop_send)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results[label] = best / requests * 1e6
+
+    rule = ratelimit.parse_limit(ratelimit.RATE_LIMIT_IP)
+    start = time.perf_counter()
+    for i in range(requests):
+        await ratelimit.backend.take(f"orders_write:user:{i % ips}", rule)
+    results["limit() per route (take saja)"] = (time.perf_counter() - start) / requests * 1e6
+
+    base = results["app kosong"]
+    print(f"{requests} request, {ips} IP berbeda")
+    for label, us in results.items():
+        extra = "" if label == "app kosong" or label.startswith("limit") else f"  (+{us - base:.2f}µs)"
+        print(f"  {label:<34}{us:>7.2f}µs/request{extra}")
+    print(f"  bucket tersimpan: {ratelimit.backend.stats()['keys']}")
+
+
+# ---------- BANJIR /login ----------
+
+async def flood(seconds: float, readers: int):
+    import httpx
+    import main as app_module
+
+    def client(ip):
+        transport = httpx.ASGITransport(app=app_module.app, client=(ip, 1234))
+        return httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60)
+
+    stop = time.perf_counter() + seconds
+    attack = {"sent": 0, "ok": 0, "429": 0, "503": 0}
+    normal = {"latency": [], "errors": 0, "logins": [], "login_errors": 0}
+
+    async def attacker(http):
+        while time.perf_counter() < stop:
+            r = await http.post("/login", json={"username": "beli0", "password": "salah"})
+            attack["sent"] += 1
+            key = str(r.status_code) if r.status_code in (429, 503) else "ok"
+            attack[key] += 1
+            if r.status_code == 429:
+                await asyncio.sleep(0.01)  # penyerang naif: tetap mencoba walau ditolak
+
+    async def reader(http, i):
+        start = time.perf_counter()
+        r = await http.post("/login", json={"username": f"beli{i}", "password": seed.PASSWORD})
+        normal["logins"].append(time.perf_counter() - start)
+        normal["login_errors"] += r.status_code != 200
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            r = await http.get("/products/", params={"limit": 50})
+            normal["latency"].append(time.perf_counter() - start)
+            normal["errors"] += r.status_code != 200
+            await asyncio.sleep(0.05)
+
+    bad = client("10.9.9.9")
+    good = [client(f"10.1.0.{i + 1}") for i in range(readers)]
+    await asyncio.gather(*(attacker(bad) for _ in range(50)), *(reader(http, i) for i, http in enumerate(good)))
+    for http in [bad, *good]:
+        await http.aclose()
+
+    latency = sorted(normal["latency"]) or [0.0]
+    return attack, normal, latency
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--ips", type=int, default=10_000)
+    parser.add_argument("--flood", type=float, default=0, help="detik banjir /login (0 = lewati)")
+    parser.add_argument("--readers", type=int, default=10)
+    parser.add_argument("--mode", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        os.chdir(tempfile.mkdtemp(prefix="nbb-bench-"))
+        seed.seed(sellers=2, buyers=args.readers, products=200, orders=0, blogs=0, price_types=0)
+        attack, normal, latency = asyncio.run(flood(args.flood, args.readers))
+        print(f"rate limit {args.mode:5s} penyerang: {attack['sent']:5d} request, {attack['ok']:4d} diproses, "
+              f"{attack['429']:5d} x 429, {attack['503']:4d} x 503 | pengguna lain: login "
+              f"{statistics.median(normal['logins']) * 1000:6.0f}ms (gagal {normal['login_errors']}), "
+              f"GET /products/ p50 {latency[len(latency) // 2] * 1000:6.1f}ms "
+              f"p99 {latency[int(len(latency) * 0.99)] * 1000:6.1f}ms (gagal {normal['errors']})")
+        return
+
+    asyncio.run(overhead(args.requests, args.ips))
+    if args.flood:
+        print(f"\nbanjir /login {args.flood:.0f} detik (50 koneksi dari 1 IP, password salah) + {args.readers} pengguna lain:")
+        for mode in ("mati", "hidup"):  # proses terpisah: konfigurasi dibaca saat import
+            env = {**os.environ, "RATE_LIMIT_ENABLED": "1" if mode == "hidup" else "0"}
+            subprocess.run([sys.executable, __file__, *sys.argv[1:], "--mode", mode], env=env, check=True)
+
+
+if __name__ == "__main__":
+    main()
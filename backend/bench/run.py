@@ -0,0 +1,318 @@
+"""Suite benchmark: skenario realistis terhadap aplikasi FastAPI asli, hasil disimpan sebagai JSON.
+
+Jalankan dari folder backend (butuh: pip install httpx):
+    python bench/run.py                                   # semua skenario, app in-process
+    python bench/run.py --scenarios browse checkout --seconds 20 --concurrency 50
+    python bench/run.py --uvicorn                         # lewat uvicorn di localhost (subprocess)
+    python bench/run.py --url http://127.0.0.1:8000 --skip-seed   # server yang sudah jalan (data dari seed.py)
+    python bench/run.py --compare bench/results/<file lama>.json  # exit code 1 jika ada regresi
+
+Database sementara diisi oleh seed.py (opsi volume: --products, --orders, dst.).
+Jumlah query per request dibaca dari header X-Query-Count (METRICS_DEBUG_HEADERS=1, lihat metrics.py).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import seed  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+ADMIN_HEADERS = {}  # Authorization admin, diisi sekali per run (endpoint /admin butuh token)
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+# ---------- SKENARIO ----------
+# Setiap skenario = satu langkah "pengguna": fungsi async (client, rng, volumes) -> (label, response)
+
+async def browse(client, rng, v):
+    """Pembeli melihat katalog, mencari, membuka harga & artikel"""
+    choice = rng.random()
+    if choice < 0.4:
+        cursor = rng.randint(0, max(v["products"] - 50, 0))
+        return "GET /products/?cursor", await client.get(f"/products/?limit=50&cursor={cursor}")
+    if choice < 0.55:
+        return "GET /products/?seller", await client.get(f"/products/?seller=tani{rng.randrange(v['sellers'])}")
+    if choice < 0.7:
+        return "GET /search/", await client.get(f"/search/?q={rng.choice(seed.WORDS)}")
+    if choice < 0.85:
+        return "GET /prices/", await client.get("/prices/")
+    return "GET /blogs/", await client.get("/blogs/")
+
+
+async def checkout(client, rng, v):
+    """Pembeli membuat pesanan lalu membuka riwayat pesanannya"""
+    buyer = f"beli{rng.randrange(v['buyers'])}"
+    if rng.random() < 0.5:
+        items = [{"product_id": rng.randint(1, v["products"]), "quantity": 1} for _ in range(rng.randint(1, 3))]
+        response = await client.post(
+            "/orders/", json={"buyer_username": buyer, "items": items},
+            headers={"Idempotency-Key": str(uuid.UUID(int=rng.getrandbits(128)))},
+        )
+        return "POST /orders/", response
+    return "GET /orders/my-orders", await client.get(f"/orders/my-orders/{buyer}?limit=20")
+
+
+async def seller(client, rng, v):
+    """Petani membuka dashboard: pesanan masuk, produknya, dan mengubah status pesanan"""
+    name = f"tani{rng.randrange(v['sellers'])}"
+    choice = rng.random()
+    if choice < 0.5:
+        return "GET /orders/incoming", await client.get(f"/orders/incoming/{name}?limit=50")
+    if choice < 0.85:
+        return "GET /products/{username}", await client.get(f"/products/{name}")
+    order_id = rng.randint(1, max(v["orders"], 1))
+    status = rng.choice(["Diproses", "Dikirim", "Selesai"])
+    return "PUT /orders/{id}/status", await client.put(f"/orders/{order_id}/status", json={"status": status})
+
+
+async def admin(client, rng, v):
+    """Dashboard admin: ringkasan, grafik harian, grafik harga"""
+    choice = rng.random()
+    if choice < 0.5:
+        return "GET /admin/stats", await client.get("/admin/stats", headers=ADMIN_HEADERS)
+    if choice < 0.8:
+        return "GET /admin/stats/daily", await client.get("/admin/stats/daily?days=90", headers=ADMIN_HEADERS)
+    coffee_type = seed.COFFEE_TYPES[rng.randrange(max(1, min(v["price_types"], len(seed.COFFEE_TYPES))))]
+    return "GET /prices/history", await client.get(f"/prices/history/{coffee_type}?interval=week")
+
+
+async def login(client, rng, v):
+    """Login (bcrypt): pembeli & petani"""
+    username = f"beli{rng.randrange(v['buyers'])}" if rng.random() < 0.8 else f"tani{rng.randrange(v['sellers'])}"
+    return "POST /login", await client.post("/login", json={"username": username, "password": seed.PASSWORD})
+
+
+SCENARIOS = {"browse": browse, "checkout": checkout, "seller": seller, "admin": admin, "login": login}
+
+
+# ---------- DRIVER ----------
+
+async def run_scenario(client, name, args, volumes):
+    step = SCENARIOS[name]
+    samples = []  # (label, latency, status, query_count)
+    deadline = time.perf_counter() + args.seconds
+
+    async def worker(n):
+        rng = random.Random(f"{args.seed_run}-{name}-{n}")
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                label, response = await step(client, rng, volumes)
+                status = response.status_code
+                queries = response.headers.get("x-query-count")
+            except Exception as e:  # in-process: exception aplikasi ikut naik ke client
+                label, status, queries = type(e).__name__, 0, None
+            samples.append((label, time.perf_counter() - start, status, int(queries) if queries else None))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(args.concurrency)))
+    return summarize(samples, time.perf_counter() - started)
+
+
+def summarize(samples, elapsed):
+    def block(rows):
+        latencies = [latency for _, latency, status, _ in rows if 200 <= status < 400]
+        queries = [q for _, _, status, q in rows if q is not None and 200 <= status < 400]
+        errors = {}
+        for _, _, status, _ in rows:
+            if not 200 <= status < 400:
+                errors[str(status)] = errors.get(str(status), 0) + 1
+        return {
+            "requests": len(rows),
+            "rps": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(statistics.median(latencies) * 1000, 2) if latencies else None,
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2) if latencies else None,
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+            "queries_per_request": round(statistics.mean(queries), 2) if queries else None,
+            "errors": errors,
+        }
+
+    result = block(samples)
+    result["seconds"] = round(elapsed, 2)
+    labels = sorted({label for label, *_ in samples})
+    result["endpoints"] = {label: block([s for s in samples if s[0] == label]) for label in labels}
+    return result
+
+
+def print_result(name, result):
+    def fmt(value, unit=""):
+        return "-" if value is None else f"{value}{unit}"
+
+    print(f"\n[{name}] {result['requests']} request dalam {result['seconds']}s  {result['rps']} req/s  "
+          f"p50={fmt(result['p50_ms'], 'ms')} p95={fmt(result['p95_ms'], 'ms')} p99={fmt(result['p99_ms'], 'ms')}  "
+          f"query/req={fmt(result['queries_per_request'])}  error={result['errors'] or 0}")
+    for label, r in result["endpoints"].items():
+        print(f"    {label:28s} n={r['requests']:<6d} p50={fmt(r['p50_ms'], 'ms'):>10s} "
+              f"p95={fmt(r['p95_ms'], 'ms'):>10s} query/req={fmt(r['queries_per_request']):>6s}  "
+              f"error={r['errors'] or 0}")
+
+
+# ---------- PERBANDINGAN ----------
+
+def compare(old: dict, new: dict, threshold: float) -> bool:
+    """Cetak selisih per skenario. True jika ada regresi (lebih lambat / query bertambah)."""
+    print(f"\nBandingkan dengan {old['meta'].get('commit')} ({old['meta'].get('timestamp')}):")
+    for key in ("mode", "concurrency", "seconds", "volumes", "cpus"):
+        if old["meta"].get(key) != new["meta"].get(key):
+            print(f"  PERHATIAN: {key} berbeda ({old['meta'].get(key)} vs {new['meta'].get(key)}), hasil tidak sebanding")
+    regression = False
+    for name, current in new["scenarios"].items():
+        before = old["scenarios"].get(name)
+        if not before:
+            continue
+        notes = []
+        for key, worse_if_higher in (("rps", False), ("p95_ms", True), ("p99_ms", True)):
+            if before.get(key) and current.get(key) is not None:
+                change = (current[key] - before[key]) / before[key]
+                bad = change > threshold if worse_if_higher else change < -threshold
+                regression |= bad
+                notes.append(f"{key} {before[key]} -> {current[key]} ({change * 100:+.0f}%){' REGRESI' if bad else ''}")
+        old_q, new_q = before.get("queries_per_request"), current.get("queries_per_request")
+        if old_q is not None and new_q is not None:
+            bad = new_q > old_q + 0.5  # jumlah query deterministik: naik = kemungkinan N+1 baru
+            regression |= bad
+            notes.append(f"query/req {old_q} -> {new_q}{' REGRESI' if bad else ''}")
+        print(f"  {name:10s} " + "; ".join(notes))
+    return regression
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run(args, volumes, base_url=None):
+    import httpx
+
+    if base_url:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        client = httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60)
+    else:
+        import main as app_module
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app_module.app), base_url="http://bench")
+
+    results = {}
+    async with client:
+        await client.get("/products/")  # pemanasan
+        if "admin" in args.scenarios:
+            response = await client.post("/login", json={"username": "admin", "password": seed.PASSWORD})
+            ADMIN_HEADERS["Authorization"] = f"Bearer {response.json()['access_token']}"
+        for name in args.scenarios:
+            results[name] = await run_scenario(client, name, args, volumes)
+            print_result(name, results[name])
+    return results
+
+
+def wait_for_server(url: str, timeout: float = 30):
+    import httpx
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(url + "/")
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise SystemExit(f"Server {url} tidak merespons")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", nargs="*", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--seed-run", type=int, default=1, help="Seed urutan request (reprodusibel)")
+    parser.add_argument("--uvicorn", action="store_true", help="Jalankan uvicorn di localhost (subprocess)")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--url", help="Server yang sudah jalan (data harus dari seed.py dengan volume yang sama)")
+    parser.add_argument("--skip-seed", action="store_true")
+    parser.add_argument("--output", help="File JSON hasil (default: bench/results/<waktu>-<commit>.json)")
+    parser.add_argument("--compare", help="File JSON hasil lama untuk dibandingkan")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Batas regresi (0.2 = 20%%)")
+    seed.add_arguments(parser)
+    args = parser.parse_args()
+    volumes = seed.volumes_from_args(args)
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = os.path.abspath(args.compare) if args.compare else None
+
+    workdir = tempfile.mkdtemp(prefix="nbb-bench-")
+    os.chdir(workdir)  # database sementara ./nbb.db (URL default relatif)
+    os.environ.setdefault("METRICS_DEBUG_HEADERS", "1")  # X-Query-Count
+    if not args.url and not args.skip_seed:
+        started = time.perf_counter()
+        summary = seed.seed(**volumes)
+        print(f"seed: {summary} ({time.perf_counter() - started:.1f}s)")
+
+    server = None
+    base_url = args.url
+    if args.uvicorn:
+        base_url = f"http://127.0.0.1:{args.port}"
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", BACKEND_DIR,
+             "--port", str(args.port), "--log-level", "warning"],
+            cwd=workdir, env=os.environ.copy(),
+        )
+        wait_for_server(base_url)
+
+    try:
+        results = asyncio.run(run(args, volumes, base_url))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+        else:
+            import passwords
+            passwords.shutdown_pool()
+
+    commit = git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "mode": "url" if args.url else ("uvicorn" if args.uvicorn else "in-process"),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "seconds": args.seconds,
+            "concurrency": args.concurrency,
+            "volumes": volumes,
+        },
+        "scenarios": results,
+    }
+    output = output or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{commit}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nhasil disimpan: {output}")
+
+    if baseline:
+        with open(baseline) as f:
+            if compare(json.load(f), report, args.threshold):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
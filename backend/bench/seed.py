@@ -0,0 +1,202 @@
+"""Generator data uji: isi database KOSONG dengan volume yang bisa diatur (bulk insert, deterministik).
+
+Dipakai semua skrip di bench/ (import seed), atau langsung dari folder backend:
+    python bench/seed.py --db /tmp/nbb-bench.db --products 50000 --orders 200000
+Nama akun: pembeli beli0, beli1, ...; petani tani0, tani1, ...; admin "admin". Semua password: rahasia
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+# Bench mengirim semua request dari satu IP; rate limit punya bench sendiri (bench/rate_limit.py)
+os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+
+PASSWORD = "rahasia"
+COFFEE_TYPES = ["Arabika Gayo", "Robusta Lampung", "Liberika", "Arabika Toraja", "Robusta Temanggung",
+                "Arabika Kintamani", "Excelsa", "Arabika Flores"]
+WORDS = ["kopi", "arabika", "robusta", "gayo", "petik", "merah", "natural", "honey", "wash", "roasting",
+         "medium", "dark", "light", "biji", "bubuk", "segar", "panen", "lereng", "gunung", "aroma"]
+BATCH = 10_000
+
+DEFAULTS = {
+    "buyers": 200,
+    "sellers": 20,
+    "products": 2000,
+    "orders": 5000,
+    "max_items": 4,
+    "blogs": 50,
+    "price_types": 5,
+    "price_ticks_per_day": 4,
+    "days": 365,
+    "min_stock": 100,
+    "max_stock": 1000,
+    "seed": 42,
+}
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Opsi volume yang sama untuk semua skrip benchmark"""
+    group = parser.add_argument_group("data uji")
+    for name, default in DEFAULTS.items():
+        group.add_argument(f"--{name.replace('_', '-')}", type=int, default=default)
+
+
+def volumes_from_args(args) -> dict:
+    return {name: getattr(args, name) for name in DEFAULTS}
+
+
+def _chunks(rows):
+    for start in range(0, len(rows), BATCH):
+        yield rows[start:start + BATCH]
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def seed(**volumes) -> dict:
+    """Isi database (harus kosong; tabel dibuat lewat migrasi). Mengembalikan ringkasan jumlah baris."""
+    import migrations
+    import passwords
+    import price_history
+    import stats
+    from sqlalchemy import insert
+    from database import SessionLocal, engine
+    from models import User, Product, Order, OrderItem, Blog, CoffeePrice, CoffeePriceHistory
+
+    migrations.upgrade(engine)  # tabel + index pencarian (bench memakai app tanpa lifespan)
+    v = {**DEFAULTS, **volumes}
+    rng = random.Random(v["seed"])
+    now = datetime.utcnow()
+    start = now - timedelta(days=v["days"])
+
+    db = SessionLocal()
+    try:
+        if db.query(User.id).first() is not None:
+            raise SystemExit("Database tidak kosong: seed hanya untuk database baru")
+
+        hashed = passwords.hash_password(PASSWORD)
+        users = [{"id": 1, "email": "admin@bench", "username": "admin", "hashed_password": hashed, "role": "admin"}]
+        sellers = []
+        for i in range(v["sellers"]):
+            sellers.append(len(users) + 1)
+            users.append({
+                "id": len(users) + 1, "email": f"tani{i}@bench", "username": f"tani{i}",
+                "hashed_password": hashed, "role": "petani", "full_name": f"Petani {i}",
+            })
+        buyers = []
+        for i in range(v["buyers"]):
+            buyers.append(len(users) + 1)
+            users.append({
+                "id": len(users) + 1, "email": f"beli{i}@bench", "username": f"beli{i}",
+                "hashed_password": hashed, "role": "pembeli", "full_name": f"Pembeli {i}",
+            })
+        for chunk in _chunks(users):
+            db.execute(insert(User), chunk)
+
+        products = [
+            {
+                "id": i + 1,
+                "name": f"Kopi {_text(rng, 2).title()} {i}",
+                "description": _text(rng, 20),
+                "price": rng.randrange(20_000, 300_000, 500),
+                "stock": rng.randint(v["min_stock"], v["max_stock"]),
+                "seller_id": sellers[i % len(sellers)] if sellers else None,
+            }
+            for i in range(v["products"])
+        ]
+        for chunk in _chunks(products):
+            db.execute(insert(Product), chunk)
+
+        order_count = v["orders"] if products and buyers else 0
+        step = timedelta(days=v["days"]) / max(order_count, 1)
+        item_count = 0
+        for first in range(0, order_count, BATCH):
+            orders, items = [], []
+            for order_id in range(first + 1, min(order_count, first + BATCH) + 1):
+                total = 0
+                for product in rng.sample(products, min(len(products), rng.randint(1, v["max_items"]))):
+                    quantity = rng.randint(1, 3)
+                    total += quantity * product["price"]
+                    items.append({
+                        "order_id": order_id, "product_id": product["id"],
+                        "quantity": quantity, "price_at_purchase": product["price"],
+                    })
+                orders.append({
+                    "id": order_id,
+                    "buyer_id": rng.choice(buyers),
+                    "total_price": total,
+                    "status": rng.choices(["Pending", "Diproses", "Dikirim", "Selesai"], [1, 1, 2, 6])[0],
+                    "created_at": start + step * order_id,
+                })
+            db.execute(insert(Order), orders)
+            db.execute(insert(OrderItem), items)
+            item_count += len(items)
+
+        blogs = [
+            {
+                "title": f"Artikel {_text(rng, 3)} {i}",
+                "content": _text(rng, 300),
+                "author_username": "admin",
+                "created_at": start + timedelta(days=rng.randint(0, v["days"])),
+            }
+            for i in range(v["blogs"])
+        ]
+        for chunk in _chunks(blogs):
+            db.execute(insert(Blog), chunk)
+
+        types = [COFFEE_TYPES[i % len(COFFEE_TYPES)] + ("" if i < len(COFFEE_TYPES) else f" {i}")
+                 for i in range(v["price_types"])]
+        ticks = []
+        tick_step = timedelta(days=1) / max(v["price_ticks_per_day"], 1)
+        for coffee_type in types:
+            price = rng.randrange(40_000, 120_000, 500)
+            for n in range(v["days"] * v["price_ticks_per_day"]):
+                price = max(10_000, price + rng.randrange(-1500, 1501, 500))
+                ticks.append({"coffee_type": coffee_type, "price": price, "recorded_at": start + tick_step * n})
+            db.execute(insert(CoffeePrice).values(coffee_type=coffee_type, price=price, updated_at=now))
+        for chunk in _chunks(ticks):
+            db.execute(insert(CoffeePriceHistory), chunk)
+        db.commit()
+
+        # Counter dashboard & rollup harga dihitung dari data yang baru dimasukkan
+        stats.reconcile(db)
+        price_history.rebuild_rollup(db)
+    finally:
+        db.close()
+
+    return {
+        "users": len(users),
+        "products": len(products),
+        "orders": order_count,
+        "order_items": item_count,
+        "blogs": len(blogs),
+        "price_ticks": len(ticks),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", required=True, help="File SQLite yang akan dibuat/diisi")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    # Harus di-set sebelum modul database di-import
+    path = os.path.abspath(args.db)
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.setdefault("MEDIA_ROOT", os.path.join(os.path.dirname(path), "media"))
+
+    started = time.perf_counter()
+    summary = seed(**volumes_from_args(args))
+    print(", ".join(f"{name}={count}" for name, count in summary.items()))
+    print(f"selesai dalam {time.perf_counter() - started:.1f}s -> {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Benchmark: ribuan koneksi SSE idle di satu worker uvicorn, lalu waktu sebar satu update harga.
+
+Jalankan dari folder backend (butuh: pip install httpx uvicorn):
+    python bench/sse_fanout.py --clients 2000
+Server dijalankan di subprocess (database sementara); angka memori = RSS proses server.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import seed  # noqa: E402
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+async def run(args, server):
+    import httpx
+
+    base = f"http://127.0.0.1:{args.port}"
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=None) as client:
+        for _ in range(100):
+            try:
+                await client.get("/")
+                break
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+        idle_rss = rss_mb(server.pid)
+        token = (await client.post("/login", json={"username": "admin", "password": seed.PASSWORD})).json()
+        admin = {"Authorization": f"Bearer {token['access_token']}"}
+
+        received = {}
+        connected = 0
+        all_connected = asyncio.Event()
+
+        async def listen(n):
+            nonlocal connected
+            async with client.stream("GET", "/events?topics=prices") as response:
+                connected += 1
+                if connected == args.clients:
+                    all_connected.set()
+                async for line in response.aiter_lines():
+                    if line.startswith("data:") and "price" in line:
+                        received.setdefault(n, []).append(time.perf_counter())
+
+        start = time.perf_counter()
+        tasks = [asyncio.create_task(listen(n)) for n in range(args.clients)]
+        await all_connected.wait()
+        print(f"{args.clients} koneksi terbuka dalam {time.perf_counter() - start:.1f}s")
+        await asyncio.sleep(1)
+        stats = (await client.get("/admin/events", headers=admin)).json()
+        print(f"subscriber di server: {stats['subscribers']}, "
+              f"RSS server: {idle_rss:.0f}MB -> {rss_mb(server.pid):.0f}MB "
+              f"(+{(rss_mb(server.pid) - idle_rss) * 1024 / args.clients:.0f}KB/koneksi)")
+
+        fanout = []
+        for i in range(args.updates):
+            received.clear()
+            sent = time.perf_counter()
+            await client.post("/prices/", json={"coffee_type": "Arabika", "price": 50000 + i}, headers=admin)
+            while len(received) < args.clients and time.perf_counter() - sent < 30:
+                await asyncio.sleep(0.01)
+            latencies = [times[0] - sent for times in received.values()]
+            fanout.append(max(latencies))
+            print(
+                f"update {i + 1}: diterima {len(received)}/{args.clients} client, "
+                f"p50={statistics.median(latencies) * 1000:.0f}ms "
+                f"p99={percentile(latencies, 99) * 1000:.0f}ms max={max(latencies) * 1000:.0f}ms"
+            )
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--updates", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="nbb-bench-")
+    os.chdir(workdir)
+    seed.seed(buyers=0, sellers=0, products=0, orders=0, blogs=0, price_types=0)  # hanya akun admin
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", BACKEND_DIR,
+         "--port", str(args.port), "--log-level", "warning", "--backlog", "4096"],
+        cwd=workdir,
+    )
+    try:
+        asyncio.run(run(args, server))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
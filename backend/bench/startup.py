@@ -0,0 +1,102 @@
+"""Benchmark: waktu dari start proses sampai request pertama dilayani — cek schema saat import (alur lama:
+create_all + index pencarian + backfill counter + inspect kolom di setiap import main) vs migrasi berversi
+(satu query ke schema_version di lifespan). Diukur di database baru dan database yang sudah terisi.
+
+Jalankan dari folder backend:
+    python bench/startup.py --runs 5 --products 20000
+Setiap pengukuran = proses Python baru (import dingin), di folder sementara yang sama.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import seed  # noqa: E402
+
+
+def measure(mode: str):
+    """Dijalankan di proses anak: cetak durasi tiap tahap (detik) sebagai JSON"""
+    start = time.perf_counter()
+    import main as app_module
+    from fastapi.testclient import TestClient
+
+    imported = time.perf_counter()
+    if mode == "lama":
+        # Emulasi blok import-time sebelum ada migrasi
+        from sqlalchemy import inspect
+
+        import price_history
+        import stats
+        from database import Base, engine
+        from routers import search
+
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            search.init_search_index(conn)
+        stats.ensure_initialized(engine)
+        price_history.ensure_initialized(engine)
+        inspect(engine).get_columns("products")
+        app_module.migrations.ensure_up_to_date = lambda engine: None
+    checked = time.perf_counter()
+    with TestClient(app_module.app) as client:
+        ready = time.perf_counter()
+        assert client.get("/").status_code == 200
+        served = time.perf_counter()
+    print(json.dumps({
+        "import": imported - start,
+        "cek schema": (checked - imported) + (ready - checked),
+        "request pertama": served - ready,
+        "total": served - start,
+    }))
+
+
+def run(mode: str, workdir: str, env: dict) -> dict:
+    out = subprocess.run(
+        [sys.executable, __file__, "--mode", mode], cwd=workdir, env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--products", type=int, default=20_000)
+    parser.add_argument("--orders", type=int, default=5_000)
+    parser.add_argument("--mode", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        sys.path.append(os.path.join(BACKEND_DIR, "bench"))
+        measure(args.mode)
+        return
+
+    env = {**os.environ, "PYTHONPATH": BACKEND_DIR, "OUTBOX_WORKER_IN_APP": "0"}
+    seeded = tempfile.mkdtemp(prefix="nbb-bench-")
+    os.chdir(seeded)
+    seed.seed(sellers=20, buyers=200, products=args.products, orders=args.orders, blogs=0, price_types=0)
+
+    print(f"start proses -> GET / pertama, median dari {args.runs} proses")
+    print(f"{'database':<22}{'alur':<8}{'import':>9}{'cek schema':>13}{'request 1':>12}{'total':>9}")
+    for label, fresh in (("baru (kosong)", True), (f"terisi ({args.products} produk)", False)):
+        for mode in ("lama", "baru"):
+            results = []
+            for _ in range(args.runs):
+                workdir = tempfile.mkdtemp(prefix="nbb-bench-") if fresh else seeded
+                results.append(run(mode, workdir, env))
+                if fresh:
+                    shutil.rmtree(workdir)
+            median = {key: statistics.median(r[key] for r in results) * 1000 for key in results[0]}
+            print(f"{label:<22}{mode:<8}{median['import']:>7.0f}ms{median['cek schema']:>11.1f}ms"
+                  f"{median['request pertama']:>10.1f}ms{median['total']:>7.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from models import CartReservation, Product
+
+# Keranjang di server: setiap baris keranjang menahan (reservasi) stok selama CART_HOLD_MINUTES.
+# Stok tersedia = products.stock - SUM(quantity reservasi aktif), dihitung dari index ix_cart_product_expires.
+# products.stock baru dikurangi saat checkout. Reservasi kadaluarsa otomatis tidak dihitung lagi;
+# sweeper di background hanya membersihkan barisnya secara bertahap.
+
+# ---------- KONFIGURASI ----------
+CART_HOLD_MINUTES = float(os.getenv("CART_HOLD_MINUTES", "15"))
+CART_MAX_ITEMS = int(os.getenv("CART_MAX_ITEMS", "100"))
+CART_SWEEP_INTERVAL = float(os.getenv("CART_SWEEP_INTERVAL", "60"))  # detik
+CART_SWEEP_BATCH = int(os.getenv("CART_SWEEP_BATCH", "500"))  # baris per DELETE (transaksi tulis tetap pendek)
+
+logger = logging.getLogger("nbb.cart")
+
+
+# ---------- STOK TERSEDIA ----------
+
+def reserved_quantity(product_id, now: datetime, exclude_buyer_id: Optional[int] = None):
+    """Subquery: jumlah unit produk yang sedang ditahan keranjang (opsional: selain milik pembeli ini)"""
+    stmt = select(func.coalesce(func.sum(CartReservation.quantity), 0)).where(
+        CartReservation.product_id == product_id,
+        CartReservation.expires_at > now,
+    )
+    if exclude_buyer_id is not None:
+        stmt = stmt.where(CartReservation.buyer_id != exclude_buyer_id)
+    return stmt.scalar_subquery()
+
+
+# ---------- KERANJANG ----------
+
+def cart_select(buyer_id: int):
+    return (
+        select(
+            CartReservation.product_id,
+            Product.name,
+            Product.image_url,
+            CartReservation.quantity,
+            CartReservation.price,
+            CartReservation.expires_at,
+        )
+        .outerjoin(Product, CartReservation.product_id == Product.id)
+        .where(CartReservation.buyer_id == buyer_id)
+        .order_by(CartReservation.id)
+    )
+
+
+def reserve(db: Session, buyer_id: int, product_id: int, quantity: int) -> datetime:
+    """Set jumlah produk di keranjang dan tahan stoknya. Commit di sini; 409 jika stok tidak cukup.
+    Semua reservasi lain di keranjang ikut diperpanjang (keranjang aktif = masih dipakai)."""
+    now = datetime.utcnow()
+    expires_at = now + timedelta(minutes=CART_HOLD_MINUTES)
+
+    # Tulis dulu baru cek: di SQLite, statement tulis pertama mengambil lock tulis, jadi pengecekan
+    # di bawah melihat semua reservasi yang sudah commit dan tidak ada yang bisa menyusup di antaranya.
+    # Database server: baris produk dikunci (FOR UPDATE) supaya reservasi produk yang sama berurutan.
+    db.execute(delete(CartReservation).where(
+        CartReservation.buyer_id == buyer_id, CartReservation.product_id == product_id
+    ))
+    price = db.execute(select(Product.price).where(Product.id == product_id).with_for_update()).scalar()
+    if price is None:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Produk tidak ditemukan")
+    db.execute(insert(CartReservation).values(
+        buyer_id=buyer_id, product_id=product_id, quantity=quantity, price=price,
+        created_at=now, expires_at=expires_at,
+    ))
+
+    available = db.execute(
+        select(Product.stock - reserved_quantity(Product.id, now, buyer_id)).where(Product.id == product_id)
+    ).scalar()
+    if available < quantity:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=f"Stok tidak mencukupi (tersedia: {max(available, 0)})")
+
+    count = db.execute(
+        select(func.count()).select_from(CartReservation).where(CartReservation.buyer_id == buyer_id)
+    ).scalar()
+    if count > CART_MAX_ITEMS:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Maksimal {CART_MAX_ITEMS} produk di keranjang")
+
+    extend(db, buyer_id, expires_at)
+    db.commit()
+    return expires_at
+
+
+def extend(db: Session, buyer_id: int, expires_at: datetime):
+    """Perpanjang reservasi yang MASIH aktif (yang sudah kadaluarsa tidak dihidupkan lagi tanpa cek stok)"""
+    db.execute(
+        update(CartReservation)
+        .where(CartReservation.buyer_id == buyer_id, CartReservation.expires_at > datetime.utcnow())
+        .values(expires_at=expires_at)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def release(db: Session, buyer_id: int, product_ids: Optional[Iterable[int]] = None) -> int:
+    """Lepas reservasi pembeli (semua, atau produk tertentu). Commit oleh pemanggil."""
+    stmt = delete(CartReservation).where(CartReservation.buyer_id == buyer_id)
+    if product_ids is not None:
+        stmt = stmt.where(CartReservation.product_id.in_(list(product_ids)))
+    return db.execute(stmt).rowcount
+
+
+# ---------- SWEEPER ----------
+
+def sweep_expired(db: Session, batch: int = CART_SWEEP_BATCH) -> int:
+    """Hapus reservasi kadaluarsa per batch (satu transaksi pendek per batch). Mengembalikan jumlah baris."""
+    total = 0
+    while True:
+        expired_ids = (
+            select(CartReservation.id)
+            .where(CartReservation.expires_at <= datetime.utcnow())
+            .order_by(CartReservation.expires_at)
+            .limit(batch)
+        )
+        deleted = db.execute(delete(CartReservation).where(CartReservation.id.in_(expired_ids))).rowcount
+        db.commit()
+        total += deleted
+        if deleted < batch:
+            return total
+
+
+async def run_sweeper(session_factory, interval: float = CART_SWEEP_INTERVAL):
+    """Task background (dijalankan di lifespan): sweep_expired di threadpool setiap `interval` detik"""
+    def sweep_once():
+        with session_factory() as db:
+            return sweep_expired(db)
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            deleted = await run_in_threadpool(sweep_once)
+            if deleted:
+                logger.info("%d reservasi keranjang kadaluarsa dilepas", deleted)
+        except Exception:
+            logger.exception("Sweeper keranjang gagal, dicoba lagi di putaran berikutnya")
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    with SessionLocal() as session:
+        print(f"{sweep_expired(session)} reservasi kadaluarsa dihapus")
@@ -0,0 +1,100 @@
+import gzip
+import os
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # brotli opsional (pip install brotli): tanpa brotli hanya gzip
+    brotli = None
+
+# Kompresi response di atas ukuran tertentu (gzip, atau brotli jika client & server mendukung).
+# Response streaming (SSE, export CSV/NDJSON) dan response yang sudah punya Content-Encoding dilewatkan apa adanya.
+
+# ---------- KONFIGURASI ----------
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))  # byte; body kecil tidak sepadan biaya CPU-nya
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "5"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))  # 4-5: rasio mendekati gzip -9, jauh lebih cepat dari 11
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """'br' atau 'gzip' sesuai header Accept-Encoding client (q=0 berarti ditolak), atau None"""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def encode_body(body: bytes, accept_encoding: str, variants: Optional[dict] = None):
+    """(body, encoding atau None). variants: dict untuk menyimpan hasil kompresi body yang sama (mis. cache)"""
+    encoding = choose_encoding(accept_encoding) if len(body) >= COMPRESS_MIN_SIZE else None
+    if encoding is None:
+        return body, None
+    if variants is None:
+        return compress(body, encoding), encoding
+    encoded = variants.get(encoding)
+    if encoded is None:
+        encoded = variants[encoding] = compress(body, encoding)
+    return encoded, encoding
+
+
+class CompressionMiddleware:
+    """Middleware ASGI murni: kompres body response non-streaming yang cukup besar"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        if choose_encoding(accept_encoding) is None:
+            return await self.app(scope, receive, send)
+
+        start = None
+
+        async def send_wrapper(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message  # ditahan sampai body pertama terlihat
+                return
+            if start is None:
+                return await send(message)
+
+            headers = MutableHeaders(scope=start)
+            body = message.get("body", b"")
+            if (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+            ):
+                pending, start = start, None
+                await send(pending)
+                return await send(message)
+
+            body, encoding = encode_body(body, accept_encoding)
+            if encoding:
+                headers["content-encoding"] = encoding
+                headers["content-length"] = str(len(body))
+                headers.add_vary_header("Accept-Encoding")
+            pending, start = start, None
+            await send(pending)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,152 @@
+import asyncio
+import itertools
+import json
+import os
+import threading
+from collections import deque, namedtuple
+
+# Pub/sub dalam proses untuk Server-Sent Events (/events). Endpoint tulis memanggil publish()
+# setelah commit; setiap client SSE punya antrian sendiri di event loop, tanpa thread per koneksi.
+# Seperti cache lain di backend ini, hub hanya berlaku untuk worker uvicorn yang menerima update.
+
+Event = namedtuple("Event", ["id", "topic", "type", "data"])
+
+# ---------- KONFIGURASI ----------
+EVENTS_BUFFER_SIZE = int(os.getenv("EVENTS_BUFFER_SIZE", "1000"))  # ring buffer untuk replay Last-Event-ID
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))  # antrian penuh = client terlalu lambat
+EVENTS_HEARTBEAT = float(os.getenv("EVENTS_HEARTBEAT", "15"))  # detik, menjaga koneksi tidak diputus proxy
+EVENTS_MAX_SUBSCRIBERS = int(os.getenv("EVENTS_MAX_SUBSCRIBERS", "10000"))
+EVENTS_RETRY_MS = int(os.getenv("EVENTS_RETRY_MS", "3000"))  # jeda reconnect EventSource di browser
+
+
+class Subscriber:
+    def __init__(self, topics: frozenset, loop: asyncio.AbstractEventLoop):
+        self.topics = topics
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=EVENTS_QUEUE_SIZE)
+        self.evicted = False
+
+
+class EventHub:
+    """Ring buffer event terakhir + daftar subscriber. publish() aman dipanggil dari thread mana pun."""
+
+    def __init__(self, buffer_size: int):
+        self._buffer = deque(maxlen=buffer_size)
+        self._subscribers = set()
+        self._ids = itertools.count(1)
+        self._last_id = 0
+        self._lock = threading.Lock()
+        self.published = 0
+        self.evictions = 0
+
+    def publish(self, topic: str, event_type: str, data: dict) -> Event:
+        with self._lock:
+            event = Event(next(self._ids), topic, event_type, json.dumps(data, default=str))
+            self._last_id = event.id
+            self._buffer.append(event)
+            targets = [sub for sub in self._subscribers if topic in sub.topics]
+            self.published += 1
+        for sub in targets:
+            try:
+                sub.loop.call_soon_threadsafe(self._deliver, sub, event)
+            except RuntimeError:  # event loop client sudah ditutup
+                self.unsubscribe(sub)
+        return event
+
+    def _deliver(self, sub: Subscriber, event: Event):
+        """Jalan di event loop milik subscriber"""
+        if sub.evicted:
+            return
+        try:
+            sub.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Client tidak membaca: buang antriannya dan tutup stream. Browser akan reconnect
+            # dengan Last-Event-ID, lalu sisa event diambil dari ring buffer.
+            self.evictions += 1
+            self._end(sub)
+
+    def _end(self, sub: Subscriber):
+        sub.evicted = True
+        while not sub.queue.empty():
+            sub.queue.get_nowait()
+        sub.queue.put_nowait(None)
+
+    def subscribe(self, topics, last_event_id: int = None):
+        """(subscriber, event yang perlu dikirim ulang, perlu_reset?)
+
+        perlu_reset = True jika sebagian event sejak Last-Event-ID sudah keluar dari ring buffer
+        (atau server baru restart): client sebaiknya mengambil ulang data lengkap."""
+        with self._lock:
+            if len(self._subscribers) >= EVENTS_MAX_SUBSCRIBERS:
+                return None, [], False
+            sub = Subscriber(frozenset(topics), asyncio.get_running_loop())
+            self._subscribers.add(sub)
+            if last_event_id is None:
+                return sub, [], False
+            oldest = self._buffer[0].id if self._buffer else self._last_id + 1
+            reset = last_event_id > self._last_id or last_event_id < oldest - 1
+            missed = [e for e in self._buffer if e.id > last_event_id and e.topic in sub.topics]
+            return sub, missed, reset
+
+    def unsubscribe(self, sub: Subscriber):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def close(self):
+        """Saat shutdown: akhiri semua stream supaya server tidak menunggu koneksi SSE"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            try:
+                sub.loop.call_soon_threadsafe(self._end, sub)
+            except RuntimeError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "subscribers": len(self._subscribers),
+                "buffered": len(self._buffer),
+                "last_event_id": self._last_id,
+                "published": self.published,
+                "evictions": self.evictions,
+            }
+
+
+hub = EventHub(EVENTS_BUFFER_SIZE)
+
+
+def publish(topic: str, event_type: str, data: dict):
+    """Panggil SETELAH commit, supaya client tidak melihat perubahan yang batal"""
+    return hub.publish(topic, event_type, data)
+
+
+def order_topic(buyer_id: int) -> str:
+    return f"orders:{buyer_id}"
+
+
+def format_event(event: Event) -> str:
+    return f"id: {event.id}\nevent: {event.type}\ndata: {event.data}\n\n"
+
+
+async def stream(sub: Subscriber, missed, reset: bool, is_disconnected):
+    """Generator body text/event-stream untuk satu client"""
+    try:
+        yield f"retry: {EVENTS_RETRY_MS}\n\n"
+        if reset:
+            yield "event: reset\ndata: {}\n\n"
+        for event in missed:
+            yield format_event(event)
+        while True:
+            try:
+                event = await asyncio.wait_for(sub.queue.get(), EVENTS_HEARTBEAT)
+            except asyncio.TimeoutError:
+                if await is_disconnected():
+                    break
+                yield ": ping\n\n"
+                continue
+            if event is None:  # dikeluarkan (terlalu lambat) atau server shutdown
+                break
+            yield format_event(event)
+    finally:
+        hub.unsubscribe(sub)
@@ -0,0 +1,106 @@
+import csv
+import io
+import json
+import os
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from database import SessionLocal
+from models import Order, OrderItem, Product, User
+
+# Export pesanan (CSV / NDJSON) yang di-stream baris demi baris: query dibaca per batch
+# (yield_per, server-side cursor di PostgreSQL) dan langsung ditulis ke response,
+# jadi memori tetap kecil berapa pun jumlah pesanannya.
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+COLUMNS = (
+    "order_id",
+    "created_at",
+    "status",
+    "order_total",
+    "buyer",
+    "product_id",
+    "product_name",
+    "seller",
+    "quantity",
+    "price_at_purchase",
+    "subtotal",
+)
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+
+def order_rows_select(seller_id: Optional[int] = None, status: Optional[str] = None,
+                      date_from: Optional[date] = None, date_to: Optional[date] = None):
+    """Satu baris per item pesanan (order + item + produk + pembeli + penjual), urut waktu pesanan"""
+    buyer = User.__table__.alias("buyer")
+    seller = User.__table__.alias("seller")
+    stmt = (
+        select(
+            Order.id.label("order_id"),
+            Order.created_at,
+            Order.status,
+            Order.total_price.label("order_total"),
+            buyer.c.username.label("buyer"),
+            OrderItem.product_id,
+            Product.name.label("product_name"),
+            seller.c.username.label("seller"),
+            OrderItem.quantity,
+            OrderItem.price_at_purchase,
+            (OrderItem.quantity * OrderItem.price_at_purchase).label("subtotal"),
+        )
+        .join(OrderItem, OrderItem.order_id == Order.id)
+        .outerjoin(Product, OrderItem.product_id == Product.id)
+        .outerjoin(buyer, Order.buyer_id == buyer.c.id)
+        .outerjoin(seller, Product.seller_id == seller.c.id)
+    )
+    if seller_id is not None:
+        # Petani hanya melihat item miliknya sendiri dari pesanan campuran
+        stmt = stmt.where(Product.seller_id == seller_id)
+    if status:
+        stmt = stmt.where(Order.status == status)
+    if date_from:
+        stmt = stmt.where(Order.created_at >= datetime.combine(date_from, time.min))
+    if date_to:
+        stmt = stmt.where(Order.created_at < datetime.combine(date_to + timedelta(days=1), time.min))
+    return stmt.order_by(Order.created_at, Order.id, OrderItem.id)
+
+
+def _csv_chunks(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    yield buffer.getvalue()
+    for batch in rows:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(batch)
+        yield buffer.getvalue()
+
+
+def _ndjson_chunks(rows):
+    for batch in rows:
+        yield "".join(json.dumps(dict(zip(COLUMNS, row)), default=str) + "\n" for row in batch)
+
+
+def iter_export(stmt, fmt: str = "csv"):
+    """Generator chunk teks. Memakai session sendiri karena berjalan setelah endpoint selesai."""
+    def batches():
+        with SessionLocal() as db:
+            result = db.execute(stmt.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE))
+            for partition in result.partitions():
+                yield partition
+
+    chunks = _csv_chunks if fmt == "csv" else _ndjson_chunks
+    return chunks(batches())
+
+
+def export_response(stmt, fmt: str, name: str) -> StreamingResponse:
+    filename = f"{name}-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}"
+    return StreamingResponse(
+        iter_export(stmt, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,39 @@
+from fastapi import Response
+from pydantic_core import to_json
+
+try:
+    import orjson
+except ImportError:  # orjson opsional: tanpa orjson dipakai encoder pydantic-core (sedikit lebih lambat)
+    orjson = None
+
+# Jalur JSON cepat untuk endpoint list: query memilih kolom saja (Row/tuple, bukan objek ORM),
+# lalu langsung di-encode ke bytes. Tidak ada model Pydantic per baris dan tidak ada validasi ulang,
+# jadi bentuk dict harus sama persis dengan response_model yang didokumentasikan di route.
+
+
+def dumps(data) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data)
+    return to_json(data)
+
+
+def row_dicts(rows) -> list:
+    """Row hasil select(kolom...) -> list dict, key = nama/label kolom (urutan sesuai SELECT)"""
+    if not rows:
+        return []
+    keys = rows[0]._fields
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def dump_rows(rows) -> bytes:
+    """Serializer untuk http_cache (pengganti TypeAdapter) jika kolom SELECT = field response_model"""
+    return dumps(row_dicts(rows))
+
+
+class FastJSONResponse(Response):
+    """Seperti JSONResponse, tapi content (dict/list biasa) di-encode dengan orjson"""
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,177 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models import ResourceVersion
+import compression
+
+# Cache HTTP untuk endpoint yang sering dibaca tapi jarang berubah (/prices, /blogs, /products).
+# Setiap resource punya nomor versi di database yang dinaikkan di transaksi tulis,
+# jadi ETag tetap konsisten walau ada beberapa worker uvicorn.
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+
+
+class ResponseCache:
+    """LRU body JSON yang sudah diserialisasi (+ versi gzip/br-nya), key = (path+query, resource, versi)"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def drop_resource(self, resource: str):
+        with self._lock:
+            for key in [k for k in self._data if k[1] == resource]:
+                del self._data[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+            }
+
+
+cache = ResponseCache(RESPONSE_CACHE_SIZE)
+
+
+# ---------- VERSI RESOURCE ----------
+
+def bump(db: Session, resource: str):
+    """Tandai resource berubah. Panggil di transaksi tulis (commit dilakukan pemanggil)."""
+    now = datetime.utcnow()
+    result = db.execute(
+        update(ResourceVersion)
+        .where(ResourceVersion.name == resource)
+        .values(version=ResourceVersion.version + 1, updated_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        db.execute(insert(ResourceVersion).values(name=resource, version=1, updated_at=now))
+    cache.drop_resource(resource)
+
+
+def _version_select(resource: str):
+    return select(ResourceVersion.version, ResourceVersion.updated_at).where(ResourceVersion.name == resource)
+
+def current_version(db: Session, resource: str):
+    """(versi, updated_at) — satu lookup primary key"""
+    row = db.execute(_version_select(resource)).first()
+    return (row.version, row.updated_at) if row else (0, None)
+
+async def current_version_async(db: AsyncSession, resource: str):
+    row = (await db.execute(_version_select(resource))).first()
+    return (row.version, row.updated_at) if row else (0, None)
+
+
+# ---------- RESPONSE ----------
+
+def etag_matches(header: str, etag: str) -> bool:
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+def _not_modified_since(header: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    # Header HTTP hanya presisi detik
+    return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+
+def _lookup(request: Request, resource: str, version: int, updated_at):
+    """(response siap kirim atau None, key cache, header dasar)"""
+    target = request.url.path + ("?" + request.url.query if request.url.query else "")
+    etag = f'W/"{resource}-{version}-{hashlib.sha1(target.encode()).hexdigest()[:12]}"'
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if updated_at:
+        headers["Last-Modified"] = format_datetime(updated_at.replace(tzinfo=timezone.utc), usegmt=True)
+
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if (if_none_match and etag_matches(if_none_match, etag)) or (
+        not if_none_match and if_modified_since and updated_at and _not_modified_since(if_modified_since, updated_at)
+    ):
+        cache.not_modified += 1
+        return Response(status_code=304, headers=headers), None, headers
+
+    key = (target, resource, version)
+    entry = cache.get(key)
+    if entry is not None:
+        return _json_response(request, entry, headers), key, headers
+    return None, key, headers
+
+def _json_response(request: Request, entry, headers) -> Response:
+    body, extra_headers, variants = entry
+    headers = {**headers, **extra_headers}
+    # Hasil kompresi ikut disimpan di entry cache: hit berikutnya tidak mengompres ulang
+    body, encoding = compression.encode_body(body, request.headers.get("accept-encoding", ""), variants)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        headers["Vary"] = "Accept-Encoding"
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def _serialize(data, adapter) -> bytes:
+    if hasattr(adapter, "dump_json"):
+        return adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+    return adapter(data)  # serializer langsung, mis. fast_json.dump_rows
+
+def _store(key, data, extra_headers, adapter):
+    entry = (_serialize(data, adapter), extra_headers, {})
+    cache.set(key, entry)
+    return entry
+
+def cached_response(request: Request, db: Session, resource: str, build, adapter) -> Response:
+    """Jawab 304 jika client sudah punya versi terbaru, atau kirim body dari cache memori.
+    build(headers) hanya dipanggil saat cache kosong: jalankan query dan kembalikan data mentah
+    (boleh menambah header, mis. X-Next-Cursor). adapter = TypeAdapter untuk response_model,
+    atau fungsi data -> bytes (fast_json.dump_rows) jika data sudah berbentuk persis response_model."""
+    version, updated_at = current_version(db, resource)
+    response, key, headers = _lookup(request, resource, version, updated_at)
+    if response is not None:
+        return response
+
+    extra_headers = {}
+    data = build(extra_headers)
+    return _json_response(request, _store(key, data, extra_headers, adapter), headers)
+
+async def cached_response_async(request: Request, db: AsyncSession, resource: str, build, adapter) -> Response:
+    """Sama dengan cached_response, untuk endpoint async (build adalah coroutine function)"""
+    version, updated_at = await current_version_async(db, resource)
+    response, key, headers = _lookup(request, resource, version, updated_at)
+    if response is not None:
+        return response
+
+    extra_headers = {}
+    data = await build(extra_headers)
+    return _json_response(request, _store(key, data, extra_headers, adapter), headers)
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+
+from models import IdempotencyKey
+
+# ---------- KONFIGURASI ----------
+IDEMPOTENCY_TTL = timedelta(hours=24)
+SWEEP_INTERVAL_SECONDS = 600
+MAX_KEY_LENGTH = 255
+
+_last_sweep = 0.0
+
+
+def fingerprint(payload: dict) -> str:
+    """Hash body request (urutan key dinormalkan)"""
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def lookup(db: Session, key: str, request_hash: str) -> Optional[JSONResponse]:
+    """Cari response tersimpan untuk key ini (satu lookup primary key). None jika belum ada / kadaluarsa."""
+    if len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail="Idempotency-Key terlalu panjang")
+
+    record = db.get(IdempotencyKey, key)
+    if not record:
+        return None
+    if record.expires_at < datetime.utcnow():
+        # Key lama sudah kadaluarsa: boleh dipakai ulang (dihapus di transaksi yang sama dengan save)
+        db.delete(record)
+        return None
+    if record.request_hash != request_hash:
+        raise HTTPException(status_code=422, detail="Idempotency-Key sudah dipakai untuk request yang berbeda")
+
+    return JSONResponse(
+        content=json.loads(record.response_body),
+        status_code=record.status_code,
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+def save(db: Session, key: str, request_hash: str, body: dict, status_code: int = 200):
+    """Simpan response di transaksi yang SAMA dengan perubahan datanya (commit dilakukan pemanggil).
+    Sengaja INSERT biasa: request kembar yang balapan akan gagal di primary key (IntegrityError)."""
+    now = datetime.utcnow()
+    db.add(IdempotencyKey(
+        key=key,
+        request_hash=request_hash,
+        status_code=status_code,
+        response_body=json.dumps(body, default=str),
+        created_at=now,
+        expires_at=now + IDEMPOTENCY_TTL,
+    ))
+
+
+def purge_expired(db: Session) -> int:
+    """Hapus key yang sudah kadaluarsa, kembalikan jumlah baris yang dihapus"""
+    deleted = (
+        db.query(IdempotencyKey)
+        .filter(IdempotencyKey.expires_at < datetime.utcnow())
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return deleted
+
+
+def maybe_sweep(db: Session):
+    """Jalankan purge_expired paling sering sekali per SWEEP_INTERVAL_SECONDS (per proses)"""
+    global _last_sweep
+    now = time.monotonic()
+    if now - _last_sweep < SWEEP_INTERVAL_SECONDS:
+        return
+    _last_sweep = now
+    purge_expired(db)
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        print(f"{purge_expired(db)} idempotency key kadaluarsa dihapus")
+    finally:
+        db.close()
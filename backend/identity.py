@@ -0,0 +1,199 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from typing import Optional
+
+from fastapi import Depends, HTTPException, status
+from jose import JWTError, jwt
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from database import SessionLocal
+from models import User
+from routers.auth import ACCESS_TOKEN_EXPIRE_MINUTES, ALGORITHM, SECRET_KEY, get_db, oauth2_scheme
+
+# Hasil resolusi username -> user yang dipakai hampir semua endpoint.
+Identity = namedtuple("Identity", ["id", "username", "role"])
+
+# ---------- KONFIGURASI ----------
+# Tiap worker uvicorn punya cache sendiri. Invalidasi eksplisit hanya berlaku di worker yang
+# menerima request tulis, jadi TTL = batas maksimal data basi di worker lain.
+IDENTITY_CACHE_TTL = float(os.getenv("IDENTITY_CACHE_TTL", "30"))
+IDENTITY_NEGATIVE_TTL = float(os.getenv("IDENTITY_NEGATIVE_TTL", "5"))  # username yang belum terdaftar
+IDENTITY_CACHE_SIZE = int(os.getenv("IDENTITY_CACHE_SIZE", "10000"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))  # token JWT yang sudah diverifikasi
+
+
+class IdentityCache:
+    """LRU + TTL, aman dipakai dari banyak thread (threadpool FastAPI)"""
+
+    def __init__(self, maxsize: int, ttl: float, negative_ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._data = OrderedDict()  # username -> (expires_at, Identity | None)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, username: str):
+        """(ketemu_di_cache?, identity_atau_None)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(username)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._data[username]
+                self.misses += 1
+                return False, None
+            self._data.move_to_end(username)
+            self.hits += 1
+            return True, entry[1]
+
+    def set(self, username: str, identity: Optional[Identity], ttl: Optional[float] = None):
+        if ttl is None:
+            ttl = self.ttl if identity is not None else self.negative_ttl
+        with self._lock:
+            self._data[username] = (time.monotonic() + ttl, identity)
+            self._data.move_to_end(username)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, username: str):
+        with self._lock:
+            self._data.pop(username, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+cache = IdentityCache(IDENTITY_CACHE_SIZE, IDENTITY_CACHE_TTL, IDENTITY_NEGATIVE_TTL)
+# Key = sha256(token), TTL = sisa umur token (exp). Token gagal verifikasi tidak disimpan.
+token_cache = IdentityCache(TOKEN_CACHE_SIZE, ACCESS_TOKEN_EXPIRE_MINUTES * 60, negative_ttl=0)
+
+
+def _identity_select(username: str):
+    return select(User.id, User.username, User.role).where(User.username == username)
+
+
+def _remember(username: str, row) -> Optional[Identity]:
+    identity = Identity(row.id, row.username, row.role) if row else None
+    cache.set(username, identity)
+    return identity
+
+
+def resolve(db: Session, username: str) -> Optional[Identity]:
+    """username -> Identity(id, username, role), atau None jika tidak terdaftar"""
+    found, identity = cache.get(username)
+    if found:
+        return identity
+    return _remember(username, db.execute(_identity_select(username)).first())
+
+
+async def resolve_async(db: AsyncSession, username: str) -> Optional[Identity]:
+    """Sama dengan resolve(), untuk endpoint async"""
+    found, identity = cache.get(username)
+    if found:
+        return identity
+    return _remember(username, (await db.execute(_identity_select(username))).first())
+
+
+def invalidate(username: str):
+    """Panggil setelah commit perubahan data user (registrasi, edit profil)"""
+    cache.invalidate(username)
+
+
+def get_identity(username: str, db: Session = Depends(get_db)) -> Optional[Identity]:
+    """Dependency untuk route dengan path parameter {username}"""
+    return resolve(db, username)
+
+
+# ---------- TOKEN (JWT) ----------
+# Identitas diambil dari token (stateless): sub = username, uid = id user, role.
+# Perubahan role/hapus user baru berlaku setelah token lama kadaluarsa (ACCESS_TOKEN_EXPIRE_MINUTES).
+
+_UNAUTHORIZED = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Token tidak valid atau sudah kadaluarsa",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+
+def _decode(token: str):
+    """Verifikasi HMAC + exp. Mengembalikan (Identity, exp) atau (None, None)"""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None, None
+    username, role, exp = payload.get("sub"), payload.get("role"), payload.get("exp")
+    if not username or not role or exp is None:
+        return None, None
+    user_id = payload.get("uid")
+    if user_id is None:
+        # Token lama (sebelum ada claim uid): id diambil dari cache username
+        with SessionLocal() as db:
+            found = resolve(db, username)
+        if found is None:
+            return None, None
+        user_id = found.id
+    return Identity(user_id, username, role), exp
+
+
+def _token_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+def _verify_and_remember(token: str, key: bytes) -> Optional[Identity]:
+    identity, exp = _decode(token)
+    if identity is not None:
+        remaining = min(exp - time.time(), token_cache.ttl)
+        if remaining > 0:
+            token_cache.set(key, identity, ttl=remaining)
+    return identity
+
+
+def verify_token(token: str) -> Optional[Identity]:
+    """Token -> Identity; token yang sama berikutnya dilayani dari cache tanpa HMAC maupun query"""
+    key = _token_key(token)
+    found, identity = token_cache.get(key)
+    if found:
+        return identity
+    return _verify_and_remember(token, key)
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> Identity:
+    """Dependency: user yang login (header Authorization: Bearer <token>), 401 jika token tidak valid"""
+    # Cache hit dijawab langsung di event loop; verifikasi penuh (HMAC, kadang query) di threadpool
+    key = _token_key(token)
+    found, identity = token_cache.get(key)
+    if not found:
+        identity = await run_in_threadpool(_verify_and_remember, token, key)
+    if identity is None:
+        raise _UNAUTHORIZED
+    return identity
+
+
+def require_role(*roles: str):
+    """Dependency: seperti get_current_user, tapi 403 jika role user tidak termasuk `roles`"""
+    async def check(user: Identity = Depends(get_current_user)) -> Identity:
+        if user.role not in roles:
+            raise HTTPException(status_code=403, detail="Akses ditolak untuk role ini")
+        return user
+    return check
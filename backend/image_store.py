@@ -0,0 +1,194 @@
+import base64
+import binascii
+import hashlib
+import os
+import tempfile
+from io import BytesIO
+from typing import Optional
+
+from fastapi import HTTPException
+from fastapi.staticfiles import StaticFiles
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow opsional: tanpa Pillow, thumbnail tidak dibuat
+    Image = None
+
+# Penyimpanan gambar berbasis hash isi file (content-addressed): file yang sama hanya disimpan sekali,
+# dan URL-nya tidak pernah berubah isinya, jadi aman di-cache browser selamanya (immutable).
+
+# ---------- KONFIGURASI ----------
+MEDIA_ROOT = os.path.abspath(os.getenv("MEDIA_ROOT", "./media"))
+MEDIA_URL = "/media"
+MAX_IMAGE_BYTES = int(os.getenv("MAX_IMAGE_BYTES", str(5 * 1024 * 1024)))
+# PNG/GIF kecil bisa berisi puluhan juta piksel (decompression bomb): dicek dari header sebelum di-decode.
+# 25 juta piksel = foto 6000x4000, ~75MB saat dikonversi ke RGB untuk thumbnail.
+MAX_IMAGE_PIXELS = int(os.getenv("MAX_IMAGE_PIXELS", "25000000"))
+THUMBNAIL_SIZES = (160, 480)  # sisi terpanjang (px)
+
+# Tipe gambar dikenali dari magic bytes, bukan dari nama file / header client
+SIGNATURES = [
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+]
+
+
+def detect_extension(data: bytes) -> Optional[str]:
+    for signature, ext in SIGNATURES:
+        if data.startswith(signature):
+            return ext
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return ".webp"
+    return None
+
+
+def _write_atomic(path: str, data: bytes):
+    """Tulis ke file sementara lalu rename, jadi tidak ada file setengah jadi yang ter-serve"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _check_dimensions(data: bytes):
+    """Tolak gambar yang resolusinya melebihi MAX_IMAGE_PIXELS (hanya membaca header, tanpa decode)"""
+    if Image is None:
+        return  # tanpa Pillow gambar tidak pernah di-decode
+    try:
+        with Image.open(BytesIO(data)) as img:
+            pixels = img.size[0] * img.size[1]
+    except Image.DecompressionBombError:  # melewati batas bawaan Pillow sendiri
+        pixels = None
+    except Exception:
+        return  # header tidak terbaca Pillow: disimpan apa adanya, tanpa thumbnail
+    if pixels is None or pixels > MAX_IMAGE_PIXELS:
+        raise HTTPException(status_code=413, detail=f"Resolusi gambar terlalu besar (maksimal {MAX_IMAGE_PIXELS} piksel)")
+
+
+def _make_thumbnails(data: bytes, digest: str, directory: str) -> dict:
+    thumbnails = {}
+    if Image is None:
+        return thumbnails
+    try:
+        with Image.open(BytesIO(data)) as img:
+            img = img.convert("RGB")
+            for size in THUMBNAIL_SIZES:
+                name = f"{digest}_{size}.jpg"
+                path = os.path.join(directory, name)
+                if not os.path.exists(path):
+                    thumb = img.copy()
+                    thumb.thumbnail((size, size))
+                    buffer = BytesIO()
+                    thumb.save(buffer, format="JPEG", quality=85, optimize=True)
+                    _write_atomic(path, buffer.getvalue())
+                thumbnails[str(size)] = f"{MEDIA_URL}/{digest[:2]}/{name}"
+    except Exception:
+        # File rusak / format tidak didukung Pillow: gambar asli tetap tersimpan
+        return {}
+    return thumbnails
+
+
+def store(data: bytes) -> dict:
+    """Simpan gambar (jika belum ada) + thumbnail. Mengembalikan URL-nya."""
+    if len(data) > MAX_IMAGE_BYTES:
+        raise HTTPException(status_code=413, detail="Ukuran gambar terlalu besar")
+    ext = detect_extension(data)
+    if not ext:
+        raise HTTPException(status_code=400, detail="Format gambar tidak didukung (jpg, png, gif, webp)")
+    _check_dimensions(data)
+
+    digest = hashlib.sha256(data).hexdigest()
+    directory = os.path.join(MEDIA_ROOT, digest[:2])
+    path = os.path.join(directory, digest + ext)
+    if not os.path.exists(path):
+        _write_atomic(path, data)
+
+    return {
+        "hash": digest,
+        "url": f"{MEDIA_URL}/{digest[:2]}/{digest}{ext}",
+        "size": len(data),
+        "thumbnails": _make_thumbnails(data, digest, directory),
+    }
+
+
+def is_data_url(value: Optional[str]) -> bool:
+    return bool(value) and value.startswith("data:image/")
+
+
+def store_data_url(value: str) -> str:
+    """'data:image/png;base64,....' -> '/media/ab/abcd....png'"""
+    header, _, payload = value.partition(",")
+    if ";base64" not in header:
+        raise HTTPException(status_code=400, detail="Data URL gambar harus base64")
+    try:
+        data = base64.b64decode(payload, validate=True)
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Data URL gambar tidak valid")
+    return store(data)["url"]
+
+
+def normalize_image_url(value: Optional[str]) -> Optional[str]:
+    """Dipanggil di endpoint tulis: data URL base64 dipindah ke penyimpanan, yang disimpan di DB hanya URL"""
+    if is_data_url(value):
+        return store_data_url(value)
+    return value
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """StaticFiles (sudah mendukung Range request) + header cache jangka panjang"""
+
+    async def get_response(self, path, scope):
+        response = await super().get_response(path, scope)
+        if response.status_code in (200, 206):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+
+# ---------- MIGRASI DATA LAMA ----------
+
+def migrate_data_urls(db, batch_size: int = 100) -> dict:
+    """Pindahkan data URL yang sudah terlanjur tersimpan di database ke penyimpanan gambar"""
+    from models import User, Product, Blog
+    import http_cache
+
+    targets = [
+        (User, User.profile_image_url, "profile_image_url", None),
+        (Product, Product.image_url, "image_url", "products"),
+        (Blog, Blog.image_url, "image_url", "blogs"),
+    ]
+    result = {}
+    for model, column, attr, resource in targets:
+        migrated = 0
+        while True:
+            # Baris yang sudah dimigrasi tidak lagi cocok filter ini, jadi cukup ambil batch pertama terus
+            rows = db.query(model).filter(column.like("data:image/%")).limit(batch_size).all()
+            if not rows:
+                break
+            for row in rows:
+                try:
+                    setattr(row, attr, store_data_url(getattr(row, attr)))
+                except HTTPException:
+                    setattr(row, attr, None)  # data rusak: kosongkan daripada dikirim ke client
+                migrated += 1
+            if resource:
+                http_cache.bump(db, resource)
+            db.commit()
+        result[model.__tablename__] = migrated
+    return result
+
+
+if __name__ == "__main__":
+    import sys
+    from database import SessionLocal
+
+    if sys.argv[1:] != ["migrate"]:
+        sys.exit("Pemakaian: python image_store.py migrate")
+    db = SessionLocal()
+    try:
+        for table, count in migrate_data_urls(db).items():
+            print(f"{table}: {count} gambar dipindahkan")
+    finally:
+        db.close()
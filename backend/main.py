@@ -1,18 +1,42 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from database import Base, engine
-from routers import auth, produk  
-from routers import auth, produk, pesanan
-from routers import auth, produk, pesanan, users
-from routers import auth, produk, pesanan, users, admin
-from routers import auth, produk, pesanan, users, admin, blog
-from routers import auth, produk, pesanan, users, admin, blog, harga
+from database import SessionLocal, engine, async_engine
+import cart
+import compression
+import events
+import image_store
+import metrics
+import migrations
+import outbox
+import passwords
+import ratelimit
+from routers import auth, produk, pesanan, users, admin, blog, harga, search, gambar, notifikasi, keranjang
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema tidak lagi dicek saat import: di sini cukup satu query ke schema_version.
+    # Migrasi tertunda diterapkan otomatis kecuali MIGRATE_ON_STARTUP=0 (lihat migrate.py)
+    migrations.ensure_up_to_date(engine)
+    # Lepas reservasi keranjang yang kadaluarsa secara berkala (per batch, di threadpool)
+    cart_sweeper = asyncio.create_task(cart.run_sweeper(SessionLocal))
+    # Efek samping pesanan (notifikasi, dll.) dari tabel outbox_events
+    outbox_worker = asyncio.create_task(outbox.run_worker(SessionLocal)) if outbox.OUTBOX_WORKER_IN_APP else None
+    yield
+    cart_sweeper.cancel()
+    if outbox_worker:
+        outbox_worker.cancel()
+    events.hub.close()
+    passwords.shutdown_pool()
+    await async_engine.dispose()
 
-# Membuat tabel di database otomatis
-Base.metadata.create_all(bind=engine)
+app = FastAPI(lifespan=lifespan)
 
-app = FastAPI()
+# Token bucket per IP + batas request bersamaan (429/503 + Retry-After).
+# Ditambahkan sebelum CORS supaya response penolakan tetap membawa header CORS.
+if ratelimit.RATE_LIMIT_ENABLED:
+    app.add_middleware(ratelimit.RateLimitMiddleware)
 
 # Izinkan akses dari frontend (Live Server)
 origins = [
@@ -27,17 +51,39 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # dibaca frontend untuk halaman berikutnya (keyset pagination)
 )
 
+# gzip/brotli untuk response JSON besar (list produk/pesanan); streaming tidak disentuh
+app.add_middleware(compression.CompressionMiddleware)
+
+# Latensi per route + jumlah/durasi query SQL per request, dibaca di /metrics
+if metrics.METRICS_ENABLED:
+    metrics.install_query_hooks()
+    app.add_middleware(metrics.MetricsMiddleware)
+
 # Daftarkan Router
-app.include_router(auth.router)
+# Login/registrasi (bcrypt) dibatasi per IP; batas lain dipasang di route masing-masing (lihat ratelimit.limit)
+app.include_router(auth.router, dependencies=[Depends(ratelimit.limit("auth", "10/m:5"))])
 app.include_router(produk.router) 
 app.include_router(pesanan.router)
 app.include_router(users.router)
 app.include_router(admin.router)
 app.include_router(blog.router)
 app.include_router(harga.router)
+app.include_router(search.router)
+app.include_router(gambar.router)
+app.include_router(notifikasi.router)
+app.include_router(keranjang.router)
+
+# File gambar (content-addressed, cache immutable, mendukung Range request)
+app.mount(image_store.MEDIA_URL, image_store.ImmutableStaticFiles(directory=image_store.MEDIA_ROOT, check_dir=False), name="media")
 
 @app.get("/")
 def read_root():
-    return {"message": "NBB Coffee Hub Backend is running"}
\ No newline at end of file
+    return {"message": "NBB Coffee Hub Backend is running"}
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    """Format teks Prometheus (metrik worker yang menjawab request ini)"""
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
\ No newline at end of file
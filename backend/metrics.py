@@ -0,0 +1,216 @@
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Metrik request & query SQL dalam format teks Prometheus (/metrics).
+# Middleware ASGI murni (tanpa BaseHTTPMiddleware) + event cursor SQLAlchemy pada kelas Engine,
+# jadi engine sync maupun async ikut terhitung. Nilainya per worker uvicorn, seperti cache lain.
+
+# ---------- KONFIGURASI ----------
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_DEBUG_HEADERS = os.getenv("METRICS_DEBUG_HEADERS", "0") == "1"  # X-Query-Count + Server-Timing
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+QUERY_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+logger = logging.getLogger("nbb.sql")
+
+
+class Histogram:
+    """Histogram kumulatif ala Prometheus, per kombinasi label"""
+
+    def __init__(self, name: str, help_text: str, buckets, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.labels = labels
+        self._series = {}  # nilai label -> [count per bucket (+Inf di akhir), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, label_values=()):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: (list(counts), total) for key, (counts, total) in self._series.items()}
+        for label_values, (counts, total) in sorted(series.items()):
+            labels = _labels(self.labels, label_values)
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{{{labels + ',' if labels else ''}{le}}} {cumulative}")
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {total}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values=(), amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        if not values and not self.labels:
+            values[()] = 0
+        for label_values, value in sorted(values.items()):
+            labels = _labels(self.labels, label_values)
+            lines.append(f"{self.name}{{{labels}}} {value}" if labels else f"{self.name} {value}")
+        return lines
+
+
+def _labels(names, values) -> str:
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"') for v in values)
+    return ",".join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+
+REQUESTS = Counter("nbb_http_requests_total", "Jumlah request HTTP", ("method", "route", "status"))
+REQUEST_LATENCY = Histogram(
+    "nbb_http_request_duration_seconds", "Durasi request HTTP", LATENCY_BUCKETS, ("method", "route")
+)
+QUERIES_PER_REQUEST = Histogram(
+    "nbb_db_queries_per_request", "Jumlah query SQL per request (N+1 terlihat di sini)", QUERY_COUNT_BUCKETS,
+    ("method", "route"),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "nbb_db_time_per_request_seconds", "Total waktu query SQL per request", LATENCY_BUCKETS, ("method", "route")
+)
+QUERY_LATENCY = Histogram("nbb_db_query_duration_seconds", "Durasi satu query SQL", QUERY_LATENCY_BUCKETS)
+SLOW_QUERIES = Counter("nbb_db_slow_queries_total", "Query SQL yang melewati SLOW_QUERY_MS")
+RATE_LIMITED = Counter(
+    "nbb_rate_limited_total", "Request yang ditolak rate limit / admission control (lihat ratelimit.py)", ("limit",)
+)
+OUTBOX_EVENTS = Counter(
+    "nbb_outbox_events_total", "Event outbox yang diproses worker (result: ok, retry, dead)", ("type", "result")
+)
+OUTBOX_LAG = Histogram(
+    "nbb_outbox_lag_seconds", "Jeda dari event ditulis sampai selesai diproses", LATENCY_BUCKETS + (30.0, 60.0, 300.0)
+)
+in_flight = 0
+
+
+# ---------- QUERY SQL ----------
+
+class RequestStats:
+    __slots__ = ("queries", "db_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+
+# Objek yang sama dipakai threadpool (context disalin) dan greenlet SQLAlchemy async
+_current = ContextVar("nbb_request_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_metrics_start", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    QUERY_LATENCY.observe(elapsed)
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time += elapsed
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        SLOW_QUERIES.inc()
+        logger.warning("Query lambat (%.0fms): %s", elapsed * 1000, " ".join(statement.split())[:500])
+
+
+def install_query_hooks():
+    """Pasang sekali di startup; berlaku untuk semua engine (termasuk engine async)"""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ---------- MIDDLEWARE ----------
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        global in_flight
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        status = 500
+        in_flight += 1
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if METRICS_DEBUG_HEADERS:
+                    app_ms = (time.perf_counter() - start) * 1000
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-query-count", str(stats.queries).encode()),
+                        (b"server-timing", (
+                            f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries", app;dur={app_ms:.1f}'
+                        ).encode()),
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight -= 1
+            _current.reset(token)
+            route = scope.get("route")
+            # Pakai template path (/products/{username}), bukan path asli, supaya label tidak meledak
+            route_label = getattr(route, "path", None) or "unmatched"
+            labels = (scope["method"], route_label)
+            REQUESTS.inc(labels + (status,))
+            REQUEST_LATENCY.observe(time.perf_counter() - start, labels)
+            QUERIES_PER_REQUEST.observe(stats.queries, labels)
+            DB_TIME_PER_REQUEST.observe(stats.db_time, labels)
+
+
+def render() -> str:
+    lines = [
+        "# HELP nbb_http_requests_in_flight Request yang sedang diproses",
+        "# TYPE nbb_http_requests_in_flight gauge",
+        f"nbb_http_requests_in_flight {in_flight}",
+    ]
+    for metric in (
+        REQUESTS, REQUEST_LATENCY, QUERIES_PER_REQUEST, DB_TIME_PER_REQUEST, QUERY_LATENCY, SLOW_QUERIES, RATE_LIMITED,
+        OUTBOX_EVENTS, OUTBOX_LAG,
+    ):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
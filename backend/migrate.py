@@ -0,0 +1,34 @@
+import argparse
+import logging
+
+import migrations
+from database import engine
+
+# CLI migrasi schema (dari folder backend):
+#   python migrate.py              terapkan semua migrasi yang tertunda
+#   python migrate.py --to 3       terapkan sampai versi 3
+#   python migrate.py status       versi sekarang + daftar migrasi
+# Database diambil dari DATABASE_URL (sama dengan app).
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrasi schema database NBB Coffee Hub")
+    parser.add_argument("command", nargs="?", choices=["upgrade", "status"], default="upgrade")
+    parser.add_argument("--to", type=int, help="Versi tujuan (default: terbaru)")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        version = migrations.current_version(engine)
+        print(f"Versi database: {version}")
+        for migration in migrations.discover():
+            mark = "x" if migration.version <= version else " "
+            print(f"  [{mark}] {migration.version:04d}_{migration.name}")
+        return
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    applied = migrations.upgrade(engine, args.to)
+    print(f"{len(applied)} migrasi diterapkan, versi database sekarang: {migrations.current_version(engine)}")
+
+
+if __name__ == "__main__":
+    main()
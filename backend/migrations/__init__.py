@@ -0,0 +1,110 @@
+import importlib
+import logging
+import os
+import pkgutil
+import re
+from collections import namedtuple
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, insert, select
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.schema import CreateTable
+
+# Migrasi schema berversi. Setiap file mNNNN_nama.py di folder ini punya fungsi upgrade(conn) dan
+# dijalankan SEKALI, berurutan, masing-masing dalam satu transaksi; versi yang sudah diterapkan dicatat
+# di tabel schema_version. Tidak ada downgrade: perbaikan = migrasi baru.
+#
+# Database baru dibuat oleh m0001 dari models.py versi terkini, jadi migrasi berikutnya harus tetap aman
+# jika kolom/index-nya ternyata sudah ada (cek dulu, atau CREATE INDEX IF NOT EXISTS).
+#
+# Jalankan dari folder backend: python migrate.py (lihat migrate.py). Saat startup app hanya membaca
+# versi terakhir (satu query); migrasi yang tertunda diterapkan otomatis kecuali MIGRATE_ON_STARTUP=0.
+
+# ---------- KONFIGURASI ----------
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP", "1") == "1"  # produksi: 0, jalankan migrate.py sebelum deploy
+
+Migration = namedtuple("Migration", ["version", "name", "upgrade"])
+
+logger = logging.getLogger("nbb.migrations")
+
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+_FILE_PATTERN = re.compile(r"^m(\d{4})_(\w+)$")
+_discovered = None
+
+
+def discover() -> List[Migration]:
+    """Semua migrasi di folder ini, urut versi"""
+    global _discovered
+    if _discovered is None:
+        found = []
+        for module in pkgutil.iter_modules(__path__):
+            match = _FILE_PATTERN.match(module.name)
+            if match:
+                mod = importlib.import_module(f"{__name__}.{module.name}")
+                found.append(Migration(int(match.group(1)), match.group(2), mod.upgrade))
+        found.sort()
+        versions = [m.version for m in found]
+        if len(set(versions)) != len(versions):
+            raise RuntimeError(f"Nomor migrasi ganda: {versions}")
+        _discovered = found
+    return _discovered
+
+
+def current_version(engine) -> int:
+    """Versi schema database (0 = belum pernah dimigrasi)"""
+    try:
+        with engine.connect() as conn:
+            return conn.execute(select(func.coalesce(func.max(schema_version.c.version), 0))).scalar()
+    except DBAPIError:
+        # Tabel schema_version belum ada (database baru / sebelum ada migrasi). IF NOT EXISTS: aman jika
+        # beberapa worker start bersamaan.
+        with engine.begin() as conn:
+            conn.execute(CreateTable(schema_version, if_not_exists=True))
+        return 0
+
+
+def pending(engine) -> List[Migration]:
+    version = current_version(engine)
+    return [m for m in discover() if m.version > version]
+
+
+def upgrade(engine, target: Optional[int] = None) -> List[Migration]:
+    """Terapkan migrasi yang belum (sampai versi `target`). Mengembalikan migrasi yang diterapkan proses ini.
+
+    Baris schema_version ditulis PERTAMA di transaksi migrasinya: worker lain yang menjalankan migrasi
+    yang sama menunggu lock tulis lalu gagal di primary key, dan migrasi itu dilewati (tidak dobel)."""
+    applied = []
+    for migration in pending(engine):
+        if target is not None and migration.version > target:
+            break
+        try:
+            with engine.begin() as conn:
+                conn.execute(insert(schema_version).values(
+                    version=migration.version, name=migration.name, applied_at=datetime.utcnow(),
+                ))
+                migration.upgrade(conn)
+        except IntegrityError:
+            logger.info("Migrasi %04d sudah diterapkan proses lain", migration.version)
+            continue
+        logger.info("Migrasi %04d_%s diterapkan", migration.version, migration.name)
+        applied.append(migration)
+    return applied
+
+
+def ensure_up_to_date(engine):
+    """Hook lifespan: pastikan schema sudah versi terakhir sebelum worker menerima request"""
+    waiting = pending(engine)
+    if not waiting:
+        return
+    if not MIGRATE_ON_STARTUP:
+        names = ", ".join(f"{m.version:04d}_{m.name}" for m in waiting)
+        raise RuntimeError(f"Schema database belum terbaru (tertunda: {names}). Jalankan: python migrate.py")
+    upgrade(engine)
@@ -0,0 +1,10 @@
+"""Tabel awal: buat semua tabel dari models.py yang belum ada.
+
+Database lama (dibuat create_all sebelum ada migrasi) hanya mendapat tabel yang belum ada; tabel yang
+sudah ada tidak diubah (kolom/index baru ditambahkan oleh migrasi berikutnya)."""
+from database import Base
+import models  # noqa: F401  (mendaftarkan semua tabel ke Base.metadata)
+
+
+def upgrade(conn):
+    Base.metadata.create_all(conn)
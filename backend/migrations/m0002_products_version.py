@@ -0,0 +1,7 @@
+"""products.version: naik setiap produk berubah, dipakai ETag GET /products/batch."""
+from sqlalchemy import inspect, text
+
+
+def upgrade(conn):
+    if "version" not in {column["name"] for column in inspect(conn).get_columns("products")}:
+        conn.execute(text("ALTER TABLE products ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
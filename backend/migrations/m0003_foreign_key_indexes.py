@@ -0,0 +1,20 @@
+"""Index foreign key yang dipakai join & filter utama.
+
+create_all tidak menambah index ke tabel yang sudah ada, jadi database lama belum punya index ini:
+- products.seller_id: katalog per petani, pesanan masuk petani, bulk update
+- orders(buyer_id, created_at): riwayat pesanan pembeli
+- order_items.order_id: item per pesanan (selectinload / order_items_select)
+- order_items(product_id, order_id): pesanan masuk per produk petani"""
+from sqlalchemy import text
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_products_seller_id ON products (seller_id)",
+    "CREATE INDEX IF NOT EXISTS ix_orders_buyer_created ON orders (buyer_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_order_items_order_id ON order_items (order_id)",
+    "CREATE INDEX IF NOT EXISTS ix_order_items_product_order ON order_items (product_id, order_id)",
+]
+
+
+def upgrade(conn):
+    for statement in INDEXES:
+        conn.execute(text(statement))
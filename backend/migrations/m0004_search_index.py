@@ -0,0 +1,6 @@
+"""Index pencarian FTS5 (SQLite) untuk /search, diisi dari produk & blog yang sudah ada."""
+from routers import search
+
+
+def upgrade(conn):
+    search.init_search_index(conn)
@@ -0,0 +1,8 @@
+"""Isi counter /admin/stats dan riwayat harga dari data yang sudah ada (database lama)."""
+import price_history
+import stats
+
+
+def upgrade(conn):
+    stats.ensure_initialized(conn)
+    price_history.ensure_initialized(conn)
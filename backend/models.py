@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Text, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, ForeignKey, Text, Date, DateTime, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime
@@ -41,7 +41,8 @@ class Product(Base):
     price = Column(Integer)
     stock = Column(Integer)
     image_url = Column(String, nullable=True)
-    seller_id = Column(Integer, ForeignKey("users.id"))
+    seller_id = Column(Integer, ForeignKey("users.id"), index=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1") # Naik setiap baris ini berubah (ETag per produk)
     
     seller = relationship("User", back_populates="products")
 
@@ -56,16 +57,26 @@ class Order(Base):
     buyer = relationship("User", back_populates="orders")
     items = relationship("OrderItem", back_populates="order")
 
+    __table_args__ = (
+        # Riwayat pesanan pembeli: filter buyer_id, urut created_at
+        Index("ix_orders_buyer_created", "buyer_id", "created_at"),
+    )
+
 class OrderItem(Base):
     __tablename__ = "order_items"
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"))
+    order_id = Column(Integer, ForeignKey("orders.id"), index=True)
     product_id = Column(Integer, ForeignKey("products.id"))
     quantity = Column(Integer)
     price_at_purchase = Column(Integer)
     
     order = relationship("Order", back_populates="items")
     product = relationship("Product")
+
+    __table_args__ = (
+        # Pesanan masuk petani: produk milik seller -> order_id tanpa baca tabel
+        Index("ix_order_items_product_order", "product_id", "order_id"),
+    )
     
 class Blog(Base):
     __tablename__ = "blogs"
@@ -85,4 +96,106 @@ class CoffeePrice(Base):
     coffee_type = Column(String, index=True) # Contoh: Arabika, Robusta
     price = Column(Integer) # Harga per kg
     description = Column(String, nullable=True) # Keterangan (misal: "Naik 2%")
-    updated_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String, primary_key=True) # Header Idempotency-Key dari client
+    request_hash = Column(String) # Sidik jari body request, supaya key tidak dipakai untuk request lain
+    status_code = Column(Integer)
+    response_body = Column(Text) # Response (JSON) yang dikirim ulang saat retry
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, index=True)
+
+
+class StatCounter(Base):
+    __tablename__ = "stat_counters"
+
+    name = Column(String, primary_key=True) # Contoh: total_users, total_revenue, orders_status:Pending
+    value = Column(BigInteger, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class DailyStat(Base):
+    __tablename__ = "daily_stats"
+
+    day = Column(Date, primary_key=True) # Tanggal (UTC)
+    total_orders = Column(Integer, default=0)
+    total_revenue = Column(BigInteger, default=0)
+
+
+class ResourceVersion(Base):
+    __tablename__ = "resource_versions"
+
+    name = Column(String, primary_key=True) # products, blogs, prices
+    version = Column(Integer, default=0) # Naik setiap ada perubahan data (dipakai sebagai ETag)
+    updated_at = Column(DateTime, default=datetime.utcnow) # Dipakai sebagai Last-Modified
+
+
+class CoffeePriceHistory(Base):
+    __tablename__ = "coffee_price_history"
+
+    id = Column(Integer, primary_key=True)
+    coffee_type = Column(String, nullable=False)
+    price = Column(Integer, nullable=False)
+    recorded_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        # Semua baris (append-only). Query rentang waktu per jenis kopi lewat index ini
+        Index("ix_price_history_type_time", "coffee_type", "recorded_at"),
+    )
+
+
+class CoffeePriceDaily(Base):
+    __tablename__ = "coffee_price_daily"
+
+    coffee_type = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True) # Tanggal (UTC)
+    open = Column(Integer) # Harga pertama hari itu
+    high = Column(Integer)
+    low = Column(Integer)
+    close = Column(Integer) # Harga terakhir hari itu
+    price_sum = Column(BigInteger) # Untuk rata-rata: price_sum / tick_count
+    tick_count = Column(Integer)
+
+
+class CartReservation(Base):
+    __tablename__ = "cart_reservations"
+
+    id = Column(Integer, primary_key=True)
+    buyer_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    price = Column(Integer, nullable=False) # Harga saat masuk keranjang (dipakai saat checkout)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False) # Setelah lewat, stok kembali tersedia untuk pembeli lain
+
+    __table_args__ = (
+        # Satu baris per produk di keranjang pembeli
+        UniqueConstraint("buyer_id", "product_id", name="uq_cart_buyer_product"),
+        # Stok tersedia = stock - SUM(quantity) reservasi aktif: dibaca dari index saja (covering)
+        Index("ix_cart_product_expires", "product_id", "expires_at", "quantity"),
+        # Sweeper: reservasi kadaluarsa tertua dulu
+        Index("ix_cart_expires", "expires_at"),
+    )
+
+
+class OutboxEvent(Base):
+    __tablename__ = "outbox_events"
+
+    id = Column(Integer, primary_key=True)
+    event_type = Column(String, nullable=False) # Contoh: order.created, order.status_changed
+    payload = Column(Text, nullable=False) # JSON, ditulis di transaksi yang sama dengan perubahan datanya
+    status = Column(String, nullable=False, default="pending") # pending | dead (gagal terus, menunggu admin)
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime, nullable=False, default=datetime.utcnow) # Diproses setelah waktu ini (backoff/lease)
+    claimed_by = Column(String, nullable=True) # Batch worker yang sedang memproses
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Worker: event pending yang sudah waktunya, urut id
+        Index("ix_outbox_due", "status", "available_at", "id"),
+        Index("ix_outbox_claim", "claimed_by"),
+    )
@@ -0,0 +1,280 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+import events
+import metrics
+from models import OutboxEvent
+
+# Transactional outbox: endpoint hanya menulis baris outbox_events di transaksi yang SAMA dengan
+# perubahan datanya (enqueue), lalu efek samping (notifikasi, email, refresh, dll.) dijalankan worker
+# di background. Kalau transaksi batal, event-nya ikut batal; kalau handler gagal, event dicoba lagi.
+# Jaminan: at-least-once (handler bisa terpanggil lebih dari sekali, jadi harus idempoten),
+# urut id di dalam satu batch, tanpa jaminan urutan antar retry.
+
+# ---------- KONFIGURASI ----------
+OUTBOX_WORKER_IN_APP = os.getenv("OUTBOX_WORKER_IN_APP", "1") == "1"  # 0 = jalankan terpisah: python outbox.py
+OUTBOX_BATCH = int(os.getenv("OUTBOX_BATCH", "100"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "1"))  # detik; event baru membangunkan worker lebih cepat
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "300"))  # batch yang diklaim worker mati dicoba ulang
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))  # setelah itu status = dead (dead letter)
+OUTBOX_BACKOFF_BASE = float(os.getenv("OUTBOX_BACKOFF_BASE", "2"))  # detik, dikali 2 setiap percobaan
+OUTBOX_BACKOFF_MAX = float(os.getenv("OUTBOX_BACKOFF_MAX", "600"))
+
+logger = logging.getLogger("nbb.outbox")
+
+# event_type -> daftar handler(payload: dict)
+handlers = {}
+
+
+def handler(event_type: str):
+    """Decorator: daftarkan fungsi sebagai handler event (boleh lebih dari satu per event_type)"""
+    def register(fn: Callable[[dict], None]):
+        handlers.setdefault(event_type, []).append(fn)
+        return fn
+    return register
+
+
+# ---------- TULIS (di request) ----------
+
+def enqueue(db: Session, event_type: str, payload: dict):
+    """Tambahkan event ke transaksi yang sedang berjalan. Commit oleh pemanggil, lalu panggil notify()."""
+    db.add(OutboxEvent(event_type=event_type, payload=json.dumps(payload, default=str)))
+
+
+_loop = None
+_wakeup = None
+
+
+def notify():
+    """Bangunkan worker di proses ini (aman dari thread mana pun). Panggil SETELAH commit."""
+    if _loop is not None:
+        try:
+            _loop.call_soon_threadsafe(_wakeup.set)
+        except RuntimeError:  # event loop sudah ditutup (shutdown)
+            pass
+
+
+# ---------- WORKER ----------
+
+class WorkerStats:
+    """Counter worker di proses ini: throughput (1 menit terakhir) dan lag event terakhir"""
+
+    def __init__(self):
+        self.processed = 0
+        self.retried = 0
+        self.dead = 0
+        self.batches = 0
+        self.last_lag = None
+        self.last_batch_at = None
+        self._recent = deque()  # (monotonic, jumlah event selesai) per batch
+
+    def record(self, done: int, retried: int, dead: int, lag: Optional[float]):
+        now = time.monotonic()
+        self.processed += done
+        self.retried += retried
+        self.dead += dead
+        self.batches += 1
+        self.last_batch_at = datetime.utcnow()
+        if lag is not None:
+            self.last_lag = lag
+        self._recent.append((now, done))
+        while self._recent and self._recent[0][0] < now - 60:
+            self._recent.popleft()
+
+    def throughput(self) -> float:
+        now = time.monotonic()
+        return round(sum(n for t, n in self._recent if t >= now - 60) / 60, 2)
+
+
+worker_stats = WorkerStats()
+
+
+def backoff(attempts: int) -> float:
+    """Jeda sebelum percobaan berikutnya: eksponensial dengan jitter, dibatasi OUTBOX_BACKOFF_MAX"""
+    delay = min(OUTBOX_BACKOFF_MAX, OUTBOX_BACKOFF_BASE * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+class NoHandler(Exception):
+    """Belum ada handler untuk event_type ini: dicoba ulang pun tetap gagal, jadi langsung dead letter"""
+
+
+def dispatch(event_type: str, payload: dict):
+    if event_type not in handlers:
+        raise NoHandler(f"Tidak ada handler untuk {event_type}")
+    for fn in handlers[event_type]:
+        fn(payload)
+
+
+def process_batch(db: Session, batch: int = OUTBOX_BATCH) -> int:
+    """Klaim maksimal `batch` event yang sudah waktunya, jalankan handler-nya, lalu hapus yang sukses
+    dan jadwalkan ulang / dead-letter yang gagal. Mengembalikan jumlah event yang diklaim."""
+    now = datetime.utcnow()
+    claim = uuid.uuid4().hex
+    due = (
+        select(OutboxEvent.id)
+        .where(OutboxEvent.status == "pending", OutboxEvent.available_at <= now)
+        .order_by(OutboxEvent.id)
+        .limit(batch)
+    )
+    # Klaim = geser available_at sejauh lease. Worker lain (proses lain) tidak mengambil event yang sama;
+    # jika worker ini mati di tengah batch, event muncul lagi setelah lease habis.
+    db.execute(
+        update(OutboxEvent)
+        .where(OutboxEvent.id.in_(due), OutboxEvent.available_at <= now)
+        .values(claimed_by=claim, available_at=now + timedelta(seconds=OUTBOX_LEASE_SECONDS))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    rows = db.execute(
+        select(
+            OutboxEvent.id, OutboxEvent.event_type, OutboxEvent.payload, OutboxEvent.attempts, OutboxEvent.created_at,
+        )
+        .where(OutboxEvent.claimed_by == claim)
+        .order_by(OutboxEvent.id)
+    ).all()
+    if not rows:
+        return 0
+
+    done, retried, dead, lag = [], 0, 0, None
+    for row in rows:
+        try:
+            dispatch(row.event_type, json.loads(row.payload))
+        except Exception as exc:
+            attempts = row.attempts + 1
+            values = {"attempts": attempts, "claimed_by": None, "last_error": repr(exc)[:2000]}
+            if attempts >= OUTBOX_MAX_ATTEMPTS or isinstance(exc, NoHandler):
+                values["status"] = "dead"
+                dead += 1
+                metrics.OUTBOX_EVENTS.inc((row.event_type, "dead"))
+                logger.error("Event outbox %s (%s) masuk dead letter: %r", row.id, row.event_type, exc)
+            else:
+                values["available_at"] = datetime.utcnow() + timedelta(seconds=backoff(attempts))
+                retried += 1
+                metrics.OUTBOX_EVENTS.inc((row.event_type, "retry"))
+                logger.warning("Event outbox %s (%s) gagal, percobaan ke-%d: %r", row.id, row.event_type, attempts, exc)
+            db.execute(update(OutboxEvent).where(OutboxEvent.id == row.id).values(**values))
+            continue
+        done.append(row.id)
+        lag = (datetime.utcnow() - row.created_at).total_seconds()
+        metrics.OUTBOX_EVENTS.inc((row.event_type, "ok"))
+        metrics.OUTBOX_LAG.observe(lag)
+
+    if done:
+        db.execute(delete(OutboxEvent).where(OutboxEvent.id.in_(done)))
+    db.commit()
+    worker_stats.record(len(done), retried, dead, lag)
+    return len(rows)
+
+
+async def run_worker(session_factory, interval: float = OUTBOX_POLL_INTERVAL):
+    """Task background (dijalankan di lifespan): kuras outbox per batch di threadpool.
+    Tidur sampai ada notify() atau `interval` detik (untuk event yang menunggu backoff)."""
+    global _loop, _wakeup
+    _loop = asyncio.get_running_loop()
+    _wakeup = asyncio.Event()
+
+    def drain():
+        with session_factory() as db:
+            return process_batch(db)
+
+    while True:
+        _wakeup.clear()
+        try:
+            claimed = await run_in_threadpool(drain)
+        except Exception:
+            logger.exception("Worker outbox gagal, dicoba lagi di putaran berikutnya")
+            claimed = 0
+        if claimed >= OUTBOX_BATCH:
+            continue  # masih ada antrian
+        try:
+            await asyncio.wait_for(_wakeup.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+# ---------- ADMIN ----------
+
+def stats(db: Session) -> dict:
+    now = datetime.utcnow()
+    pending, oldest = db.execute(
+        select(func.count(), func.min(OutboxEvent.created_at)).where(OutboxEvent.status == "pending")
+    ).one()
+    dead = db.execute(select(func.count()).where(OutboxEvent.status == "dead")).scalar()
+    return {
+        "pending": pending,
+        "dead": dead,
+        "lag_seconds": round((now - oldest).total_seconds(), 3) if oldest else 0.0,
+        "worker": {
+            "in_app": OUTBOX_WORKER_IN_APP,
+            "processed": worker_stats.processed,
+            "retried": worker_stats.retried,
+            "dead_lettered": worker_stats.dead,
+            "batches": worker_stats.batches,
+            "events_per_second_1m": worker_stats.throughput(),
+            "last_lag_seconds": worker_stats.last_lag,
+            "last_batch_at": worker_stats.last_batch_at,
+        },
+    }
+
+
+def dead_letters(db: Session, limit: int = 50) -> list:
+    rows = db.execute(
+        select(OutboxEvent.id, OutboxEvent.event_type, OutboxEvent.payload, OutboxEvent.attempts,
+               OutboxEvent.last_error, OutboxEvent.created_at)
+        .where(OutboxEvent.status == "dead")
+        .order_by(OutboxEvent.id.desc())
+        .limit(limit)
+    ).all()
+    return [{**row._asdict(), "payload": json.loads(row.payload)} for row in rows]
+
+
+def requeue_dead(db: Session, ids: Optional[list] = None) -> int:
+    """Kembalikan event dead letter ke antrian (percobaan dihitung dari nol). Commit di sini."""
+    stmt = update(OutboxEvent).where(OutboxEvent.status == "dead")
+    if ids:
+        stmt = stmt.where(OutboxEvent.id.in_(ids))
+    count = db.execute(
+        stmt.values(status="pending", attempts=0, available_at=datetime.utcnow(), claimed_by=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    notify()
+    return count
+
+
+# ---------- HANDLER ----------
+# Live update SSE hanya sampai ke client yang terhubung ke proses yang menjalankan worker,
+# jadi untuk event SSE worker sebaiknya tetap di dalam app (OUTBOX_WORKER_IN_APP=1).
+
+@handler("order.created")
+def publish_order_created(payload: dict):
+    events.publish(events.order_topic(payload["buyer_id"]), "order_created", {
+        "order_id": payload["order_id"], "total_price": payload["total_price"],
+    })
+
+
+@handler("order.status_changed")
+def publish_order_status(payload: dict):
+    events.publish(events.order_topic(payload["buyer_id"]), "order_status", {
+        "order_id": payload["order_id"], "status": payload["status"],
+    })
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_worker(SessionLocal))
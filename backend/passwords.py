@@ -0,0 +1,75 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+
+# ---------- KONFIGURASI ----------
+# Cost bcrypt. Jika diubah, hash lama otomatis di-upgrade saat user berhasil login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Jumlah proses khusus hashing (0 = pakai threadpool biasa, tanpa proses terpisah)
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Maksimal hashing yang boleh antri. Lebih dari ini langsung ditolak 503 (load shedding)
+HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", str(max(HASH_WORKERS, 1) * 16)))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+_pool = None
+_pending = 0
+
+
+# ---------- FUNGSI SYNC (dipanggil di proses worker) ----------
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+def verify_password(plain: str, hashed: str) -> bool:
+    return pwd_context.verify(plain, hashed)
+
+def verify_and_update(plain: str, hashed: str):
+    """(cocok?, hash_baru_atau_None). hash_baru terisi jika cost/skema hash lama sudah usang."""
+    return pwd_context.verify_and_update(plain, hashed)
+
+
+# ---------- POOL ----------
+def _get_pool():
+    global _pool
+    if _pool is None:
+        # spawn: aman walau proses induk sudah punya banyak thread (uvicorn/threadpool)
+        _pool = ProcessPoolExecutor(max_workers=HASH_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def queue_depth() -> int:
+    return _pending
+
+async def _run(fn, *args):
+    global _pending
+    if _pending >= HASH_QUEUE_LIMIT:
+        raise HTTPException(
+            status_code=503,
+            detail="Server sedang sibuk, silakan coba lagi",
+            headers={"Retry-After": "1"},
+        )
+    _pending += 1
+    try:
+        if HASH_WORKERS <= 0:
+            return await run_in_threadpool(fn, *args)
+        return await asyncio.get_running_loop().run_in_executor(_get_pool(), fn, *args)
+    finally:
+        _pending -= 1
+
+
+# ---------- API ASYNC (dipakai endpoint) ----------
+async def hash_password_async(password: str) -> str:
+    return await _run(hash_password, password)
+
+async def verify_and_update_async(plain: str, hashed: str):
+    return await _run(verify_and_update, plain, hashed)
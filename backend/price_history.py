@@ -0,0 +1,192 @@
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import Date, Float, case, cast, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models import CoffeePrice, CoffeePriceHistory, CoffeePriceDaily
+
+# Riwayat harga kopi. Setiap update harga ditambahkan ke coffee_price_history (tidak pernah diubah),
+# dan rollup OHLC harian di coffee_price_daily diperbarui di transaksi yang sama.
+# Grafik dibaca dari rollup, jadi biayanya sebanding jumlah hari/minggu, bukan jumlah tick.
+INTERVALS = ("day", "week", "month")
+
+
+# ---------- TULIS ----------
+
+def _upsert_daily(db: Session, coffee_type: str, day: date, price: int):
+    """Tambahkan satu tick ke rollup harian (open tetap, close = harga terbaru)"""
+    table = CoffeePriceDaily
+    changes = {
+        "high": case((table.high < price, price), else_=table.high),
+        "low": case((table.low > price, price), else_=table.low),
+        "close": price,
+        "price_sum": table.price_sum + price,
+        "tick_count": table.tick_count + 1,
+    }
+    dialect = db.get_bind().dialect.name
+
+    if dialect in ("sqlite", "postgresql"):
+        dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = dialect_insert(table).values(
+            coffee_type=coffee_type, day=day,
+            open=price, high=price, low=price, close=price, price_sum=price, tick_count=1,
+        )
+        db.execute(stmt.on_conflict_do_update(index_elements=["coffee_type", "day"], set_=changes))
+        return
+
+    result = db.execute(
+        update(table)
+        .where(table.coffee_type == coffee_type, table.day == day)
+        .values(changes)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        db.execute(insert(table).values(
+            coffee_type=coffee_type, day=day,
+            open=price, high=price, low=price, close=price, price_sum=price, tick_count=1,
+        ))
+
+
+def record(db: Session, coffee_type: str, price: int, when: datetime = None):
+    """Panggil setiap harga berubah (commit oleh pemanggil)"""
+    when = when or datetime.utcnow()
+    db.execute(insert(CoffeePriceHistory).values(coffee_type=coffee_type, price=price, recorded_at=when))
+    _upsert_daily(db, coffee_type, when.date(), price)
+
+
+# ---------- BACA ----------
+
+def _bucket(dialect: str, interval: str):
+    """Awal periode (tanggal) untuk setiap baris rollup"""
+    day = CoffeePriceDaily.day
+    if interval == "day":
+        return day
+    if dialect == "sqlite":
+        if interval == "week":
+            return func.date(day, "weekday 0", "-6 days")  # Senin
+        return func.date(day, "start of month")
+    return cast(func.date_trunc(interval, day), Date)
+
+
+def series_select(dialect: str, coffee_type: str, interval: str, date_from: date, date_to: date):
+    """OHLC + min/max/rata-rata per periode, dihitung di SQL dari rollup harian"""
+    table = CoffeePriceDaily
+    bucket = _bucket(dialect, interval)
+    daily = (
+        select(
+            bucket.label("bucket"),
+            table.high,
+            table.low,
+            table.price_sum,
+            table.tick_count,
+            func.first_value(table.open).over(partition_by=bucket, order_by=table.day).label("first_open"),
+            func.first_value(table.close).over(partition_by=bucket, order_by=table.day.desc()).label("last_close"),
+        )
+        .where(table.coffee_type == coffee_type, table.day >= date_from, table.day <= date_to)
+        .subquery()
+    )
+    return (
+        select(
+            daily.c.bucket,
+            func.min(daily.c.first_open).label("open"),
+            func.max(daily.c.high).label("high"),
+            func.min(daily.c.low).label("low"),
+            func.min(daily.c.last_close).label("close"),
+            (cast(func.sum(daily.c.price_sum), Float) / func.sum(daily.c.tick_count)).label("avg"),
+            func.sum(daily.c.tick_count).label("ticks"),
+        )
+        .group_by(daily.c.bucket)
+        .order_by(daily.c.bucket)
+    )
+
+
+def to_points(rows) -> list:
+    return [
+        {
+            "period_start": date.fromisoformat(row.bucket) if isinstance(row.bucket, str) else row.bucket,
+            "open": row.open,
+            "high": row.high,
+            "low": row.low,
+            "close": row.close,
+            "avg": round(row.avg, 2),
+            "ticks": row.ticks,
+        }
+        for row in rows
+    ]
+
+
+def ticks_select(coffee_type: str, since: datetime, until: datetime, limit: int):
+    """Tick mentah dalam rentang waktu (index coffee_type + recorded_at)"""
+    table = CoffeePriceHistory
+    return (
+        select(table.price, table.recorded_at)
+        .where(table.coffee_type == coffee_type, table.recorded_at >= since, table.recorded_at < until)
+        .order_by(table.recorded_at)
+        .limit(limit)
+    )
+
+
+def day_range(date_from: date, date_to: date):
+    """Batas DateTime untuk filter tanggal (inklusif)"""
+    return datetime.combine(date_from, time.min), datetime.combine(date_to + timedelta(days=1), time.min)
+
+
+# ---------- REBUILD ----------
+
+def rebuild_rollup(db: Session) -> int:
+    """Hitung ulang seluruh rollup harian dari tabel riwayat (full scan, jalankan sesekali saja)"""
+    history = CoffeePriceHistory
+    day = func.date(history.recorded_at)
+    window = {"partition_by": (history.coffee_type, day)}
+    ticks = select(
+        history.coffee_type,
+        day.label("day"),
+        history.price,
+        func.first_value(history.price).over(order_by=(history.recorded_at, history.id), **window).label("first_price"),
+        func.first_value(history.price).over(
+            order_by=(history.recorded_at.desc(), history.id.desc()), **window
+        ).label("last_price"),
+    ).subquery()
+    rollup = select(
+        ticks.c.coffee_type,
+        ticks.c.day,
+        func.min(ticks.c.first_price),
+        func.max(ticks.c.price),
+        func.min(ticks.c.price),
+        func.min(ticks.c.last_price),
+        func.sum(ticks.c.price),
+        func.count(),
+    ).group_by(ticks.c.coffee_type, ticks.c.day)
+
+    table = CoffeePriceDaily
+    db.query(table).delete(synchronize_session=False)
+    result = db.execute(insert(table).from_select(
+        ["coffee_type", "day", "open", "high", "low", "close", "price_sum", "tick_count"], rollup
+    ))
+    db.commit()
+    return result.rowcount
+
+
+def ensure_initialized(bind):
+    """Migrasi 0005: harga yang sudah ada sebelum fitur riwayat dijadikan tick pertamanya (bind = engine/koneksi)"""
+    with Session(bind) as db:
+        if db.query(CoffeePriceHistory.id).first() is not None:
+            return
+        prices = db.query(CoffeePrice.coffee_type, CoffeePrice.price, CoffeePrice.updated_at).all()
+        for coffee_type, price, updated_at in prices:
+            record(db, coffee_type, price, updated_at)
+        db.commit()
+
+
+if __name__ == "__main__":
+    import sys
+    from database import SessionLocal
+
+    if sys.argv[1:] != ["rebuild"]:
+        sys.exit("Pemakaian: python price_history.py rebuild")
+    db = SessionLocal()
+    try:
+        print(f"{rebuild_rollup(db)} baris rollup harian dibuat ulang")
+    finally:
+        db.close()
@@ -0,0 +1,338 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from collections import OrderedDict, deque, namedtuple
+from typing import Optional
+
+from fastapi import HTTPException, Request
+
+import identity
+import metrics
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # redis opsional (pip install redis): hanya untuk RATE_LIMIT_BACKEND=redis
+    redis_asyncio = None
+
+# Rate limit (token bucket) + admission control.
+# - Middleware: bucket per IP untuk semua request, lalu batas request yang diproses bersamaan
+#   (antri sebentar, lalu 503 + Retry-After) supaya satu client tidak menghabiskan worker.
+# - Dependency limit(): bucket per router/route, per IP atau per user (token), mis. /login dan tulis pesanan.
+# Bucket disimpan di backend yang bisa diganti: memory (per worker uvicorn) atau redis (dibagi semua worker).
+# Batas concurrency selalu per worker, karena yang dijaga memang kapasitas proses ini.
+
+# ---------- KONFIGURASI ----------
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+RATE_LIMIT_IP = os.getenv("RATE_LIMIT_IP", "50/s:100")  # semua request per IP; format "jumlah/periode[:burst]"
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")  # memory | redis
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))  # bucket di memory (LRU)
+# X-Forwarded-For hanya dipercaya jika backend di belakang reverse proxy sendiri
+RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "0") == "1"
+# Koneksi panjang (SSE), metrik, dan file gambar tidak dihitung
+RATE_LIMIT_EXEMPT = tuple(p for p in os.getenv("RATE_LIMIT_EXEMPT", "/events,/metrics,/media").split(",") if p)
+
+MAX_CONCURRENCY = int(os.getenv("MAX_CONCURRENCY", "200"))  # request diproses bersamaan per worker (0 = tanpa batas)
+CONCURRENCY_QUEUE = int(os.getenv("CONCURRENCY_QUEUE", "200"))  # maksimal yang boleh menunggu slot
+CONCURRENCY_QUEUE_TIMEOUT = float(os.getenv("CONCURRENCY_QUEUE_TIMEOUT", "0.5"))  # detik menunggu sebelum 503
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+logger = logging.getLogger("nbb.ratelimit")
+
+# rate = token per detik, burst = kapasitas bucket (request beruntun yang boleh lolos sekaligus)
+Limit = namedtuple("Limit", ["rate", "burst"])
+
+
+def parse_limit(spec: str) -> Optional[Limit]:
+    """'10/m' = 10 per menit (burst 10), '50/s:100' = 50 per detik dengan burst 100. 'off' = tanpa limit."""
+    spec = spec.strip().lower()
+    if spec in ("", "0", "off"):
+        return None
+    amount, _, rest = spec.partition("/")
+    period, _, burst = rest.partition(":")
+    rate = float(amount) / PERIODS[period[:1] or "s"]
+    return Limit(rate, float(burst or amount))
+
+
+def client_ip(scope) -> str:
+    if RATE_LIMIT_TRUST_PROXY:
+        for name, value in scope["headers"]:
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def retry_after(wait: float) -> str:
+    return str(max(1, math.ceil(wait)))
+
+
+# ---------- BACKEND BUCKET ----------
+
+class RateLimitBackend:
+    """Antarmuka penyimpanan bucket. take() mengambil 1 token dari bucket `key`:
+    0 jika boleh lanjut, selain itu jumlah detik sampai token berikutnya tersedia."""
+
+    async def take(self, key: str, limit: Limit) -> float:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {"backend": type(self).__name__}
+
+
+class MemoryBackend(RateLimitBackend):
+    """Bucket di dict LRU milik worker ini. Hanya dipakai dari event loop, jadi tanpa lock.
+    Bucket yang sudah penuh lagi (idle >= burst/rate) tidak berbeda dengan bucket baru, jadi dibuang;
+    jika tetap melebihi maxsize, bucket paling lama tidak dipakai yang dibuang."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()  # key -> [token, waktu update, waktu bucket penuh lagi]
+
+    async def take(self, key: str, limit: Limit) -> float:
+        return self.take_now(key, limit, time.monotonic())
+
+    def take_now(self, key: str, limit: Limit, now: float) -> float:
+        buckets = self._buckets
+        bucket = buckets.get(key)
+        if bucket is None:
+            tokens = limit.burst
+        else:
+            tokens = min(limit.burst, bucket[0] + (now - bucket[1]) * limit.rate)
+            buckets.move_to_end(key)
+
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / limit.rate
+        full_at = now + (limit.burst - tokens) / limit.rate
+        if bucket is None:
+            buckets[key] = [tokens, now, full_at]
+        else:
+            bucket[0], bucket[1], bucket[2] = tokens, now, full_at
+
+        # Bersihkan sedikit demi sedikit dari ujung LRU (biaya per request tetap kecil)
+        for _ in range(2):
+            if not buckets:
+                break
+            oldest = next(iter(buckets.values()))
+            if oldest[2] > now and len(buckets) <= self.maxsize:
+                break
+            buckets.popitem(last=False)
+        return wait
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "keys": len(self._buckets), "max_keys": self.maxsize}
+
+
+# Token bucket atomik di Redis (satu round trip). Waktu dikirim dari worker; antar worker di host yang sama.
+_REDIS_TAKE = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 't', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('HSET', KEYS[1], 't', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((burst - tokens) / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+class RedisBackend(RateLimitBackend):
+    """Bucket dibagi semua worker/instance lewat Redis. Jika Redis tidak bisa dihubungi, request diloloskan."""
+
+    def __init__(self, url: str, prefix: str = "nbb:rl:"):
+        if redis_asyncio is None:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis butuh paket redis (pip install redis)")
+        self.prefix = prefix
+        self._client = redis_asyncio.from_url(url)
+        self._script = self._client.register_script(_REDIS_TAKE)
+        self.errors = 0
+
+    async def take(self, key: str, limit: Limit) -> float:
+        try:
+            return float(await self._script(keys=[self.prefix + key], args=[limit.rate, limit.burst, time.time()]))
+        except Exception:
+            self.errors += 1
+            logger.warning("Redis rate limit tidak tersedia, request diloloskan", exc_info=self.errors == 1)
+            return 0.0
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "errors": self.errors}
+
+
+def _make_backend() -> RateLimitBackend:
+    if RATE_LIMIT_BACKEND == "redis":
+        return RedisBackend(RATE_LIMIT_REDIS_URL)
+    return MemoryBackend(RATE_LIMIT_MAX_KEYS)
+
+
+backend = _make_backend()
+
+
+def set_backend(new_backend: RateLimitBackend):
+    """Ganti penyimpanan bucket (mis. store bersama lain) sebelum app menerima request"""
+    global backend
+    backend = new_backend
+
+
+# ---------- ADMISSION CONTROL ----------
+
+class ConcurrencyLimiter:
+    """Batas request yang diproses bersamaan. Jika penuh, request menunggu (FIFO) paling lama `timeout`
+    detik dengan antrian maksimal `max_queue`; selebihnya langsung ditolak."""
+
+    def __init__(self, limit: int, max_queue: int, timeout: float):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.active = 0
+        self._waiters = deque()
+        self.queued = 0
+        self.rejected = 0
+
+    async def acquire(self) -> bool:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return True
+        if len(self._waiters) >= self.max_queue or self.timeout <= 0:
+            self.rejected += 1
+            return False
+
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        timer = loop.call_later(self.timeout, self._expire, waiter)
+        try:
+            admitted = await waiter
+        except asyncio.CancelledError:
+            # Client putus saat menunggu: jika slot sudah terlanjur diberikan, kembalikan
+            if waiter.done() and not waiter.cancelled() and waiter.result():
+                self.release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+        finally:
+            timer.cancel()
+        if not admitted:
+            self.rejected += 1
+        return admitted
+
+    def _expire(self, waiter):
+        if not waiter.done():
+            self._waiters.remove(waiter)
+            waiter.set_result(False)
+
+    def release(self):
+        # Slot langsung diserahkan ke penunggu terdepan (active tidak berubah)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self.active -= 1
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "waiting": len(self._waiters),
+            "queued_total": self.queued,
+            "rejected_total": self.rejected,
+        }
+
+
+limiter = ConcurrencyLimiter(MAX_CONCURRENCY, CONCURRENCY_QUEUE, CONCURRENCY_QUEUE_TIMEOUT)
+
+
+# ---------- MIDDLEWARE ----------
+
+async def _reject(send, status: int, wait: float, detail: str):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", retry_after(wait).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class RateLimitMiddleware:
+    """Middleware ASGI murni: bucket per IP, lalu batas concurrency global worker ini"""
+
+    def __init__(self, app, ip_limit: Optional[str] = RATE_LIMIT_IP, concurrency: Optional[ConcurrencyLimiter] = None):
+        self.app = app
+        self.ip_limit = parse_limit(ip_limit) if ip_limit else None
+        self.limiter = concurrency or limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(RATE_LIMIT_EXEMPT):
+            return await self.app(scope, receive, send)
+
+        if self.ip_limit is not None:
+            wait = await backend.take("ip:" + client_ip(scope), self.ip_limit)
+            if wait:
+                metrics.RATE_LIMITED.inc(("ip",))
+                return await _reject(send, 429, wait, "Terlalu banyak request, coba lagi nanti")
+
+        if self.limiter.limit <= 0:
+            return await self.app(scope, receive, send)
+        if not await self.limiter.acquire():
+            metrics.RATE_LIMITED.inc(("concurrency",))
+            return await _reject(send, 503, 1, "Server sedang sibuk, silakan coba lagi")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.limiter.release()
+
+
+# ---------- PER ROUTER / ROUTE ----------
+
+async def _user_key(request: Request) -> Optional[str]:
+    authorization = request.headers.get("authorization", "")
+    if not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        user = await identity.get_current_user(authorization[7:].strip())
+    except HTTPException:
+        return None  # token tidak valid: dihitung per IP, endpoint sendiri yang menolak 401
+    return f"user:{user.id}"
+
+
+def limit(name: str, default: str, per: str = "ip"):
+    """Dependency token bucket bernama `name` (satu bucket per IP atau per user yang login; tanpa token = per IP).
+    Pasang di APIRouter(dependencies=...), include_router(..., dependencies=...) atau di satu route.
+    Batas bisa diganti lewat env RATE_LIMIT_<NAME>, mis. RATE_LIMIT_AUTH=5/m:10 atau 'off'."""
+    rule = parse_limit(os.getenv(f"RATE_LIMIT_{name.upper()}", default))
+
+    async def check(request: Request):
+        if rule is None or not RATE_LIMIT_ENABLED:
+            return
+        who = await _user_key(request) if per == "user" else None
+        wait = await backend.take(f"{name}:{who or 'ip:' + client_ip(request.scope)}", rule)
+        if wait:
+            metrics.RATE_LIMITED.inc((name,))
+            raise HTTPException(
+                status_code=429,
+                detail="Terlalu banyak request, coba lagi nanti",
+                headers={"Retry-After": retry_after(wait)},
+            )
+    return check
+
+
+def stats() -> dict:
+    return {"enabled": RATE_LIMIT_ENABLED, "buckets": backend.stats(), "concurrency": limiter.stats()}
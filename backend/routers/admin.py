@@ -1,39 +1,90 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from database import SessionLocal
-from models import User, Product, Order
 from routers.auth import get_db
+import events
+import exporter
+import http_cache
+import identity
+import outbox
+import ratelimit
+import stats
 
-router = APIRouter(prefix="/admin", tags=["admin"])
+# Semua endpoint /admin hanya untuk token dengan role admin
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(identity.require_role("admin"))])
 
 @router.get("/stats")
 def get_admin_stats(db: Session = Depends(get_db)):
-    """Menghitung ringkasan data untuk Dashboard Admin"""
-    
-    # Hitung total user
-    total_users = db.query(User).count()
-    
-    # Hitung total petani
-    total_petani = db.query(User).filter(User.role == "petani").count()
-    
-    # Hitung total produk
-    total_products = db.query(Product).count()
-    
-    # Hitung total stok (Sum kolom stock)
-    total_stock = db.query(func.sum(Product.stock)).scalar() or 0
-    
-    # Hitung total pesanan
-    total_orders = db.query(Order).count()
-    
-    # Hitung estimasi pendapatan (Total harga semua order)
-    total_revenue = db.query(func.sum(Order.total_price)).scalar() or 0
-
-    return {
-        "total_users": total_users,
-        "total_petani": total_petani,
-        "total_products": total_products,
-        "total_stock": total_stock,
-        "total_orders": total_orders,
-        "total_revenue": total_revenue
-    }
\ No newline at end of file
+    """Ringkasan data untuk Dashboard Admin (dibaca dari counter, bukan COUNT/SUM seluruh tabel)"""
+    return stats.read_counters(db)
+
+@router.get("/stats/daily")
+def get_daily_stats(days: int = Query(30, ge=1, le=366), db: Session = Depends(get_db)):
+    """Jumlah pesanan & pendapatan per hari untuk grafik tren"""
+    return stats.read_daily(db, days)
+
+@router.post("/stats/reconcile")
+def reconcile_stats(db: Session = Depends(get_db)):
+    """Hitung ulang semua counter dari tabel aslinya (jika dicurigai tidak sinkron)"""
+    return stats.reconcile(db)
+
+@router.get("/identity-cache")
+def get_identity_cache_stats():
+    """Statistik cache username -> user (hit/miss) untuk worker yang menjawab request ini"""
+    return identity.cache.stats()
+
+@router.get("/token-cache")
+def get_token_cache_stats():
+    """Statistik cache token JWT yang sudah diverifikasi untuk worker ini"""
+    return identity.token_cache.stats()
+
+@router.get("/response-cache")
+def get_response_cache_stats():
+    """Statistik cache response /prices, /blogs, /products untuk worker ini"""
+    return http_cache.cache.stats()
+
+@router.get("/rate-limit")
+def get_rate_limit_stats():
+    """Jumlah bucket rate limit dan antrian concurrency (aktif, menunggu, ditolak) di worker ini"""
+    return ratelimit.stats()
+
+@router.get("/outbox")
+def get_outbox_stats(db: Session = Depends(get_db)):
+    """Antrian outbox: jumlah pending/dead, lag event tertua, throughput worker di proses ini"""
+    return outbox.stats(db)
+
+@router.get("/outbox/dead")
+def get_outbox_dead_letters(limit: int = Query(50, ge=1, le=500), db: Session = Depends(get_db)):
+    """Event yang gagal terus (dead letter), terbaru dulu, beserta error terakhirnya"""
+    return outbox.dead_letters(db, limit)
+
+@router.post("/outbox/dead/retry")
+def retry_outbox_dead_letters(ids: Optional[List[int]] = None, db: Session = Depends(get_db)):
+    """Masukkan lagi event dead letter ke antrian (body: daftar id, kosong = semua)"""
+    return {"requeued": outbox.requeue_dead(db, ids)}
+
+@router.get("/events")
+def get_event_hub_stats():
+    """Jumlah koneksi live (SSE) dan event yang dikirim di worker ini"""
+    return events.hub.stats()
+
+@router.get("/export/orders")
+def export_orders(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    seller: Optional[str] = None,
+    status: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    db: Session = Depends(get_db),
+):
+    """Download semua pesanan (satu baris per item) untuk laporan, di-stream tanpa batas jumlah"""
+    seller_id = None
+    if seller:
+        found = identity.resolve(db, seller)
+        if not found:
+            raise HTTPException(status_code=404, detail="Seller not found")
+        seller_id = found.id
+    stmt = exporter.order_rows_select(seller_id, status, date_from, date_to)
+    return exporter.export_response(stmt, format, "pesanan")
@@ -1,21 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from fastapi.security import OAuth2PasswordBearer
-from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
 from jose import JWTError, jwt
 from pydantic import BaseModel
 from datetime import datetime, timedelta
 from typing import Optional
 
-from database import SessionLocal
+from database import SessionLocal, AsyncSessionLocal
 from models import User
+import passwords
+import stats
 
 # ---------- KONFIGURASI ----------
 SECRET_KEY = "ganti_dengan_secret_key_yang_kuat"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = passwords.pwd_context
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
 router = APIRouter()
@@ -44,12 +46,17 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    """Session async untuk endpoint `async def` (tidak memakai thread dari threadpool)"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
 # ---------- UTIL ----------
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return passwords.hash_password(password)
 
 def verify_password(plain, hashed):
-    return pwd_context.verify(plain, hashed)
+    return passwords.verify_password(plain, hashed)
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
@@ -57,47 +64,85 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+# ---------- DB HELPER (sync, dijalankan di threadpool) ----------
+# Koneksi dikembalikan ke pool (rollback) SEBELUM bcrypt jalan,
+# supaya request yang antri hashing tidak ikut menahan koneksi database.
+def _find_user(db: Session, username: str):
+    row = (
+        db.query(User.id, User.username, User.role, User.hashed_password)
+        .filter(User.username == username)
+        .first()
+    )
+    db.rollback()
+    return row
+
+def _save_rehash(db: Session, user_id: int, new_hash: str):
+    db.query(User).filter(User.id == user_id).update({User.hashed_password: new_hash}, synchronize_session=False)
+    db.commit()
+
+def _username_or_email_taken(db: Session, user: UserCreate) -> bool:
+    taken = db.query(User.id).filter((User.username == user.username) | (User.email == user.email)).first() is not None
+    db.rollback()
+    return taken
+
+def _create_user(db: Session, user: UserCreate, hashed_pw: str):
+    # Kita set is_verified langsung jadi True saat daftar
+    db_user = User(
+        email=user.email,
+        username=user.username,
+        hashed_password=hashed_pw,
+        role=user.role,
+        is_verified=True 
+    )
+    db.add(db_user)
+    stats.increment(db, total_users=1, total_petani=1 if user.role == "petani" else 0)
+    db.commit()
+
 # ---------- ENDPOINTS ----------
+# Login/register async: bcrypt dikerjakan di process pool terpisah (passwords.py),
+# sehingga lonjakan login tidak menghabiskan threadpool yang dipakai endpoint baca.
 @router.post("/login", response_model=Token)
-def login(user: UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.username == user.username).first()
+async def login(user: UserLogin, db: Session = Depends(get_db)):
+    db_user = await run_in_threadpool(_find_user, db, user.username)
     
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
+    valid, new_hash = (False, None)
+    if db_user:
+        valid, new_hash = await passwords.verify_and_update_async(user.password, db_user.hashed_password)
+
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Username atau Password salah",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Cost bcrypt berubah sejak hash ini dibuat -> simpan hash baru (transparan untuk user)
+    if new_hash:
+        await run_in_threadpool(_save_rehash, db, db_user.id, new_hash)
+
     # --- BAGIAN PENGECEKAN EMAIL KITA HAPUS SEMENTARA AGAR BISA LOGIN ---
     # if not db_user.is_verified:
     #     raise HTTPException(status_code=403, detail="Email belum diverifikasi")
     
-    # Masukkan role ke dalam token agar bisa dibaca frontend (opsional)
+    # Masukkan role ke dalam token agar bisa dibaca frontend (opsional).
+    # uid + role dipakai identity.get_current_user, jadi request berikutnya tidak perlu query user.
     access_token = create_access_token(
-        data={"sub": db_user.username, "role": db_user.role}
+        data={"sub": db_user.username, "uid": db_user.id, "role": db_user.role}
     )
     
     return {"access_token": access_token, "token_type": "bearer", "role": db_user.role}
 
 @router.post("/register")
-def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: Session = Depends(get_db)):
     # Cek username/email kembar
-    if db.query(User).filter((User.username == user.username) | (User.email == user.email)).first():
+    if await run_in_threadpool(_username_or_email_taken, db, user):
         raise HTTPException(status_code=400, detail="Email atau Username sudah terdaftar")
 
-    hashed_pw = get_password_hash(user.password)
-    
-    # Kita set is_verified langsung jadi True saat daftar
-    db_user = User(
-        email=user.email,
-        username=user.username,
-        hashed_password=hashed_pw,
-        role=user.role,
-        is_verified=True 
-    )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    hashed_pw = await passwords.hash_password_async(user.password)
+    await run_in_threadpool(_create_user, db, user, hashed_pw)
+
+    # Hapus cache "username tidak ada" (import di sini karena identity.py memakai get_db dari modul ini)
+    import identity
+    identity.invalidate(user.username)
 
-    return {"message": "Pendaftaran Berhasil! Silakan Login."}
\ No newline at end of file
+    return {"message": "Pendaftaran Berhasil! Silakan Login."}
@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 from database import SessionLocal
 from models import Blog, User
-from routers.auth import get_db
+from routers.auth import get_db, get_async_db
+import fast_json
+import http_cache
+import identity
+import image_store
 
 router = APIRouter(prefix="/blogs", tags=["blogs"])
 
@@ -14,7 +20,6 @@ class BlogCreate(BaseModel):
     title: str
     content: str
     image_url: Optional[str] = None
-    author_username: str
 
 class BlogUpdate(BaseModel):
     title: Optional[str] = None
@@ -32,50 +37,70 @@ class BlogOut(BaseModel):
     class Config:
         from_attributes = True
 
+
 # --- ENDPOINTS ---
 
 @router.get("/", response_model=List[BlogOut])
-def get_blogs(db: Session = Depends(get_db)):
-    """Ambil semua artikel (terbaru di atas)"""
-    return db.query(Blog).order_by(Blog.created_at.desc()).all()
+async def get_blogs(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Ambil semua artikel (terbaru di atas), dengan ETag/304 + cache memori"""
+    async def build(headers):
+        # Kolom = field BlogOut, langsung di-encode tanpa objek ORM / model per baris
+        stmt = select(
+            Blog.id, Blog.title, Blog.content, Blog.image_url, Blog.author_username, Blog.created_at
+        ).order_by(Blog.created_at.desc())
+        return (await db.execute(stmt)).all()
+
+    return await http_cache.cached_response_async(request, db, "blogs", build, fast_json.dump_rows)
+
+# Penulis = user dari token (admin atau petani); petani hanya boleh mengubah artikelnya sendiri
+can_write = identity.require_role("admin", "petani")
+
+def _get_own_blog(db: Session, blog_id: int, user: identity.Identity) -> Blog:
+    blog = db.query(Blog).filter(Blog.id == blog_id).first()
+    if not blog:
+        raise HTTPException(status_code=404, detail="Artikel tidak ditemukan")
+    if user.role != "admin" and blog.author_username != user.username:
+        raise HTTPException(status_code=403, detail="Hanya penulis atau admin yang boleh mengubah artikel ini")
+    return blog
 
 @router.post("/", response_model=BlogOut)
-def create_blog(blog: BlogCreate, db: Session = Depends(get_db)):
-    """Admin membuat artikel baru"""
-    # Cek apakah user admin? (Sederhana: kita percaya frontend kirim role yg benar, 
-    # idealnya cek di DB tapi ini cukup untuk MVP)
-    
+def create_blog(blog: BlogCreate, user: identity.Identity = Depends(can_write), db: Session = Depends(get_db)):
+    """Admin/petani membuat artikel baru"""
     new_blog = Blog(
         title=blog.title,
         content=blog.content,
-        image_url=blog.image_url,
-        author_username=blog.author_username
+        image_url=image_store.normalize_image_url(blog.image_url),
+        author_username=user.username
     )
     db.add(new_blog)
+    http_cache.bump(db, "blogs")
     db.commit()
     db.refresh(new_blog)
     return new_blog
 
 @router.put("/{blog_id}")
-def update_blog(blog_id: int, blog_data: BlogUpdate, db: Session = Depends(get_db)):
+def update_blog(
+    blog_id: int, blog_data: BlogUpdate, user: identity.Identity = Depends(can_write), db: Session = Depends(get_db)
+):
     """Edit artikel"""
-    blog = db.query(Blog).filter(Blog.id == blog_id).first()
-    if not blog:
-        raise HTTPException(status_code=404, detail="Artikel tidak ditemukan")
+    blog = _get_own_blog(db, blog_id, user)
     
-    for key, value in blog_data.dict(exclude_unset=True).items():
+    changes = blog_data.dict(exclude_unset=True)
+    if "image_url" in changes:
+        changes["image_url"] = image_store.normalize_image_url(changes["image_url"])
+    for key, value in changes.items():
         setattr(blog, key, value)
     
+    http_cache.bump(db, "blogs")
     db.commit()
     return {"message": "Artikel berhasil diupdate"}
 
 @router.delete("/{blog_id}")
-def delete_blog(blog_id: int, db: Session = Depends(get_db)):
+def delete_blog(blog_id: int, user: identity.Identity = Depends(can_write), db: Session = Depends(get_db)):
     """Hapus artikel"""
-    blog = db.query(Blog).filter(Blog.id == blog_id).first()
-    if not blog:
-        raise HTTPException(status_code=404, detail="Artikel tidak ditemukan")
+    blog = _get_own_blog(db, blog_id, user)
     
     db.delete(blog)
+    http_cache.bump(db, "blogs")
     db.commit()
     return {"message": "Artikel berhasil dihapus"}
\ No newline at end of file
@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Depends, File, UploadFile
+import identity
+import image_store
+
+router = APIRouter(prefix="/images", tags=["images"])
+
+# --- ENDPOINTS ---
+
+@router.post("/", dependencies=[Depends(identity.get_current_user)])
+def upload_image(file: UploadFile = File(...)):
+    """Upload gambar (produk/blog/profil), hanya untuk user yang login.
+    Simpan URL yang dikembalikan ke field image_url."""
+    data = file.file.read(image_store.MAX_IMAGE_BYTES + 1)
+    return image_store.store(data)
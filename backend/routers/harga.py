@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 from typing import List, Optional
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from database import SessionLocal
 from models import CoffeePrice
-from routers.auth import get_db
+from routers.auth import get_db, get_async_db
+import events
+import http_cache
+import identity
+import price_history
 
 router = APIRouter(prefix="/prices", tags=["prices"])
 
@@ -25,45 +31,120 @@ class PriceOut(BaseModel):
     class Config:
         from_attributes = True
 
+PRICE_LIST = TypeAdapter(List[PriceOut])
+
+class PricePoint(BaseModel):
+    period_start: date
+    open: int
+    high: int
+    low: int
+    close: int
+    avg: float
+    ticks: int
+
+class PriceTick(BaseModel):
+    price: int
+    recorded_at: datetime
+
+    class Config:
+        from_attributes = True
+
+POINT_LIST = TypeAdapter(List[PricePoint])
+TICK_LIST = TypeAdapter(List[PriceTick])
+
 # --- ENDPOINTS ---
 
 @router.get("/", response_model=List[PriceOut])
-def get_prices(db: Session = Depends(get_db)):
-    """Ambil daftar harga pasar terbaru"""
-    return db.query(CoffeePrice).order_by(CoffeePrice.updated_at.desc()).all()
+async def get_prices(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Ambil daftar harga pasar terbaru (ETag/304 + cache memori, lihat http_cache.py)"""
+    async def build(headers):
+        result = await db.execute(select(CoffeePrice).order_by(CoffeePrice.updated_at.desc()))
+        return result.scalars().all()
+
+    return await http_cache.cached_response_async(request, db, "prices", build, PRICE_LIST)
+
+@router.get("/history/{coffee_type}", response_model=List[PricePoint])
+async def get_price_history(
+    coffee_type: str,
+    request: Request,
+    interval: str = Query("day", pattern="^(day|week|month)$"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Grafik harga: OHLC + min/max/rata-rata per hari/minggu/bulan (default 1 tahun terakhir)"""
+    date_to = date_to or datetime.utcnow().date()
+    date_from = date_from or date_to - timedelta(days=365)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from harus sebelum date_to")
+
+    async def build(headers):
+        dialect = db.get_bind().dialect.name
+        stmt = price_history.series_select(dialect, coffee_type, interval, date_from, date_to)
+        return price_history.to_points((await db.execute(stmt)).all())
+
+    return await http_cache.cached_response_async(request, db, "prices", build, POINT_LIST)
+
+@router.get("/history/{coffee_type}/ticks", response_model=List[PriceTick])
+async def get_price_ticks(
+    coffee_type: str,
+    request: Request,
+    date_from: date,
+    date_to: Optional[date] = None,
+    limit: int = Query(1000, ge=1, le=10000),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Semua perubahan harga (tanpa agregasi) dalam rentang tanggal, untuk zoom grafik"""
+    since, until = price_history.day_range(date_from, date_to or datetime.utcnow().date())
+
+    async def build(headers):
+        stmt = price_history.ticks_select(coffee_type, since, until, limit)
+        return (await db.execute(stmt)).all()
+
+    return await http_cache.cached_response_async(request, db, "prices", build, TICK_LIST)
 
-@router.post("/", response_model=PriceOut)
+@router.post("/", response_model=PriceOut, dependencies=[Depends(identity.require_role("admin"))])
 def update_price(price_data: PriceCreate, db: Session = Depends(get_db)):
     """Admin update/tambah harga baru"""
     # Cek apakah jenis kopi ini sudah ada datanya?
     existing_price = db.query(CoffeePrice).filter(CoffeePrice.coffee_type == price_data.coffee_type).first()
+    now = datetime.utcnow()
+    # Harga lama tidak hilang: setiap update dicatat ke riwayat
+    price_history.record(db, price_data.coffee_type, price_data.price, now)
     
     if existing_price:
         # Update yang sudah ada
         existing_price.price = price_data.price
         existing_price.description = price_data.description
-        existing_price.updated_at = datetime.utcnow()
+        existing_price.updated_at = now
+        http_cache.bump(db, "prices")
         db.commit()
         db.refresh(existing_price)
+        events.publish("prices", "price", PriceOut.model_validate(existing_price).model_dump(mode="json"))
         return existing_price
     else:
         # Buat baru
         new_price = CoffeePrice(
             coffee_type=price_data.coffee_type,
             price=price_data.price,
-            description=price_data.description
+            description=price_data.description,
+            updated_at=now
         )
         db.add(new_price)
+        http_cache.bump(db, "prices")
         db.commit()
         db.refresh(new_price)
+        events.publish("prices", "price", PriceOut.model_validate(new_price).model_dump(mode="json"))
         return new_price
 
-@router.delete("/{price_id}")
+@router.delete("/{price_id}", dependencies=[Depends(identity.require_role("admin"))])
 def delete_price(price_id: int, db: Session = Depends(get_db)):
     price = db.query(CoffeePrice).filter(CoffeePrice.id == price_id).first()
     if not price:
         raise HTTPException(status_code=404, detail="Data tidak ditemukan")
     
     db.delete(price)
+    http_cache.bump(db, "prices")
     db.commit()
+    events.publish("prices", "price_deleted", {"id": price_id})
     return {"message": "Data harga dihapus"}
\ No newline at end of file
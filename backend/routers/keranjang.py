@@ -0,0 +1,80 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+from routers.auth import get_db
+import cart
+import identity
+
+# Keranjang pembeli di server: setiap item menahan stok sementara (lihat cart.py).
+# Checkout: POST /orders/checkout
+router = APIRouter(prefix="/cart", tags=["cart"])
+
+# --- SCHEMA ---
+class CartItemSet(BaseModel):
+    quantity: int = Field(ge=0)  # 0 = hapus dari keranjang
+
+class CartLine(BaseModel):
+    product_id: int
+    name: Optional[str] = None
+    image_url: Optional[str] = None
+    quantity: int
+    price: int
+    expires_at: datetime
+    active: bool  # False = reservasi sudah kadaluarsa, stok tidak lagi ditahan
+
+class CartOut(BaseModel):
+    items: List[CartLine]
+    total_price: int
+    expires_at: Optional[datetime] = None
+
+# --- ENDPOINTS ---
+
+@router.get("", response_model=CartOut)
+def get_cart(user: identity.Identity = Depends(identity.get_current_user), db: Session = Depends(get_db)):
+    """Isi keranjang user yang login beserta batas waktu reservasinya"""
+    now = datetime.utcnow()
+    items = [
+        {**row._asdict(), "active": row.expires_at > now}
+        for row in db.execute(cart.cart_select(user.id)).all()
+    ]
+    active = [item for item in items if item["active"]]
+    return {
+        "items": items,
+        "total_price": sum(item["quantity"] * item["price"] for item in items),
+        "expires_at": min((item["expires_at"] for item in active), default=None),
+    }
+
+@router.put("/items/{product_id}")
+def set_cart_item(
+    product_id: int,
+    item: CartItemSet,
+    user: identity.Identity = Depends(identity.get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Set jumlah produk di keranjang dan tahan stoknya (409 jika stok tersedia tidak cukup)"""
+    if item.quantity == 0:
+        cart.release(db, user.id, [product_id])
+        db.commit()
+        return {"message": "Produk dihapus dari keranjang"}
+    expires_at = cart.reserve(db, user.id, product_id, item.quantity)
+    return {"message": "Stok ditahan", "product_id": product_id, "quantity": item.quantity, "expires_at": expires_at}
+
+@router.delete("/items/{product_id}")
+def remove_cart_item(
+    product_id: int,
+    user: identity.Identity = Depends(identity.get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Hapus produk dari keranjang (stok langsung tersedia lagi untuk pembeli lain)"""
+    cart.release(db, user.id, [product_id])
+    db.commit()
+    return {"message": "Produk dihapus dari keranjang"}
+
+@router.delete("")
+def clear_cart(user: identity.Identity = Depends(identity.get_current_user), db: Session = Depends(get_db)):
+    """Kosongkan keranjang"""
+    released = cart.release(db, user.id)
+    db.commit()
+    return {"message": "Keranjang dikosongkan", "released": released}
@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordBearer
+from typing import Optional
+import events
+import identity
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+TOPICS = ("prices", "orders")
+
+# Topik prices publik; token hanya wajib untuk topik orders
+optional_token = OAuth2PasswordBearer(tokenUrl="login", auto_error=False)
+
+# --- ENDPOINTS ---
+
+@router.get("")
+async def subscribe(
+    request: Request,
+    topics: str = Query("prices", description="Dipisah koma: prices, orders"),
+    last_event_id: Optional[int] = Query(None, description="Alternatif header Last-Event-ID"),
+    last_event_id_header: Optional[int] = Header(None, alias="Last-Event-ID"),
+    token: Optional[str] = Depends(optional_token),
+):
+    """Stream Server-Sent Events untuk harga terbaru & perubahan status pesanan.
+    Topik orders = pesanan milik user yang login (header Authorization: Bearer <token>, jadi client
+    memakai fetch-stream, bukan EventSource bawaan browser yang tidak bisa mengirim header).
+    Event: price, order_created, order_status, reset (data terlewat terlalu banyak: ambil ulang daftar lengkap)."""
+    requested = {t.strip() for t in topics.split(",") if t.strip()}
+    if not requested or not requested <= set(TOPICS):
+        raise HTTPException(status_code=400, detail="Topik tidak dikenal (pilihan: prices, orders)")
+
+    subscribed = set()
+    if "prices" in requested:
+        subscribed.add("prices")
+    if "orders" in requested:
+        if not token:
+            raise HTTPException(status_code=401, detail="Login diperlukan untuk topik orders",
+                                headers={"WWW-Authenticate": "Bearer"})
+        user = await identity.get_current_user(token)
+        subscribed.add(events.order_topic(user.id))
+
+    resume_from = last_event_id_header if last_event_id_header is not None else last_event_id
+    sub, missed, reset = events.hub.subscribe(subscribed, resume_from)
+    if sub is None:
+        raise HTTPException(status_code=503, detail="Terlalu banyak koneksi live", headers={"Retry-After": "30"})
+
+    return StreamingResponse(
+        events.stream(sub, missed, reset, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,14 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Response
+from sqlalchemy import insert, select, update, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, date, time, timedelta
 from database import SessionLocal
-from models import Order, OrderItem, Product, User
-from routers.auth import get_db
+from models import CartReservation, Order, OrderItem, Product, User
+from routers.auth import get_db, get_async_db
+import cart
+import exporter
+import fast_json
+import idempotency
+import http_cache
+import identity
+import outbox
+import ratelimit
+import stats
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
+# Checkout & ubah status: satu bucket per user yang login (tanpa token: per IP)
+write_limit = Depends(ratelimit.limit("orders_write", "30/m:10", per="user"))
+
 # --- SCHEMA ---
 class CartItem(BaseModel):
     product_id: int
@@ -46,108 +61,321 @@ class OrderOut(BaseModel):
 class OrderStatusUpdate(BaseModel):
     status: str
 
+# --- CHECKOUT HELPER ---
+
+def _take_stock(db: Session, product_id: int, qty: int, buyer_id: int, now: datetime, held: bool) -> bool:
+    """UPDATE stok bersyarat. held=True: unit sudah ditahan reservasi pembeli ini, cukup cek stock >= qty.
+    Tanpa reservasi: unit yang sedang ditahan keranjang pembeli lain tidak boleh ikut terjual."""
+    condition = Product.stock >= qty if held else Product.stock - cart.reserved_quantity(Product.id, now, buyer_id) >= qty
+    result = db.execute(
+        update(Product)
+        .where(Product.id == product_id, condition)
+        .values(stock=Product.stock - qty, version=Product.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+def _raise_out_of_stock(db: Session, product_id: int, buyer_id: int, now: datetime):
+    db.rollback()
+    row = db.execute(
+        select(Product.name, Product.stock - cart.reserved_quantity(Product.id, now, buyer_id))
+        .where(Product.id == product_id)
+    ).first()
+    name, remaining = row if row else (f"ID {product_id}", 0)
+    raise HTTPException(status_code=409, detail=f"Stok '{name}' tidak mencukupi (Sisa: {max(remaining, 0)})")
+
+def _save_order(db: Session, buyer_id: int, lines: dict, idempotency_key: Optional[str], request_hash: Optional[str]):
+    """Simpan pesanan + semua item sekaligus, lepas reservasi produk yang dibeli, lalu commit.
+    lines = {product_id: (quantity, harga)}"""
+    try:
+        total_price = sum(qty * price for qty, price in lines.values())
+        new_order = Order(buyer_id=buyer_id, status="Pending", total_price=total_price)
+        db.add(new_order)
+        db.flush()
+
+        db.execute(insert(OrderItem), [
+            {"order_id": new_order.id, "product_id": pid, "quantity": qty, "price_at_purchase": price}
+            for pid, (qty, price) in lines.items()
+        ])
+        cart.release(db, buyer_id, lines)
+        stats.record_order(db, total_price, sum(qty for qty, _ in lines.values()), when=new_order.created_at)
+        http_cache.bump(db, "products")  # stok berubah
+        # Efek samping (notifikasi, dll.) dijalankan worker outbox, bukan di request ini
+        outbox.enqueue(db, "order.created", {
+            "order_id": new_order.id,
+            "buyer_id": buyer_id,
+            "total_price": total_price,
+            "items": [{"product_id": pid, "quantity": qty} for pid, (qty, _) in lines.items()],
+        })
+
+        response = {"message": "Transaksi Berhasil", "order_id": new_order.id}
+        if idempotency_key:
+            idempotency.save(db, idempotency_key, request_hash, response)
+        db.commit()
+    except IntegrityError:
+        # Retry yang datang bersamaan dengan key yang sama: pemenang sudah commit, ikuti hasilnya
+        db.rollback()
+        replay = idempotency.lookup(db, idempotency_key, request_hash) if idempotency_key else None
+        if replay:
+            return replay
+        raise
+    except Exception:
+        db.rollback()
+        raise
+
+    outbox.notify()
+    return response
+
+def _replay(db: Session, idempotency_key: Optional[str], payload: dict):
+    """(response tersimpan atau None, request_hash)"""
+    if not idempotency_key:
+        return None, None
+    idempotency.maybe_sweep(db)
+    request_hash = idempotency.fingerprint(payload)
+    return idempotency.lookup(db, idempotency_key, request_hash), request_hash
+
 # --- ENDPOINTS ---
 
-@router.post("/")
-def create_order(order_data: OrderCreate, db: Session = Depends(get_db)):
+@router.post("/", dependencies=[write_limit])
+def create_order(
+    order_data: OrderCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    db: Session = Depends(get_db),
+):
+    """Checkout dalam SATU transaksi: stok dikurangi dengan UPDATE bersyarat,
+    jadi dua pembeli yang rebutan stok terakhir tidak bisa sama-sama lolos (oversell).
+    Stok yang sedang ditahan keranjang pembeli lain (lihat cart.py) tidak ikut terjual.
+    Jika header Idempotency-Key dikirim, retry dengan key yang sama mendapat response yang sama
+    tanpa membuat pesanan / mengurangi stok lagi."""
+    # 0. Retry dari client? Kembalikan response yang tersimpan
+    replay, request_hash = _replay(db, idempotency_key, order_data.dict())
+    if replay:
+        return replay
+
     # 1. Cek Pembeli
-    buyer = db.query(User).filter(User.username == order_data.buyer_username).first()
+    buyer = identity.resolve(db, order_data.buyer_username)
     if not buyer:
         raise HTTPException(status_code=404, detail="User pembeli tidak ditemukan")
 
     if not order_data.items:
         raise HTTPException(status_code=400, detail="Keranjang belanja kosong!")
 
-    # 2. Buat Pesanan (Draft)
-    new_order = Order(buyer_id=buyer.id, status="Pending", total_price=0)
-    db.add(new_order)
-    db.commit()
-    db.refresh(new_order)
+    # 2. Gabungkan item dengan produk yang sama
+    quantities = {}
+    for item in order_data.items:
+        if item.quantity <= 0:
+            raise HTTPException(status_code=400, detail="Jumlah barang harus lebih dari 0")
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
 
-    total_price = 0
-    items_created = 0
+    # 3. Ambil semua produk di keranjang dengan satu query IN (...)
+    products = {
+        p.id: p
+        for p in db.query(Product.id, Product.name, Product.price)
+        .filter(Product.id.in_(quantities))
+        .all()
+    }
+    for product_id in quantities:
+        if product_id not in products:
+            raise HTTPException(status_code=404, detail=f"Produk dengan ID {product_id} tidak ditemukan. Mohon hapus keranjang dan belanja ulang.")
 
-    # 3. Masukkan Barang
-    for item in order_data.items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
-        
-        # PERBAIKAN: Error jika produk tidak ada (jangan di-skip)
-        if not product:
-            db.delete(new_order) # Batalkan order
-            db.commit()
-            raise HTTPException(status_code=404, detail=f"Produk dengan ID {item.product_id} tidak ditemukan. Mohon hapus keranjang dan belanja ulang.")
-        
-        # PERBAIKAN: Error jika stok kurang
-        if product.stock < item.quantity:
-            db.delete(new_order) # Batalkan order
-            db.commit()
-            raise HTTPException(status_code=400, detail=f"Stok '{product.name}' tidak mencukupi (Sisa: {product.stock})")
-
-        # Kurangi Stok
-        product.stock -= item.quantity
-        
-        # Hitung Subtotal
-        subtotal = product.price * item.quantity
-        total_price += subtotal
-
-        # Simpan Item
-        order_item = OrderItem(
-            order_id=new_order.id,
-            product_id=product.id,
-            quantity=item.quantity,
-            price_at_purchase=product.price
-        )
-        db.add(order_item)
-        items_created += 1
-
-    # 4. Finalisasi Pesanan
-    if items_created == 0:
-        db.delete(new_order)
-        db.commit()
-        raise HTTPException(status_code=400, detail="Gagal membuat pesanan: Tidak ada barang valid.")
+    # 4. Kurangi stok secara atomik (urut ID supaya urutan lock konsisten antar transaksi)
+    now = datetime.utcnow()
+    for product_id in sorted(quantities):
+        if not _take_stock(db, product_id, quantities[product_id], buyer.id, now, held=False):
+            _raise_out_of_stock(db, product_id, buyer.id, now)
 
-    new_order.total_price = total_price
-    db.commit()
+    # 5. Simpan pesanan + semua item sekaligus
+    lines = {pid: (qty, products[pid].price) for pid, qty in quantities.items()}
+    return _save_order(db, buyer.id, lines, idempotency_key, request_hash)
 
-    return {"message": "Transaksi Berhasil", "order_id": new_order.id}
+@router.post("/checkout", dependencies=[write_limit])
+def checkout_cart(
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    user: identity.Identity = Depends(identity.get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Checkout keranjang server (/cart) milik user yang login.
+    Reservasi yang masih aktif sudah menjamin stok, jadi produk tidak dibaca & divalidasi ulang:
+    cukup UPDATE stok + INSERT pesanan dengan harga saat masuk keranjang.
+    Reservasi yang sudah kadaluarsa tetap dicoba, dengan cek stok seperti pesanan biasa."""
+    replay, request_hash = _replay(db, idempotency_key, {"checkout": user.id})
+    if replay:
+        return replay
+
+    now = datetime.utcnow()
+    rows = db.execute(
+        select(CartReservation.product_id, CartReservation.quantity, CartReservation.price, CartReservation.expires_at)
+        .where(CartReservation.buyer_id == user.id)
+        .order_by(CartReservation.product_id)
+    ).all()
+    if not rows:
+        raise HTTPException(status_code=400, detail="Keranjang belanja kosong!")
+
+    for row in rows:
+        if not _take_stock(db, row.product_id, row.quantity, user.id, now, held=row.expires_at > now):
+            _raise_out_of_stock(db, row.product_id, user.id, now)
+
+    lines = {row.product_id: (row.quantity, row.price) for row in rows}
+    return _save_order(db, user.id, lines, idempotency_key, request_hash)
+
+# --- LIST HELPER ---
+
+def parse_cursor(cursor: str):
+    """Cursor berbentuk '<created_at ISO>_<order id>'"""
+    try:
+        created_at, order_id = cursor.rsplit("_", 1)
+        order_id = int(order_id)
+        if not 0 <= order_id <= 2**63 - 1:  # di luar INTEGER SQLite -> OverflowError (500)
+            raise ValueError(order_id)
+        return datetime.fromisoformat(created_at), order_id
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor tidak valid")
+
+def filter_orders(stmt, limit: int, cursor: Optional[str] = None, status: Optional[str] = None,
+                  date_from: Optional[date] = None, date_to: Optional[date] = None):
+    """Filter status/tanggal + keyset pagination pada (created_at, id), terbaru di atas"""
+    if status:
+        stmt = stmt.where(Order.status == status)
+    if date_from:
+        stmt = stmt.where(Order.created_at >= datetime.combine(date_from, time.min))
+    if date_to:
+        stmt = stmt.where(Order.created_at < datetime.combine(date_to + timedelta(days=1), time.min))
+    if cursor:
+        stmt = stmt.where(tuple_(Order.created_at, Order.id) < tuple_(*parse_cursor(cursor)))
+    # Ambil 1 baris lebih untuk tahu apakah masih ada halaman berikutnya
+    return stmt.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit + 1)
+
+def order_summary_select():
+    """SELECT kolom pesanan + nama pembeli (Row, bukan objek ORM) untuk jalur JSON cepat"""
+    return select(
+        Order.id,
+        Order.total_price,
+        Order.status,
+        Order.created_at,
+        Order.buyer_id,
+        User.username.label("buyer_name"),
+    ).outerjoin(User, Order.buyer_id == User.id)
+
+def order_items_select(order_ids):
+    """Item semua pesanan di satu halaman dalam satu query (nama & gambar produk lewat JOIN)"""
+    return (
+        select(OrderItem.order_id, Product.name, Product.image_url, OrderItem.quantity, OrderItem.price_at_purchase)
+        .outerjoin(Product, OrderItem.product_id == Product.id)
+        .where(OrderItem.order_id.in_(order_ids))
+        .order_by(OrderItem.id)
+    )
+
+def cut_page(rows, limit: int):
+    """Potong ke `limit` -> (rows, header X-Next-Cursor jika masih ada halaman berikutnya)"""
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        headers["X-Next-Cursor"] = f"{last.created_at.isoformat()}_{last.id}"
+    return rows, headers
+
+def orders_response(rows, item_rows, headers) -> Response:
+    """Susun dict berbentuk List[OrderOut] dari Row, lalu encode langsung (tanpa validasi per baris)"""
+    items = {}
+    for order_id, name, image_url, quantity, price_at_purchase in item_rows:
+        items.setdefault(order_id, []).append({
+            "product": {"name": name, "image_url": image_url},
+            "quantity": quantity,
+            "price_at_purchase": price_at_purchase,
+        })
+    data = [
+        {
+            "id": r.id,
+            "total_price": r.total_price,
+            "status": r.status,
+            "created_at": r.created_at,
+            "items": items.get(r.id, []),
+            "buyer_id": r.buyer_id,
+            "buyer_name": r.buyer_name,
+        }
+        for r in rows
+    ]
+    return fast_json.FastJSONResponse(data, headers=headers)
+
+# --- ENDPOINTS (LIST) ---
 
 @router.get("/my-orders/{username}", response_model=List[OrderOut])
-def get_my_orders(username: str, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == username).first()
+async def get_my_orders(
+    username: str,
+    status: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Riwayat pesanan pembeli (terbaru di atas, per halaman)"""
+    user = await identity.resolve_async(db, username)
     if not user: return []
-    return db.query(Order).filter(Order.buyer_id == user.id).order_by(Order.created_at.desc()).all()
+    stmt = filter_orders(order_summary_select().where(Order.buyer_id == user.id), limit, cursor, status, date_from, date_to)
+    rows, headers = cut_page((await db.execute(stmt)).all(), limit)
+    item_rows = (await db.execute(order_items_select([r.id for r in rows]))).all() if rows else []
+    return orders_response(rows, item_rows, headers)
 
 @router.get("/incoming/{seller_username}", response_model=List[OrderOut])
-def get_incoming_orders(seller_username: str, db: Session = Depends(get_db)):
+def get_incoming_orders(
+    seller_username: str,
+    status: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+):
     """Mengambil pesanan masuk khusus untuk petani tersebut"""
-    seller = db.query(User).filter(User.username == seller_username).first()
+    seller = identity.resolve(db, seller_username)
     if not seller:
         raise HTTPException(status_code=404, detail="Seller not found")
 
-    # Ambil order yang memiliki item dari produk seller ini
-    orders = (
-        db.query(Order)
-        .join(OrderItem)
-        .join(Product)
-        .filter(Product.seller_id == seller.id)
-        .distinct()
-        .order_by(Order.created_at.desc())
-        .all()
+    # Order yang memiliki item dari produk seller ini (subquery, tanpa DISTINCT)
+    seller_order_ids = (
+        select(OrderItem.order_id)
+        .join(Product, OrderItem.product_id == Product.id)
+        .where(Product.seller_id == seller.id)
     )
-    
-    # Isi nama pembeli
-    for o in orders:
-        if o.buyer:
-            o.buyer_name = o.buyer.username
-            
-    return orders
-
-@router.put("/{order_id}/status")
+    stmt = filter_orders(order_summary_select().where(Order.id.in_(seller_order_ids)), limit, cursor, status, date_from, date_to)
+    rows, headers = cut_page(db.execute(stmt).all(), limit)
+    item_rows = db.execute(order_items_select([r.id for r in rows])).all() if rows else []
+    return orders_response(rows, item_rows, headers)
+
+@router.get("/incoming/{seller_username}/export")
+def export_incoming_orders(
+    seller_username: str,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    status: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    user: identity.Identity = Depends(identity.get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Download penjualan petani (CSV/NDJSON), satu baris per item, di-stream tanpa batas jumlah.
+    Hanya untuk petani itu sendiri atau admin (berisi nama pembeli & nilai pesanan)."""
+    # Dicek sebelum lookup seller, jadi user lain juga tidak bisa menebak username mana yang ada
+    if user.role != "admin" and user.username != seller_username:
+        raise HTTPException(status_code=403, detail="Hanya bisa mengunduh penjualan milik sendiri")
+    seller = identity.resolve(db, seller_username)
+    if not seller:
+        raise HTTPException(status_code=404, detail="Seller not found")
+    stmt = exporter.order_rows_select(seller.id, status, date_from, date_to)
+    return exporter.export_response(stmt, format, f"penjualan-{seller.username}")
+
+@router.put("/{order_id}/status", dependencies=[write_limit])
 def update_status(order_id: int, status_data: OrderStatusUpdate, db: Session = Depends(get_db)):
     order = db.query(Order).filter(Order.id == order_id).first()
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
+    stats.change_order_status(db, order.status, status_data.status)
+    # Pembeli yang membuka halaman pesanan melihat perubahan lewat /events (dikirim worker outbox)
+    outbox.enqueue(db, "order.status_changed", {
+        "order_id": order.id, "buyer_id": order.buyer_id, "old_status": order.status, "status": status_data.status,
+    })
     order.status = status_data.status
     db.commit()
+    outbox.notify()
     return {"message": "Status updated"}
\ No newline at end of file
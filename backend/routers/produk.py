@@ -1,10 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException
+import csv
+import hashlib
+import io
+import os
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, ValidationError, field_validator, model_validator
 from database import SessionLocal
 from models import Product, User
-from routers.auth import get_db
+from routers.auth import get_db, get_async_db
+import fast_json
+import http_cache
+import image_store
+import identity
+import stats
 
 router = APIRouter(prefix="/products", tags=["products"])
 
@@ -17,12 +29,20 @@ class ProductCreate(BaseModel):
     image_url: Optional[str] = None
     seller_username: str
 
+def _not_null(value):
+    # Kolom yang tidak diubah cukup tidak dikirim; null akan menulis NULL ke database
+    if value is None:
+        raise ValueError("tidak boleh null")
+    return value
+
 class ProductUpdate(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
     price: Optional[int] = None
     stock: Optional[int] = None
-    image_url: Optional[str] = None
+    image_url: Optional[str] = None  # null = hapus gambar
+
+    not_null = field_validator("name", "description", "price", "stock", mode="before")(_not_null)
 
 class ProductOut(BaseModel):
     id: int
@@ -32,6 +52,7 @@ class ProductOut(BaseModel):
     stock: int
     image_url: Optional[str] = None
     seller_id: int
+    version: int = 1  # naik setiap produk berubah (harga/stok/data)
     
     # Info tambahan (opsional, biar frontend tau siapa penjualnya)
     seller_name: Optional[str] = None
@@ -39,24 +60,130 @@ class ProductOut(BaseModel):
     class Config:
         from_attributes = True
 
+# Bulk import/update (petani dengan banyak produk)
+BULK_MAX_ROWS = int(os.getenv("BULK_MAX_ROWS", "20000"))
+BULK_CSV_COLUMNS = ("name", "description", "price", "stock", "image_url")
+# Lookup produk per id (halaman keranjang / pesanan)
+BATCH_MAX_IDS = int(os.getenv("BATCH_MAX_IDS", "200"))
+# ID terbesar yang muat di INTEGER SQLite; lebih besar dari ini -> OverflowError di driver (500)
+MAX_ID = 2**63 - 1
+
+class ProductBulkRow(BaseModel):
+    name: str = Field(min_length=1)
+    description: str = ""
+    price: int = Field(ge=0)
+    stock: int = Field(ge=0)
+    image_url: Optional[str] = None
+
+class ProductBulkUpdate(BaseModel):
+    id: int
+    name: Optional[str] = None
+    description: Optional[str] = None
+    price: Optional[int] = Field(None, ge=0)
+    stock: Optional[int] = Field(None, ge=0)
+    image_url: Optional[str] = None  # null = hapus gambar
+
+    not_null = field_validator("name", "description", "price", "stock", mode="before")(_not_null)
+
+    @model_validator(mode="after")
+    def has_changes(self):
+        if not self.model_fields_set - {"id"}:
+            raise ValueError("tidak ada kolom yang diubah")
+        return self
+
+# --- QUERY HELPER ---
+
+def catalog_select():
+    """SELECT katalog: hanya kolom yang dibutuhkan ProductOut + nama seller dalam satu JOIN.
+    Urutan & label kolom = field ProductOut, karena hasilnya langsung di-encode (fast_json.dump_rows)."""
+    return (
+        select(
+            Product.id,
+            Product.name,
+            Product.description,
+            Product.price,
+            Product.stock,
+            Product.image_url,
+            Product.seller_id,
+            Product.version,
+            User.username.label("seller_name"),
+        )
+        .outerjoin(User, Product.seller_id == User.id)
+    )
+
 # --- ENDPOINTS ---
 
 @router.get("/", response_model=List[ProductOut])
-def get_products(db: Session = Depends(get_db)):
-    """Mengambil semua produk (Untuk Beranda & Admin)"""
-    products = db.query(Product).all()
-    
-    # Isi nama seller manual
-    for p in products:
-        if p.seller:
-            p.seller_name = p.seller.username
-            
-    return products
+async def get_products(
+    request: Request,
+    cursor: Optional[int] = Query(None, ge=0, le=MAX_ID, description="ID produk terakhir dari halaman sebelumnya"),
+    limit: int = Query(100, ge=1, le=500),
+    seller: Optional[str] = None,
+    min_price: Optional[int] = None,
+    max_price: Optional[int] = None,
+    in_stock: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Mengambil produk (Untuk Beranda & Admin), per halaman dengan keyset pagination.
+    Halaman berikutnya: kirim nilai header X-Next-Cursor sebagai ?cursor=..."""
+    async def build(headers):
+        stmt = catalog_select()
+
+        if cursor is not None:
+            stmt = stmt.where(Product.id > cursor)
+        if seller:
+            stmt = stmt.where(User.username == seller)
+        if min_price is not None:
+            stmt = stmt.where(Product.price >= min_price)
+        if max_price is not None:
+            stmt = stmt.where(Product.price <= max_price)
+        if in_stock:
+            stmt = stmt.where(Product.stock > 0)
+
+        # Ambil 1 baris lebih untuk tahu apakah masih ada halaman berikutnya
+        rows = (await db.execute(stmt.order_by(Product.id).limit(limit + 1))).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            headers["X-Next-Cursor"] = str(rows[-1].id)
+        return rows
+
+    return await http_cache.cached_response_async(request, db, "products", build, fast_json.dump_rows)
+
+# Harus sebelum GET /{username}, kalau tidak "batch" dianggap username
+@router.get("/batch", response_model=List[ProductOut])
+async def get_products_batch(
+    request: Request,
+    ids: str = Query(..., description="ID produk dipisah koma, mis. 3,8,21"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Produk tertentu saja (urut id) dalam satu query IN, untuk keranjang & cek ulang harga.
+    ID yang tidak ada dilewati. ETag dihitung dari versi tiap produk yang diminta,
+    jadi perubahan produk lain di katalog tidak membatalkan cache client."""
+    try:
+        wanted = sorted({int(part) for part in ids.split(",") if part.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids harus berupa angka dipisah koma")
+    if not wanted:
+        raise HTTPException(status_code=400, detail="ids tidak boleh kosong")
+    if wanted[0] < 1 or wanted[-1] > MAX_ID:
+        raise HTTPException(status_code=400, detail=f"ids harus di antara 1 dan {MAX_ID}")
+    if len(wanted) > BATCH_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"Maksimal {BATCH_MAX_IDS} id per request")
+
+    rows = (await db.execute(catalog_select().where(Product.id.in_(wanted)).order_by(Product.id))).all()
+    versions = ",".join(f"{row.id}:{row.version}" for row in rows)
+    etag = f'W/"products-{hashlib.sha1(versions.encode()).hexdigest()[:16]}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and http_cache.etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return fast_json.FastJSONResponse(fast_json.row_dicts(rows), headers=headers)
 
 @router.post("/", response_model=ProductOut)
 def create_product(product: ProductCreate, db: Session = Depends(get_db)):
     """Tambah Produk Baru"""
-    seller = db.query(User).filter(User.username == product.seller_username).first()
+    seller = identity.resolve(db, product.seller_username)
     if not seller:
         raise HTTPException(status_code=404, detail="Seller not found")
     
@@ -65,21 +192,177 @@ def create_product(product: ProductCreate, db: Session = Depends(get_db)):
         description=product.description,
         price=product.price,
         stock=product.stock,
-        image_url=product.image_url,
+        image_url=image_store.normalize_image_url(product.image_url),
         seller_id=seller.id
     )
     db.add(new_product)
+    stats.increment(db, total_products=1, total_stock=product.stock)
+    http_cache.bump(db, "products")
     db.commit()
     db.refresh(new_product)
     return new_product
 
+# --- BULK ---
+
+def _read_bulk_rows(raw_rows) -> List[ProductBulkRow]:
+    """Validasi seluruh batch dulu; jika ada yang salah, tolak semuanya dengan error per baris"""
+    if len(raw_rows) > BULK_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"Maksimal {BULK_MAX_ROWS} baris per upload")
+    rows, errors = [], []
+    for number, raw in enumerate(raw_rows, start=1):
+        try:
+            rows.append(ProductBulkRow.model_validate(raw))
+        except ValidationError as e:
+            errors.append({
+                "row": number,
+                "errors": [f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()],
+            })
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+    if not rows:
+        raise HTTPException(status_code=400, detail="Tidak ada produk untuk diimport")
+    return rows
+
+async def _parse_bulk_body(request: Request) -> list:
+    """JSON array, atau upload CSV (multipart field 'file' / body text/csv) dengan header kolom"""
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("application/json"):
+        try:
+            payload = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="JSON tidak valid")
+        if not isinstance(payload, list):
+            raise HTTPException(status_code=400, detail="Body harus berupa array produk")
+        return payload
+
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Field 'file' (CSV) wajib diisi")
+        data = await upload.read()
+    elif content_type.startswith("text/csv"):
+        data = await request.body()
+    else:
+        raise HTTPException(status_code=415, detail="Kirim JSON array atau file CSV")
+
+    try:
+        reader = csv.DictReader(io.StringIO(data.decode("utf-8-sig")))
+        missing = {"name", "price", "stock"} - set(reader.fieldnames or [])
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Kolom CSV wajib tidak ada: {', '.join(sorted(missing))}")
+        # Sel kosong = tidak diisi (pakai default), kolom lain diabaikan
+        return [{k: v for k, v in row.items() if k in BULK_CSV_COLUMNS and v not in (None, "")} for row in reader]
+    except (UnicodeDecodeError, csv.Error):
+        raise HTTPException(status_code=400, detail="File CSV tidak valid (harus UTF-8)")
+
+def _insert_products(db: Session, seller_username: str, rows: List[ProductBulkRow]) -> List[int]:
+    """Satu lookup seller + satu INSERT executemany + satu commit untuk seluruh batch"""
+    seller = identity.resolve(db, seller_username)
+    if not seller:
+        raise HTTPException(status_code=404, detail="Seller not found")
+
+    values = [
+        {
+            "name": row.name,
+            "description": row.description,
+            "price": row.price,
+            "stock": row.stock,
+            "image_url": image_store.normalize_image_url(row.image_url),
+            "seller_id": seller.id,
+        }
+        for row in rows
+    ]
+    try:
+        ids = db.scalars(insert(Product).returning(Product.id, sort_by_parameter_order=True), values).all()
+        stats.increment(db, total_products=len(values), total_stock=sum(v["stock"] for v in values))
+        http_cache.bump(db, "products")
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return ids
+
+def _update_products(db: Session, seller_username: str, updates: List[ProductBulkUpdate]) -> list:
+    """Cek kepemilikan semua id dengan satu SELECT, lalu UPDATE executemany dalam satu transaksi"""
+    seller = identity.resolve(db, seller_username)
+    if not seller:
+        raise HTTPException(status_code=404, detail="Seller not found")
+
+    ids = [u.id for u in updates]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=400, detail="ID produk tidak boleh dobel dalam satu batch")
+    owners = {
+        row.id: row
+        for row in db.execute(select(Product.id, Product.seller_id, Product.stock).where(Product.id.in_(ids)))
+    }
+
+    results, values, stock_delta = [], [], 0
+    for number, u in enumerate(updates, start=1):
+        current = owners.get(u.id)
+        if current is None or current.seller_id != seller.id:
+            results.append({"row": number, "id": u.id, "error": "Product not found"})
+            continue
+        changes = u.model_dump(exclude_unset=True)
+        if "image_url" in changes:
+            changes["image_url"] = image_store.normalize_image_url(changes["image_url"])
+        if "stock" in changes:
+            stock_delta += changes["stock"] - (current.stock or 0)
+        values.append(changes)
+        results.append({"row": number, "id": u.id, "updated": True})
+
+    if values:
+        try:
+            # UPDATE per primary key (ORM bulk update), dikelompokkan per kombinasi kolom yang diubah
+            db.execute(update(Product), values)
+            db.execute(
+                update(Product)
+                .where(Product.id.in_([v["id"] for v in values]))
+                .values(version=Product.version + 1)
+                .execution_options(synchronize_session=False)
+            )
+            stats.increment(db, total_stock=stock_delta)
+            http_cache.bump(db, "products")
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    return results
+
+@router.post("/bulk")
+async def create_products_bulk(request: Request, seller_username: str, db: Session = Depends(get_db)):
+    """Import banyak produk sekaligus: JSON array [{name, description, price, stock, image_url}]
+    atau CSV dengan header name,description,price,stock,image_url. Semua baris divalidasi dulu;
+    jika ada yang salah tidak ada yang disimpan (422, error per baris, nomor baris mulai 1)."""
+    rows = _read_bulk_rows(await _parse_bulk_body(request))
+    ids = await run_in_threadpool(_insert_products, db, seller_username, rows)
+    return {"created": len(ids), "results": [{"row": n, "id": i} for n, i in enumerate(ids, start=1)]}
+
+@router.patch("/bulk")
+def update_products_bulk(seller_username: str, updates: List[ProductBulkUpdate], db: Session = Depends(get_db)):
+    """Update harga/stok/data banyak produk milik seller dalam satu transaksi.
+    Baris dengan id yang tidak ditemukan (atau milik seller lain) dilewati dan dilaporkan di results."""
+    if not updates:
+        raise HTTPException(status_code=400, detail="Tidak ada produk untuk diupdate")
+    if len(updates) > BULK_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"Maksimal {BULK_MAX_ROWS} baris per request")
+    results = _update_products(db, seller_username, updates)
+    return {"updated": sum(1 for r in results if r.get("updated")), "results": results}
+
 @router.get("/{username}", response_model=List[ProductOut])
-def get_my_products(username: str, db: Session = Depends(get_db)):
+def get_my_products(
+    request: Request,
+    seller: Optional[identity.Identity] = Depends(identity.get_identity),
+    db: Session = Depends(get_db),
+):
     """Mengambil produk milik user tertentu (Petani)"""
-    seller = db.query(User).filter(User.username == username).first()
     if not seller:
         return []
-    return db.query(Product).filter(Product.seller_id == seller.id).all()
+    return http_cache.cached_response(
+        request, db, "products",
+        lambda headers: db.execute(catalog_select().where(Product.seller_id == seller.id).order_by(Product.id)).all(),
+        fast_json.dump_rows,
+    )
 
 # --- FITUR BARU: EDIT & HAPUS ---
 
@@ -91,9 +374,16 @@ def update_product(product_id: int, product_data: ProductUpdate, db: Session = D
         raise HTTPException(status_code=404, detail="Product not found")
     
     # Update field yang dikirim saja
-    for key, value in product_data.dict(exclude_unset=True).items():
+    changes = product_data.dict(exclude_unset=True)
+    if "image_url" in changes:
+        changes["image_url"] = image_store.normalize_image_url(changes["image_url"])
+    if "stock" in changes:
+        stats.increment(db, total_stock=changes["stock"] - (product.stock or 0))
+    for key, value in changes.items():
         setattr(product, key, value)
+    product.version = Product.version + 1
 
+    http_cache.bump(db, "products")
     db.commit()
     return {"message": "Product updated"}
 
@@ -105,5 +395,7 @@ def delete_product(product_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Product not found")
     
     db.delete(product)
+    stats.increment(db, total_products=-1, total_stock=-(product.stock or 0))
+    http_cache.bump(db, "products")
     db.commit()
     return {"message": "Product deleted"}
\ No newline at end of file
@@ -0,0 +1,178 @@
+import html
+import re
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import literal, or_, text
+from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+from models import Product, Blog
+from routers.auth import get_db
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+# --- INDEX FTS5 (SQLite) ---
+# Tabel virtual memakai external content (content='products'/'blogs'), jadi teks tidak disimpan dua kali.
+# Sinkronisasi lewat trigger database, sehingga semua jalur tulis (ORM, bulk, SQL manual) ikut ter-update.
+FTS_SCHEMA = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, description, content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS blogs_fts USING fts5(
+        title, content, content='blogs', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE TRIGGER IF NOT EXISTS blogs_fts_ai AFTER INSERT ON blogs BEGIN
+        INSERT INTO blogs_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS blogs_fts_ad AFTER DELETE ON blogs BEGIN
+        INSERT INTO blogs_fts(blogs_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS blogs_fts_au AFTER UPDATE OF title, content ON blogs BEGIN
+        INSERT INTO blogs_fts(blogs_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO blogs_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+]
+
+def init_search_index(conn):
+    """Migrasi 0004: buat tabel FTS5 + trigger jika belum ada, lalu isi dari data lama (sekali saja)"""
+    if conn.dialect.name != "sqlite":
+        return
+    existing = {
+        row[0] for row in conn.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE name IN ('products_fts', 'blogs_fts')"
+        )
+    }
+    for statement in FTS_SCHEMA:
+        conn.exec_driver_sql(statement)
+    if "products_fts" not in existing:
+        conn.exec_driver_sql("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+    if "blogs_fts" not in existing:
+        conn.exec_driver_sql("INSERT INTO blogs_fts(blogs_fts) VALUES ('rebuild')")
+
+def build_match_query(q: str) -> Optional[str]:
+    """Ubah input user jadi query FTS5 yang aman: tiap kata di-quote, kata terakhir jadi prefix (ketik-langsung-cari)"""
+    tokens = re.findall(r"\w+", q)
+    if not tokens:
+        return None
+    terms = [f'"{t}"' for t in tokens]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+# --- SCHEMA ---
+class ProductHit(BaseModel):
+    id: int
+    name: str
+    price: int
+    stock: int
+    image_url: Optional[str] = None
+    snippet: Optional[str] = None
+    score: float
+
+class BlogHit(BaseModel):
+    id: int
+    title: str
+    image_url: Optional[str] = None
+    created_at: datetime
+    snippet: Optional[str] = None
+    score: float
+
+class SearchResult(BaseModel):
+    query: str
+    products: List[ProductHit] = []
+    blogs: List[BlogHit] = []
+
+# --- QUERY ---
+
+PRODUCT_SQL = text("""
+    SELECT p.id, p.name, p.price, p.stock, p.image_url,
+           snippet(products_fts, -1, :mark_open, :mark_close, '…', 12) AS snippet,
+           bm25(products_fts, 10.0, 1.0) AS score
+    FROM products_fts JOIN products p ON p.id = products_fts.rowid
+    WHERE products_fts MATCH :match
+    ORDER BY score
+    LIMIT :limit OFFSET :offset
+""")
+
+BLOG_SQL = text("""
+    SELECT b.id, b.title, b.image_url, b.created_at,
+           snippet(blogs_fts, -1, :mark_open, :mark_close, '…', 16) AS snippet,
+           bm25(blogs_fts, 10.0, 1.0) AS score
+    FROM blogs_fts JOIN blogs b ON b.id = blogs_fts.rowid
+    WHERE blogs_fts MATCH :match
+    ORDER BY score
+    LIMIT :limit OFFSET :offset
+""")
+
+# snippet() menandai kata yang cocok dengan karakter kontrol, bukan langsung <mark>: teks produk/blog
+# di-escape dulu, baru penanda diganti tag, jadi HTML dari penjual/penulis tidak ikut dirender client
+MARK_OPEN, MARK_CLOSE = "\x02", "\x03"
+SNIPPET_MARKS = {"mark_open": MARK_OPEN, "mark_close": MARK_CLOSE}
+
+def highlight(snippet: Optional[str]) -> Optional[str]:
+    """Snippet FTS5 -> HTML aman: isi di-escape, hanya <mark>...</mark> yang berupa tag"""
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(MARK_OPEN, "<mark>").replace(MARK_CLOSE, "</mark>")
+
+def _search_products(db: Session, q: str, match: str, limit: int, offset: int):
+    if db.get_bind().dialect.name == "sqlite":
+        return db.execute(PRODUCT_SQL, {"match": match, "limit": limit, "offset": offset, **SNIPPET_MARKS}).all()
+    # Fallback untuk database lain: LIKE biasa tanpa ranking
+    pattern = f"%{q}%"
+    return (
+        db.query(
+            Product.id, Product.name, Product.price, Product.stock, Product.image_url,
+            literal(None).label("snippet"), literal(0.0).label("score"),
+        )
+        .filter(or_(Product.name.ilike(pattern), Product.description.ilike(pattern)))
+        .order_by(Product.id).limit(limit).offset(offset).all()
+    )
+
+def _search_blogs(db: Session, q: str, match: str, limit: int, offset: int):
+    if db.get_bind().dialect.name == "sqlite":
+        return db.execute(BLOG_SQL, {"match": match, "limit": limit, "offset": offset, **SNIPPET_MARKS}).all()
+    pattern = f"%{q}%"
+    return (
+        db.query(
+            Blog.id, Blog.title, Blog.image_url, Blog.created_at,
+            literal(None).label("snippet"), literal(0.0).label("score"),
+        )
+        .filter(or_(Blog.title.ilike(pattern), Blog.content.ilike(pattern)))
+        .order_by(Blog.created_at.desc()).limit(limit).offset(offset).all()
+    )
+
+# --- ENDPOINTS ---
+
+@router.get("/", response_model=SearchResult)
+def search(
+    q: str = Query(..., min_length=1, max_length=100),
+    type: str = Query("all", pattern="^(all|products|blogs)$"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+):
+    """Cari produk & artikel, diurutkan berdasarkan relevansi (bm25)"""
+    result = {"query": q, "products": [], "blogs": []}
+    match = build_match_query(q)
+    if not match:
+        return result
+
+    if type in ("all", "products"):
+        result["products"] = [
+            {**r._mapping, "snippet": highlight(r.snippet)} for r in _search_products(db, q, match, limit, offset)
+        ]
+    if type in ("all", "blogs"):
+        result["blogs"] = [
+            {**r._mapping, "snippet": highlight(r.snippet)} for r in _search_blogs(db, q, match, limit, offset)
+        ]
+    return result
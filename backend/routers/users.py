@@ -5,6 +5,8 @@ from typing import Optional
 from database import SessionLocal
 from models import User
 from routers.auth import get_db
+import identity
+import image_store
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -61,9 +63,14 @@ def update_user_profile(username: str, profile_data: UserProfileUpdate, db: Sess
         raise HTTPException(status_code=404, detail="User not found")
     
     # Update field satu per satu jika ada datanya
-    for key, value in profile_data.dict(exclude_unset=True).items():
+    changes = profile_data.dict(exclude_unset=True)
+    if "profile_image_url" in changes:
+        # Foto dari FileReader (data URL base64) disimpan sebagai file, DB cukup menyimpan URL-nya
+        changes["profile_image_url"] = image_store.normalize_image_url(changes["profile_image_url"])
+    for key, value in changes.items():
         setattr(user, key, value)
     
     db.commit()
     db.refresh(user)
+    identity.invalidate(username)
     return user
\ No newline at end of file
@@ -0,0 +1,150 @@
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models import User, Product, Order, StatCounter, DailyStat
+
+# Counter ringkasan untuk Dashboard Admin. Nilainya diubah (+/-) di transaksi yang sama
+# dengan perubahan datanya, jadi dashboard cukup membaca tabel kecil ini.
+COUNTERS = (
+    "total_users",
+    "total_petani",
+    "total_products",
+    "total_stock",
+    "total_orders",
+    "total_revenue",
+)
+STATUS_PREFIX = "orders_status:"
+
+
+def _upsert_add(db: Session, model, key: dict, deltas: dict):
+    """INSERT baris baru atau tambahkan delta ke kolom yang ada (atomik, aman untuk transaksi paralel)"""
+    values = {**key, **deltas}
+    dialect = db.get_bind().dialect.name
+
+    if dialect in ("sqlite", "postgresql"):
+        dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = dialect_insert(model).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key),
+            set_={col: getattr(model, col) + stmt.excluded[col] for col in deltas},
+        )
+        db.execute(stmt)
+        return
+
+    # Database lain: UPDATE dulu, INSERT jika barisnya belum ada
+    conditions = [getattr(model, col) == val for col, val in key.items()]
+    result = db.execute(
+        update(model).where(*conditions)
+        .values({col: getattr(model, col) + val for col, val in deltas.items()})
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        db.execute(insert(model).values(**values))
+
+
+def increment(db: Session, **deltas):
+    """Contoh: stats.increment(db, total_products=1, total_stock=product.stock). Commit oleh pemanggil."""
+    for name, delta in deltas.items():
+        if delta:
+            _upsert_add(db, StatCounter, {"name": name}, {"value": delta})
+
+
+def change_order_status(db: Session, old_status: str, new_status: str):
+    if old_status != new_status:
+        _upsert_add(db, StatCounter, {"name": f"{STATUS_PREFIX}{old_status}"}, {"value": -1})
+        _upsert_add(db, StatCounter, {"name": f"{STATUS_PREFIX}{new_status}"}, {"value": 1})
+
+
+def record_order(db: Session, total_price: int, items_quantity: int, status: str = "Pending", when: datetime = None):
+    """Pesanan baru: counter total + rollup harian"""
+    increment(db, total_orders=1, total_revenue=total_price, total_stock=-items_quantity)
+    _upsert_add(db, StatCounter, {"name": f"{STATUS_PREFIX}{status}"}, {"value": 1})
+    day = (when or datetime.utcnow()).date()
+    _upsert_add(db, DailyStat, {"day": day}, {"total_orders": 1, "total_revenue": total_price})
+
+
+# ---------- BACA ----------
+
+def read_counters(db: Session) -> dict:
+    """Satu query kecil, tidak tergantung besar tabel users/products/orders"""
+    rows = dict(db.query(StatCounter.name, StatCounter.value).all())
+    result = {name: rows.get(name, 0) for name in COUNTERS}
+    result["orders_by_status"] = {
+        name[len(STATUS_PREFIX):]: value
+        for name, value in rows.items()
+        if name.startswith(STATUS_PREFIX) and value
+    }
+    return result
+
+
+def read_daily(db: Session, days: int = 30) -> list:
+    since = date.today() - timedelta(days=days - 1)
+    rows = (
+        db.query(DailyStat.day, DailyStat.total_orders, DailyStat.total_revenue)
+        .filter(DailyStat.day >= since)
+        .order_by(DailyStat.day)
+        .all()
+    )
+    return [
+        {"day": row.day, "total_orders": row.total_orders, "total_revenue": row.total_revenue}
+        for row in rows
+    ]
+
+
+# ---------- REKONSILIASI ----------
+
+def reconcile(db: Session) -> dict:
+    """Hitung ulang semua counter & rollup harian dari tabel aslinya (full scan, jalankan sesekali saja)"""
+    counters = {
+        "total_users": db.query(func.count(User.id)).scalar(),
+        "total_petani": db.query(func.count(User.id)).filter(User.role == "petani").scalar(),
+        "total_products": db.query(func.count(Product.id)).scalar(),
+        "total_stock": db.query(func.sum(Product.stock)).scalar() or 0,
+        "total_orders": db.query(func.count(Order.id)).scalar(),
+        "total_revenue": db.query(func.sum(Order.total_price)).scalar() or 0,
+    }
+    for status, count in db.query(Order.status, func.count(Order.id)).group_by(Order.status).all():
+        counters[f"{STATUS_PREFIX}{status}"] = count
+
+    order_day = func.date(Order.created_at)
+    daily = db.query(order_day, func.count(Order.id), func.sum(Order.total_price)).group_by(order_day).all()
+
+    now = datetime.utcnow()
+    db.query(StatCounter).delete(synchronize_session=False)
+    db.query(DailyStat).delete(synchronize_session=False)
+    db.add_all([StatCounter(name=name, value=value, updated_at=now) for name, value in counters.items()])
+    db.add_all([
+        DailyStat(
+            day=date.fromisoformat(day) if isinstance(day, str) else day,
+            total_orders=count,
+            total_revenue=revenue or 0,
+        )
+        for day, count, revenue in daily
+        if day is not None
+    ])
+    db.commit()
+    return counters
+
+
+def ensure_initialized(bind):
+    """Migrasi 0005: isi counter dari data yang ada jika tabel counter masih kosong (bind = engine/koneksi)"""
+    with Session(bind) as db:
+        if db.query(StatCounter.name).first() is None:
+            reconcile(db)
+
+
+if __name__ == "__main__":
+    import sys
+    from database import SessionLocal
+
+    if sys.argv[1:] != ["reconcile"]:
+        sys.exit("Pemakaian: python stats.py reconcile")
+    db = SessionLocal()
+    try:
+        for name, value in reconcile(db).items():
+            print(f"{name}: {value}")
+    finally:
+        db.close()
@@ -0,0 +1,75 @@
+"""Fixture bersama. Jalankan dari folder backend: python -m pytest -q
+
+Konfigurasi app dibaca saat import, jadi environment di-set di sini SEBELUM modul app di-import.
+Semua test memakai satu database SQLite sementara; data tiap test dibuat dengan nama unik."""
+import itertools
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+_tmp = tempfile.mkdtemp(prefix="nbb-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/test.db"
+os.environ["MEDIA_ROOT"] = os.path.join(_tmp, "media")
+os.environ["RATE_LIMIT_ENABLED"] = "0"
+os.environ["HASH_WORKERS"] = "0"
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["OUTBOX_WORKER_IN_APP"] = "0"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+import passwords  # noqa: E402
+from database import SessionLocal  # noqa: E402
+from models import Product, User  # noqa: E402
+from routers.auth import create_access_token  # noqa: E402
+
+_ids = itertools.count(1)
+
+
+@pytest.fixture(scope="session")
+def client():
+    # Lifespan jalan di sini (migrasi membuat tabel)
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db(client):
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def make_user(db):
+    def make(role: str = "pembeli") -> User:
+        n = next(_ids)
+        user = User(
+            username=f"{role}{n}", email=f"{role}{n}@test.local", role=role,
+            hashed_password=passwords.hash_password("rahasia"),
+        )
+        db.add(user)
+        db.commit()
+        return user
+    return make
+
+
+@pytest.fixture
+def make_product(db):
+    def make(seller: User, stock: int = 10, price: int = 50_000) -> Product:
+        product = Product(name=f"Kopi {next(_ids)}", description="uji", price=price, stock=stock, seller_id=seller.id)
+        db.add(product)
+        db.commit()
+        return product
+    return make
+
+
+@pytest.fixture
+def auth_header():
+    def header(user: User) -> dict:
+        token = create_access_token(data={"sub": user.username, "uid": user.id, "role": user.role})
+        return {"Authorization": f"Bearer {token}"}
+    return header
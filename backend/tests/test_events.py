@@ -0,0 +1,26 @@
+"""/events: topik orders hanya untuk pesanan milik user yang login"""
+import events
+
+
+def test_orders_topic_requires_login(client, make_user):
+    buyer = make_user()
+    assert client.get("/events", params={"topics": "orders"}).status_code == 401
+    # username di query tidak lagi memberi akses ke pesanan orang lain
+    assert client.get("/events", params={"topics": "orders", "username": buyer.username}).status_code == 401
+    bad = {"Authorization": "Bearer bukan-token"}
+    assert client.get("/events", params={"topics": "orders"}, headers=bad).status_code == 401
+
+
+def test_orders_topic_follows_token_user(client, make_user, auth_header, monkeypatch):
+    buyer, other = make_user(), make_user()
+    subscribed = []
+
+    def full_hub(topics, resume_from):
+        subscribed.append(topics)
+        return None, [], False  # -> 503, tanpa membuka stream
+
+    monkeypatch.setattr(events.hub, "subscribe", full_hub)
+    r = client.get("/events", params={"topics": "prices,orders", "username": other.username},
+                   headers=auth_header(buyer))
+    assert r.status_code == 503
+    assert subscribed == [{"prices", events.order_topic(buyer.id)}]
@@ -0,0 +1,37 @@
+"""POST /images/: wajib login, gambar beresolusi terlalu besar ditolak sebelum di-decode"""
+import hashlib
+import os
+from io import BytesIO
+
+from PIL import Image
+
+import image_store
+
+
+def png(width: int, height: int) -> bytes:
+    buffer = BytesIO()
+    Image.new("L", (width, height)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def upload(client, data: bytes, headers=None):
+    return client.post("/images/", files={"file": ("kopi.png", data, "image/png")}, headers=headers or {})
+
+
+def test_upload_requires_login(client):
+    assert upload(client, png(20, 20)).status_code == 401
+
+
+def test_upload_stores_image_with_thumbnails(client, make_user, auth_header):
+    r = upload(client, png(640, 320), auth_header(make_user("petani")))
+    assert r.status_code == 200
+    assert set(r.json()["thumbnails"]) == {"160", "480"}
+
+
+def test_upload_rejects_too_many_pixels(client, make_user, auth_header, monkeypatch):
+    monkeypatch.setattr(image_store, "MAX_IMAGE_PIXELS", 10_000)
+    data = png(200, 100)  # file kecil, 20.000 piksel
+    r = upload(client, data, auth_header(make_user("petani")))
+    assert r.status_code == 413
+    digest = hashlib.sha256(data).hexdigest()
+    assert not os.path.exists(os.path.join(image_store.MEDIA_ROOT, digest[:2], digest + ".png"))
@@ -0,0 +1,30 @@
+"""Checkout bersamaan untuk satu produk: stok tidak boleh terjual lebih dari yang ada (oversell)"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from models import Order, Product
+
+BUYERS = 20
+STOCK = 7
+
+
+def test_parallel_orders_never_oversell(client, db, make_user, make_product):
+    seller = make_user("petani")
+    product = make_product(seller, stock=STOCK)
+    buyers = [make_user() for _ in range(BUYERS)]
+    start = threading.Barrier(BUYERS)
+
+    def checkout(buyer):
+        start.wait()  # semua thread mengirim request pada saat yang sama
+        return client.post("/orders/", json={
+            "buyer_username": buyer.username, "items": [{"product_id": product.id, "quantity": 1}],
+        }).status_code
+
+    with ThreadPoolExecutor(max_workers=BUYERS) as pool:
+        codes = list(pool.map(checkout, buyers))
+
+    assert codes.count(200) == STOCK
+    assert codes.count(409) == BUYERS - STOCK
+    db.expire_all()
+    assert db.get(Product, product.id).stock == 0
+    assert db.query(Order).filter(Order.buyer_id.in_([b.id for b in buyers])).count() == STOCK
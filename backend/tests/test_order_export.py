@@ -0,0 +1,23 @@
+"""/orders/incoming/{seller}/export: hanya petani pemilik penjualan atau admin"""
+from models import Order, OrderItem
+
+
+def test_export_requires_owner_or_admin(client, db, make_user, make_product, auth_header):
+    seller, other_seller, buyer, admin = make_user("petani"), make_user("petani"), make_user(), make_user("admin")
+    product = make_product(seller)
+    order = Order(buyer_id=buyer.id, status="Pending", total_price=product.price)
+    db.add(order)
+    db.flush()
+    db.add(OrderItem(order_id=order.id, product_id=product.id, quantity=1, price_at_purchase=product.price))
+    db.commit()
+    url = f"/orders/incoming/{seller.username}/export"
+
+    assert client.get(url).status_code == 401
+    assert client.get(url, headers=auth_header(other_seller)).status_code == 403
+    assert client.get(url, headers=auth_header(buyer)).status_code == 403
+    assert client.get("/orders/incoming/tidak-ada/export", headers=auth_header(other_seller)).status_code == 403
+
+    for user in (seller, admin):
+        r = client.get(url, headers=auth_header(user))
+        assert r.status_code == 200
+        assert buyer.username in r.text
@@ -0,0 +1,57 @@
+"""Daftar pesanan (pembeli & petani) memakai jumlah query yang tetap, berapa pun jumlah pesanannya"""
+import pytest
+from sqlalchemy import event
+
+from database import async_engine, engine
+from models import Order, OrderItem
+
+
+@pytest.fixture
+def count_queries():
+    """Hitung statement SQL di engine sync & async selama blok with"""
+    counter = {"n": 0}
+
+    def before_cursor_execute(*args):
+        counter["n"] += 1
+
+    class Counting:
+        def __enter__(self):
+            counter["n"] = 0
+            for target in (engine, async_engine.sync_engine):
+                event.listen(target, "before_cursor_execute", before_cursor_execute)
+            return counter
+
+        def __exit__(self, *exc):
+            for target in (engine, async_engine.sync_engine):
+                event.remove(target, "before_cursor_execute", before_cursor_execute)
+
+    return Counting
+
+
+def make_orders(db, buyer, product, count: int):
+    for _ in range(count):
+        order = Order(buyer_id=buyer.id, status="Pending", total_price=product.price)
+        db.add(order)
+        db.flush()
+        db.add(OrderItem(order_id=order.id, product_id=product.id, quantity=1, price_at_purchase=product.price))
+    db.commit()
+
+
+def test_order_lists_use_constant_query_count(client, db, make_user, make_product, count_queries):
+    counts = {"my-orders": [], "incoming": []}
+    for orders in (1, 10, 100):
+        seller, buyer = make_user("petani"), make_user()
+        product = make_product(seller, stock=1000)
+        make_orders(db, buyer, product, orders)
+
+        for name, url in (("my-orders", f"/orders/my-orders/{buyer.username}"),
+                          ("incoming", f"/orders/incoming/{seller.username}")):
+            with count_queries() as counter:
+                r = client.get(url, params={"limit": 200})
+            assert r.status_code == 200
+            assert len(r.json()) == orders
+            assert all(len(o["items"]) == 1 for o in r.json())
+            counts[name].append(counter["n"])
+
+    for name, per_size in counts.items():
+        assert len(set(per_size)) == 1, f"{name}: jumlah query berubah {per_size}"
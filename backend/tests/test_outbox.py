@@ -0,0 +1,22 @@
+"""Worker outbox: error dari handler dicoba ulang; hanya event tanpa handler yang langsung dead letter"""
+import outbox
+from models import OutboxEvent
+
+
+def test_handler_errors_are_retried_but_unknown_events_dead_letter(db, monkeypatch):
+    def broken(payload):
+        return payload["tidak_ada"]  # KeyError dari dalam handler
+
+    monkeypatch.setitem(outbox.handlers, "uji.keyerror", [broken])
+    outbox.enqueue(db, "uji.keyerror", {"order_id": 1})
+    outbox.enqueue(db, "uji.tanpa_handler", {"order_id": 1})
+    db.commit()
+
+    outbox.process_batch(db)
+
+    events = {e.event_type: e for e in db.query(OutboxEvent).filter(OutboxEvent.event_type.like("uji.%"))}
+    assert events["uji.keyerror"].status == "pending"
+    assert events["uji.keyerror"].attempts == 1
+    assert "KeyError" in events["uji.keyerror"].last_error
+    assert events["uji.tanpa_handler"].status == "dead"
+    assert "NoHandler" in events["uji.tanpa_handler"].last_error
@@ -0,0 +1,13 @@
+"""GET /products/batch: id di luar rentang INTEGER ditolak 400 (bukan 500)"""
+import pytest
+
+
+@pytest.mark.parametrize("ids", ["99999999999999999999", "1,9223372036854775808", "0", "-3", "a,2"])
+def test_batch_rejects_invalid_ids(client, ids):
+    assert client.get("/products/batch", params={"ids": ids}).status_code == 400
+
+
+def test_batch_accepts_largest_id(client):
+    r = client.get("/products/batch", params={"ids": "9223372036854775807"})
+    assert r.status_code == 200
+    assert r.json() == []
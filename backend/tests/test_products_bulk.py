@@ -0,0 +1,36 @@
+"""PATCH /products/bulk: null & baris tanpa perubahan ditolak, counter total_stock ikut berubah"""
+import pytest
+
+import stats
+from models import Product
+
+
+@pytest.mark.parametrize("row", [{"stock": None}, {"name": None}, {"price": None}, {}])
+def test_bulk_update_rejects_null_and_empty_rows(client, db, make_user, make_product, row):
+    seller = make_user("petani")
+    product = make_product(seller, stock=10)
+    r = client.patch("/products/bulk", params={"seller_username": seller.username}, json=[{"id": product.id, **row}])
+    assert r.status_code == 422
+    db.expire_all()
+    saved = db.get(Product, product.id)
+    assert (saved.name, saved.price, saved.stock) == (product.name, product.price, 10)
+
+
+def test_bulk_update_writes_values_and_stock_counter(client, db, make_user, make_product):
+    seller = make_user("petani")
+    first, second = make_product(seller, stock=10), make_product(seller, stock=5)
+    before = stats.read_counters(db)["total_stock"]
+
+    r = client.patch("/products/bulk", params={"seller_username": seller.username}, json=[
+        {"id": first.id, "stock": 25},
+        {"id": second.id, "price": 70_000, "image_url": None},
+    ])
+    assert r.status_code == 200
+    assert r.json()["updated"] == 2
+
+    db.expire_all()
+    assert db.get(Product, first.id).stock == 25
+    assert (db.get(Product, second.id).price, db.get(Product, second.id).stock) == (70_000, 5)
+    assert stats.read_counters(db)["total_stock"] == before + 15
+    body = client.get("/products/batch", params={"ids": f"{first.id},{second.id}"}).json()
+    assert len(body) == 2 and all(isinstance(p["stock"], int) for p in body)
@@ -0,0 +1,24 @@
+"""PUT /products/{id}: null ditolak, counter total_stock mengikuti perubahan stok"""
+import pytest
+
+import stats
+from models import Product
+
+
+@pytest.mark.parametrize("body", [{"stock": None}, {"name": None}, {"price": None}])
+def test_update_rejects_null(client, db, make_user, make_product, body):
+    product = make_product(make_user("petani"), stock=50)
+    before = stats.read_counters(db)["total_stock"]
+    assert client.put(f"/products/{product.id}", json=body).status_code == 422
+    db.expire_all()
+    assert db.get(Product, product.id).stock == 50
+    assert stats.read_counters(db)["total_stock"] == before
+
+
+def test_update_moves_stock_counter(client, db, make_user, make_product):
+    product = make_product(make_user("petani"), stock=50)
+    before = stats.read_counters(db)["total_stock"]
+    assert client.put(f"/products/{product.id}", json={"stock": 40, "image_url": None}).status_code == 200
+    db.expire_all()
+    assert db.get(Product, product.id).stock == 40
+    assert stats.read_counters(db)["total_stock"] == before - 10
@@ -0,0 +1,17 @@
+"""/search/: snippet berisi HTML yang aman (isi produk/blog di-escape, hanya <mark> yang berupa tag)"""
+from models import Blog
+
+
+def test_snippet_escapes_indexed_html(client, db, make_user, make_product):
+    seller = make_user("petani")
+    product = make_product(seller)
+    product.description = 'srikaya <script>alert("x")</script> & <b>manis</b>'
+    db.add(Blog(title="Catatan panen", content="srikaya <img src=x onerror=alert(1)>", author_username="admin"))
+    db.commit()
+
+    body = client.get("/search/", params={"q": "srikaya"}).json()
+    snippet = next(p["snippet"] for p in body["products"] if p["id"] == product.id)
+    assert snippet == '<mark>srikaya</mark> &lt;script&gt;alert(&quot;x&quot;)&lt;/script&gt; &amp; &lt;b&gt;manis&lt;/b&gt;'
+    blog_snippet = body["blogs"][0]["snippet"]
+    assert "<img" not in blog_snippet
+    assert "<mark>srikaya</mark> &lt;img" in blog_snippet